@@ -1,49 +1,14 @@
 import math
-import pandas as pd
 import plotly.graph_objects as go
 
+import ingest
+from decimation import decimated_scatter
+
 import pvlib
 from pvlib.modelchain import ModelChain
 from pvlib.pvsystem import PVSystem
 from pvlib.location import Location
 
-weather_df = pd.read_csv('Datasets/479237_59.41_5.26_2019.csv')
-
-#drop the first row and change the header
-weather_df = weather_df.drop(0)
-weather_df.columns = weather_df.iloc[0]
-weather_df = weather_df.drop(1)
-
-# create new datetime column using the columns year, month, day, hour, minute
-weather_df['datetime'] = pd.to_datetime(weather_df[['Year', 'Month', 'Day', 'Hour', 'Minute']])
-weather_df.set_index('datetime', inplace=True)
-weather_df.index = pd.to_datetime(weather_df.index)
-
-# resample to hourly
-weather_df = weather_df.astype(float)
-weather_df = weather_df.resample('h').mean()
-
-# rename columns to use the pvlib nomenclature
-weather_df = weather_df.rename(
-            {
-                "Temperature": "temp_air",
-                "Wind Speed": "wind_speed",
-                "Relative Humidity": "humidity",
-                "Precipitable Water": "precipitable_water",
-                "GHI": "ghi",
-                "DNI": "dni",
-                "DHI": "dhi",
-            },
-            axis=1,
-        )
-
-
-# select only relevant columns
-weather_df = weather_df[['temp_air', 'wind_speed', 'humidity', 'precipitable_water', 'ghi', 'dni', 'dhi', ]]
-
-# resample to hourly
-weather_df = weather_df.resample('h').mean()
-
 # retrieve the inverter and panel specifications from the pvlib library
 
 cec_modules = pvlib.pvsystem.retrieve_sam("cecmod")
@@ -71,17 +36,6 @@ system = PVSystem(
         temperature_model_parameters=temperature_model_parameters,
     )
 
-# Create and run PV Model
-mc = ModelChain(system, location, aoi_model="physical")
-mc.run_model(weather=weather_df)
-module_energy = mc.results.ac.fillna(0)
-
-# Plot the estimated energy produced by a single panel
-fig = go.Figure()
-fig.add_trace(go.Scatter(x=module_energy.index, y=module_energy, mode='lines'))
-fig.update_layout(yaxis_title='Energy Produced (kWh)')
-fig.show()
-
 # Define panel dimensions and peak power for SunPower_SPR_X21_345
 panel_height = 1.559  # meters
 panel_width = 1.046   # meters
@@ -103,15 +57,44 @@ panel_count = math.floor(roof_area / panel_area_flat_roof)
 # calculate the peak capacity of this system in kWp
 system_peak_capacity = panel_count * panel_peak_power / 1000
 
-print(f"Based on the specified system characteristics, {panel_count} panels can be installed on a {roof_area} m² flat roof. \nThis corresponds to a total system capacity of {system_peak_capacity} kWp.")
 
-# Calculate the monthly production of the entire PV installation 
-system_production = panel_count * module_energy / 1000
-system_production.to_csv('Datasets/PV_system_production.csv', index=True)
-#monthly_production = system_production.resample('ME').sum()
+def module_energy(weather_df):
+    """AC output of a single panel for hourly weather in the pvlib nomenclature."""
+    # Create and run PV Model
+    mc = ModelChain(system, location, aoi_model="physical")
+    mc.run_model(weather=weather_df)
+    return mc.results.ac.fillna(0)
+
+
+def pv_production(weather_df):
+    """Rows of PV_system_production.csv (kWh of the entire PV installation) for hourly weather."""
+    return (panel_count * module_energy(weather_df) / 1000).rename_axis("datetime")
+
+
+if __name__ == "__main__":
+    # Cleaned NSRDB data of all years, already in the pvlib nomenclature (see ingest.py)
+    weather_df = ingest.load("nsrdb", columns=['temp_air', 'wind_speed', 'humidity', 'precipitable_water', 'ghi', 'dni', 'dhi'])
+
+    # resample to hourly
+    weather_df = weather_df.resample('h').mean()
+
+    panel_energy = module_energy(weather_df)
+
+    # Plot the estimated energy produced by a single panel
+    fig = go.Figure()
+    fig.add_trace(decimated_scatter(panel_energy))
+    fig.update_layout(yaxis_title='Energy Produced (kWh)')
+    fig.show()
+
+    print(f"Based on the specified system characteristics, {panel_count} panels can be installed on a {roof_area} m² flat roof. \nThis corresponds to a total system capacity of {system_peak_capacity} kWp.")
+
+    # Calculate the monthly production of the entire PV installation 
+    system_production = (panel_count * panel_energy / 1000).rename_axis("datetime")
+    system_production.to_csv('Datasets/PV_system_production.csv', index=True)
+    #monthly_production = system_production.resample('ME').sum()
 
-# Plot monthly production
-#fig = go.Figure()
-#fig.add_trace(go.Bar(x=monthly_production.index, y=monthly_production))
-#fig.update_layout(yaxis_title='Energy Produced (kWh)')
-#fig.show()
+    # Plot monthly production
+    #fig = go.Figure()
+    #fig.add_trace(go.Bar(x=monthly_production.index, y=monthly_production))
+    #fig.update_layout(yaxis_title='Energy Produced (kWh)')
+    #fig.show()
@@ -4,23 +4,30 @@ from windpowerlib import get_turbine_types
 from windpowerlib import WindTurbine
 from datetime import datetime
 
-# Load raw data without headers
-df = pd.read_csv("Datasets/weather_data.csv",sep=",",index_col=0,header=[0, 1])
+import ingest
 
-# Parse time and convert wind speed to float
-df.index = pd.to_datetime(df.index, format="%d.%m.%Y %H:%M", errors="coerce")
-df.dropna(subset=[('wind_speed', '92')],inplace=True)
-df["wind_speed"] = df["wind_speed"].astype(float)
+# Choose a turbine type (e.g., 'ENERCON E 53 800')
+turbine = WindTurbine(turbine_type='E-115/3200',hub_height=92)
 
 
-df["pressure"] = 1013.25  # in hPa
+def wind_production(weather):
+    """Rows of wind_turbine_output_wind_park.csv for cleaned weather data (ingest source met_weather)."""
+    df = weather.dropna(subset=["wind_speed"])
+    # windpowerlib wants (variable, height) columns
+    df.columns = pd.MultiIndex.from_product([df.columns, [ingest.SOURCES["met_weather"]["height"]]])
 
-# Choose a turbine type (e.g., 'ENERCON E 53 800')
-turbine = WindTurbine(turbine_type='E-115/3200',hub_height=92)
+    df["pressure"] = 1013.25  # in hPa
+
+    # 4. Use ModelChain to compute power output
+    mc = ModelChain(turbine).run_model(df)
+
+    # 5. Output
+    df['power_output_kW'] = mc.power_output.values/1000  # Convert to kW
+    df.columns = df.columns.get_level_values(0)
+    return df
 
-# 4. Use ModelChain to compute power output
-mc = ModelChain(turbine).run_model(df)
 
-# 5. Output
-df['power_output_kW'] = mc.power_output.values/1000  # Convert to kW
-df.to_csv("Datasets/wind_turbine_output_wind_park.csv", index=True)
+if __name__ == "__main__":
+    # Cleaned weather data of all files (see ingest.py)
+    df = wind_production(ingest.load("met_weather"))
+    df.to_csv("Datasets/wind_turbine_output_wind_park.csv", index=True)
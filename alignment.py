@@ -0,0 +1,196 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import carbon
+
+# Timestamp-aware alignment of the input series. Every source is parsed with its own time zone convention,
+# converted to UTC, de-duplicated, reindexed once onto one hourly tz-aware index and gap filled with an explicit
+# policy. The result is cached on disk, keyed by the source files and the configuration.
+
+logger = logging.getLogger("aibel.alignment")
+
+TIMEZONE = "Europe/Oslo"
+STANDARD_TIME = "Etc/GMT-1"  # "norsk normaltid", UTC+1 all year without daylight saving
+CACHE_DIR = Path("Datasets/.cache")
+
+#------------------------------------------------Readers----------------------------------------------------------------
+
+# Each reader returns a Series in the units used by scenario.py (kWh per hour, EUR/kWh)
+
+
+def read_load():
+    df = pd.read_csv('Datasets/shuffled_power_timeseries_by_day.csv', index_col=0, parse_dates=True)
+    return df['Power_Consumption']
+
+
+def read_spot_price():
+    df = pd.read_csv('Datasets/Spot_price.csv', index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True)
+    return df['Spot Price (NO2) EUR/MWh'] / 1000
+
+
+def read_wind_small():
+    return pd.read_csv('Datasets/wind_turbine_output.csv', index_col=0, parse_dates=True)['power_output_kW']
+
+
+def read_wind_park():
+    return pd.read_csv('Datasets/wind_turbine_output_wind_park.csv', index_col=0, parse_dates=True)['power_output_kW']
+
+
+def read_solar():
+    return pd.read_csv('Datasets/PV_system_production.csv', index_col=0, parse_dates=True)["0"].clip(lower=0.0)
+
+
+def read_rain():
+    df = pd.read_csv('Datasets/rain_production.csv')
+    df.index = pd.to_datetime(df['Tid(norsk normaltid)'], format="%d.%m.%Y %H:%M")
+    return df['rain_production'] / 1000
+
+
+def read_carbon_intensity():
+    return carbon.read_carbon_intensity()
+
+
+# tz: time zone of naive timestamps (ignored for tz-aware sources)
+# to_target_year: move timestamps of other years onto the same wall-clock hour of the target year
+# fill: "interpolate" (up to limit hours, the rest like "previous_day"), "previous_day" or "zero"
+SOURCES = {
+    "load": {"reader": read_load, "files": ['Datasets/shuffled_power_timeseries_by_day.csv'],
+             "tz": STANDARD_TIME, "to_target_year": False, "fill": "previous_day"},
+    "spot_price": {"reader": read_spot_price, "files": ['Datasets/Spot_price.csv'],
+                   "tz": None, "to_target_year": False, "fill": "interpolate", "limit": 3},
+    "wind_small": {"reader": read_wind_small, "files": ['Datasets/wind_turbine_output.csv'],
+                   "tz": STANDARD_TIME, "to_target_year": False, "fill": "interpolate", "limit": 6},
+    "wind_park": {"reader": read_wind_park, "files": ['Datasets/wind_turbine_output_wind_park.csv'],
+                  "tz": STANDARD_TIME, "to_target_year": False, "fill": "interpolate", "limit": 6},
+    "solar": {"reader": read_solar, "files": ['Datasets/PV_system_production.csv'],
+              "tz": STANDARD_TIME, "to_target_year": True, "fill": "interpolate", "limit": 3},
+    "rain": {"reader": read_rain, "files": ['Datasets/rain_production.csv'],
+             "tz": STANDARD_TIME, "to_target_year": True, "fill": "zero"},
+}
+
+# Hourly grid carbon intensity when the dataset is present, otherwise aligned_inputs() uses carbon.DEFAULT_INTENSITY
+if carbon.CARBON_INTENSITY_PATH.exists():
+    SOURCES["carbon_intensity"] = {"reader": read_carbon_intensity, "files": [str(carbon.CARBON_INTENSITY_PATH)],
+                                   "tz": None, "to_target_year": False, "fill": "interpolate", "limit": 3}
+
+#------------------------------------------------Alignment--------------------------------------------------------------
+
+
+def target_index(year=2024, tz=TIMEZONE):
+    """All hours of `year` in local time, 8784 in 2024; the DST days have 23 and 25 hours."""
+    return pd.date_range(f"{year}-01-01", f"{year + 1}-01-01", freq="h", tz=tz, inclusive="left", name="snapshot")
+
+
+def _to_target_year(index, year):
+    # Vectorised year replacement; 29 February has no counterpart in other years and becomes NaT
+    return pd.DatetimeIndex(pd.to_datetime(
+        {"year": np.full(len(index), year), "month": index.month, "day": index.day, "hour": index.hour,
+         "minute": index.minute},
+        errors="coerce"))
+
+
+def _fill(series, method, limit):
+    missing = series.isna()
+    if method == "interpolate":
+        series = series.interpolate(method="time", limit=limit, limit_area="inside")
+        method = "previous_day"
+    if method == "previous_day":
+        # Same hour of the closest earlier (or later) day that has data
+        for _ in range(7):
+            series = series.fillna(series.shift(24)).fillna(series.shift(-24))
+    return series.fillna(0.0), int(missing.sum())
+
+
+def align_series(series, target, tz=None, to_target_year=False, fill="interpolate", limit=None):
+    """Place one source series on `target` and return it together with a report of what had to be fixed."""
+    series = series.dropna().astype(float)
+    report = {"rows": len(series)}
+    index = pd.DatetimeIndex(series.index)
+
+    if to_target_year and index.tz is None:
+        # Hours that exist in the target year win over hours moved there from another year
+        year = target[len(target) // 2].year
+        order = np.argsort(index.year != year, kind="stable")
+        series = series.iloc[order]
+        index = _to_target_year(index[order], year)
+        keep = ~index.duplicated(keep="first")
+        series, index = series[keep], index[keep]
+
+    if index.tz is None:
+        index = index.tz_localize(tz, ambiguous="NaT", nonexistent="NaT")
+    series = pd.Series(series.values, index=index.tz_convert("UTC"))
+    report["invalid_times"] = int(series.index.isna().sum())
+    series = series[series.index.notna()]
+
+    # Sub-hourly data (e.g. 15 min meters) is averaged to hourly energy
+    if len(series) > 1 and series.index.to_series().diff().median() < pd.Timedelta(hours=1):
+        series = series.resample("h").mean()
+
+    report["duplicates"] = int(series.index.duplicated().sum())
+    series = series.groupby(level=0).mean()
+
+    aligned = series.reindex(target.tz_convert("UTC"))
+    report["outside_range"] = len(series) - int(aligned.notna().sum())
+    aligned, report["filled"] = _fill(aligned, fill, limit)
+    aligned.index = target
+    return aligned, report
+
+
+def _cache_key(year, sources):
+    payload = {"year": year, "sources": {}, "default_carbon_intensity": carbon.DEFAULT_INTENSITY}
+    for name, source in sources.items():
+        files = [(f, Path(f).stat().st_size, Path(f).stat().st_mtime_ns) for f in source["files"]]
+        config = {k: v for k, v in source.items() if k not in ("reader", "files")}
+        payload["sources"][name] = {"files": files, "config": config, "reader": source["reader"].__name__}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+_memory_cache = {}
+
+
+def aligned_inputs(year=2024, sources=None, use_cache=True):
+    """
+    All input series on one tz-aware hourly index of `year`, columns as scenario.load_inputs().
+
+    The alignment report (rows, invalid/duplicate timestamps, rows outside the year, filled hours per source) is
+    stored in inputs.attrs["alignment"].
+    """
+    sources = sources or SOURCES
+    key = _cache_key(year, sources)
+    path = CACHE_DIR / f"aligned_{key}.pkl"
+    if use_cache and key in _memory_cache:
+        return _memory_cache[key].copy()
+    if use_cache and path.exists():
+        inputs = pd.read_pickle(path)
+        _memory_cache[key] = inputs
+        return inputs.copy()
+
+    target = target_index(year)
+    inputs = pd.DataFrame(index=target)
+    report = {}
+    for name, source in sources.items():
+        inputs[name], report[name] = align_series(source["reader"](), target, source["tz"], source["to_target_year"],
+                                                  source["fill"], source.get("limit"))
+        if report[name]["filled"] or report[name]["duplicates"] or report[name]["invalid_times"]:
+            logger.info(f"{name}: {report[name]}")
+    if "carbon_intensity" not in inputs:
+        inputs["carbon_intensity"] = carbon.DEFAULT_INTENSITY
+    inputs.attrs["alignment"] = report
+
+    if use_cache:
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        inputs.to_pickle(path)
+        _memory_cache[key] = inputs
+    return inputs.copy()
+
+
+if __name__ == "__main__":
+    inputs = aligned_inputs(use_cache=False)
+    print(pd.DataFrame(inputs.attrs["alignment"]).T)
+    print(inputs.describe().T)
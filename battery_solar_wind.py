@@ -1,11 +1,9 @@
-from cProfile import label
 
 import numpy as np
 import matplotlib.pyplot as plt
 import pandas as pd
 import pypsa
 
-from battery_wind import bar_width
 
 #Network parameters and load
 low_power_mode = pd.read_csv('Datasets/aibel_yearly.csv', header=None, index_col=0, parse_dates=True, sep=';')
@@ -3,7 +3,6 @@ import matplotlib.pyplot as plt
 import pandas as pd
 import pypsa
 
-from PV_prod import tilt_angle
 
 #Network parameters and load
 low_power_mode = pd.read_csv('Datasets/aibel_yearly.csv', header=None, index_col=0, parse_dates=True, sep=';')
@@ -0,0 +1,76 @@
+import logging
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import xarray as xr
+
+# Emissions of grid imports. The hourly carbon intensity of the grid (kg CO2-eq per kWh imported) is an input series
+# next to the spot price. It enters the optimisation in two optional ways:
+# - carbon_price (EUR per tonne): added to the Grid marginal cost, intensity * price, no extra rows or columns;
+# - co2_cap (tonnes per year): one row sum_t intensity_t * import_t <= cap via extra_functionality, its dual is the
+#   carbon shadow price.
+# The Grid generator gets the carrier "grid" whose co2_emissions is the mean intensity, so PyPSA's own statistics
+# report a consistent (annual average) figure; the hourly values are kept in network.meta["carbon_intensity"].
+
+logger = logging.getLogger("aibel.carbon")
+
+# Hourly intensity for bidding zone NO2: columns time (UTC) and carbon_intensity (g CO2-eq/kWh), e.g. an export of
+# Electricity Maps or ENTSO-E based data. Not shipped; without it every hour gets DEFAULT_INTENSITY.
+CARBON_INTENSITY_PATH = Path("Datasets/carbon_intensity.csv")
+
+# Placeholder until measured data is added: a typical yearly average of the NO2 consumption mix, kg/kWh
+DEFAULT_INTENSITY = 0.025
+
+
+def read_carbon_intensity():
+    """Hourly intensity in kg/kWh indexed by UTC time."""
+    df = pd.read_csv(CARBON_INTENSITY_PATH, index_col=0)
+    df.index = pd.to_datetime(df.index, utc=True)
+    return df["carbon_intensity"] / 1000
+
+
+def intensity_by_position(n_hours):
+    """Intensity lined up by position, as scenario.load_inputs() does with the other series."""
+    if not CARBON_INTENSITY_PATH.exists():
+        logger.warning(f"{CARBON_INTENSITY_PATH} not found, using a constant {DEFAULT_INTENSITY} kg/kWh")
+        return np.full(n_hours, DEFAULT_INTENSITY)
+    values = read_carbon_intensity().values[:n_hours]
+    return np.pad(values, (0, n_hours - len(values)), constant_values=values.mean())
+
+
+def hourly_intensity(inputs):
+    if "carbon_intensity" in inputs:
+        return inputs["carbon_intensity"].to_numpy(dtype=float)
+    return np.full(len(inputs), DEFAULT_INTENSITY)
+
+
+def carbon_cost_rate(intensity, carbon_price):
+    """EUR per kWh imported for a carbon price in EUR per tonne."""
+    return np.asarray(intensity, dtype=float) * carbon_price / 1000
+
+
+def add_co2_cap(network, snapshots, co2_cap, generator="Grid"):
+    """extra_functionality hook: yearly emissions of grid imports <= co2_cap tonnes."""
+    model = network.model
+    intensity = xr.DataArray(np.asarray(network.meta["carbon_intensity"]), coords={"snapshot": snapshots},
+                             dims="snapshot")
+    weights = xr.DataArray(network.snapshot_weightings.generators.loc[snapshots].values,
+                           coords={"snapshot": snapshots}, dims="snapshot")
+    grid = model.variables["Generator-p"].sel(name=generator)
+    model.add_constraints((grid * intensity * weights / 1000).sum() <= co2_cap, name=f"{generator}-co2-cap")
+
+
+def emissions(network, generator="Grid"):
+    """Hourly emissions of grid imports in kg."""
+    intensity = pd.Series(network.meta["carbon_intensity"], index=network.snapshots)
+    return network.generators_t.p[generator] * intensity
+
+
+def co2_shadow_price(network, generator="Grid"):
+    """EUR per tonne the cap costs at the margin (0 when it does not bind), None without a cap."""
+    model = getattr(network, "model", None)
+    name = f"{generator}-co2-cap"
+    if model is None or name not in model.constraints:
+        return None
+    return float(-model.constraints[name].dual.item())
@@ -0,0 +1,108 @@
+import sys
+import time
+
+import pandas as pd
+
+import results_store
+
+try:
+    import plotly.graph_objects as go
+    from dash import Dash, Input, Output, dcc, html
+except ImportError:
+    Dash = None
+
+# Local, offline dashboard over the pre-aggregated cubes of results_store.
+# Yearly -> monthly bars, click a month -> daily bars, click a day -> the hourly week around it.
+
+
+def _require_dash():
+    if Dash is None:
+        raise ImportError("The dashboard needs Dash: pip install dash")
+
+
+def load_cubes(rebuild=False):
+    """The cubes of results_store, built first when missing or when rebuild is set."""
+    if rebuild or not (results_store.CUBES_DIR / "monthly.pkl").exists():
+        start = time.perf_counter()
+        cubes = results_store.build_cubes()
+        print(f"Built cubes in {time.perf_counter() - start:.2f} s")
+        return cubes
+    return results_store.load_cubes()
+
+
+def _label(case):
+    return results_store.CASES.get(case, {}).get("label", case)
+
+
+def _bars(cube, selected, metric, title):
+    fig = go.Figure()
+    for case in selected:
+        data = cube.loc[case, metric]
+        fig.add_trace(go.Bar(x=data.index, y=data.values, name=_label(case)))
+    fig.update_layout(title=title, yaxis_title=metric, barmode="group", margin=dict(t=40, b=30))
+    return fig
+
+
+def build_app(cubes):
+    """Dash app with its callbacks over `cubes`."""
+    _require_dash()
+    cases = list(cubes["monthly"].index.unique("case"))
+    metrics = list(cubes["monthly"].columns)
+
+    app = Dash(__name__)
+    app.layout = html.Div([
+        html.H3("Aibel energy system results"),
+        html.Div([
+            dcc.Dropdown(id="cases", options=[{"label": _label(c), "value": c} for c in cases],
+                         value=cases, multi=True, style={"flex": 3}),
+            dcc.Dropdown(id="metric", options=metrics, value="Grid supply (kWh)", clearable=False, style={"flex": 1}),
+        ], style={"display": "flex", "gap": "10px"}),
+        html.Div(id="totals"),
+        dcc.Graph(id="monthly"),
+        dcc.Graph(id="daily"),
+        dcc.Graph(id="hourly"),
+    ])
+
+    @app.callback(Output("totals", "children"), Output("monthly", "figure"), Input("cases", "value"),
+                  Input("metric", "value"))
+    def update_monthly(selected, metric):
+        monthly = cubes["monthly"]
+        how = results_store.CUBE_AGGREGATION[metric]
+        totals = [f"{_label(c)}: {monthly.loc[c, metric].agg(how):,.1f}" for c in selected]
+        return html.P(f"Year ({how}) of {metric} - " + " | ".join(totals)), _bars(monthly, selected, metric, "Monthly")
+
+    @app.callback(Output("daily", "figure"), Input("cases", "value"), Input("metric", "value"),
+                  Input("monthly", "clickData"))
+    def update_daily(selected, metric, click):
+        daily = cubes["daily"]
+        month = pd.Timestamp(click["points"][0]["x"]) if click else daily.index.get_level_values("time")[0]
+        times = daily.index.get_level_values("time")
+        window = daily[(times.year == month.year) & (times.month == month.month)]
+        return _bars(window, selected, metric, f"Daily, {month:%B %Y}")
+
+    @app.callback(Output("hourly", "figure"), Input("cases", "value"), Input("metric", "value"),
+                  Input("daily", "clickData"))
+    def update_hourly(selected, metric, click):
+        hourly = cubes["hourly"]
+        day = pd.Timestamp(click["points"][0]["x"]) if click else hourly.index.get_level_values("time")[0]
+        fig = go.Figure()
+        for case in selected:
+            data = hourly.loc[case, metric].loc[day:day + pd.Timedelta(days=7)]
+            fig.add_trace(go.Scattergl(x=data.index, y=data.values, mode="lines", name=_label(case)))
+        fig.update_layout(title=f"Hourly, week from {day:%d %b}", yaxis_title=metric, margin=dict(t=40, b=30))
+        return fig
+
+    return app
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    try:
+        _require_dash()
+    except ImportError as exc:
+        sys.exit(str(exc))
+    build_app(load_cubes(rebuild="--rebuild" in argv)).run(debug=False)
+
+
+if __name__ == "__main__":
+    main()
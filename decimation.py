@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+
+# Full-year series have 8,760 points per scenario, far more than the ~1,000-2,000 pixels of a figure.
+# Decimating before plotting keeps the peaks visible while cutting render time and output size.
+
+DEFAULT_POINTS = 2000
+
+
+def minmax_decimate(series, n_points=DEFAULT_POINTS):
+    """Keep the min and max of each of n_points / 2 equal buckets, in time order."""
+    series = pd.Series(series)
+    n_buckets = n_points // 2
+    if n_buckets < 1 or len(series) <= n_points:
+        return series
+
+    values = series.to_numpy(dtype=float)
+    size = -(-len(values) // n_buckets)  # ceil division
+    n_buckets = -(-len(values) // size)
+    nan = np.isnan(values)
+    padding = n_buckets * size - len(values)
+
+    high = np.pad(np.where(nan, -np.inf, values), (0, padding), constant_values=-np.inf).reshape(n_buckets, size)
+    low = np.pad(np.where(nan, np.inf, values), (0, padding), constant_values=np.inf).reshape(n_buckets, size)
+    offsets = np.arange(n_buckets) * size
+    keep = np.concatenate([offsets + high.argmax(axis=1), offsets + low.argmin(axis=1)])
+    keep = np.unique(keep[keep < len(values)])
+    return series.iloc[keep]
+
+
+def lttb(series, n_points=DEFAULT_POINTS):
+    """Largest-Triangle-Three-Buckets downsampling, keeps the visually most significant point per bucket."""
+    series = pd.Series(series)
+    if n_points < 3 or len(series) <= n_points:
+        return series
+
+    y = series.to_numpy(dtype=float)
+    y = np.where(np.isnan(y), 0.0, y)
+    x = np.arange(len(y), dtype=float)
+    edges = np.linspace(1, len(y) - 1, n_points - 1).astype(int)
+
+    keep = np.empty(n_points, dtype=int)
+    keep[0] = 0
+    keep[-1] = len(y) - 1
+    a = 0
+    for i in range(n_points - 2):
+        start, end = edges[i], edges[i + 1]
+        # Average of the next bucket is the third corner of the triangle
+        next_end = edges[i + 2] if i + 2 < len(edges) else len(y)
+        avg_x = x[end:next_end].mean()
+        avg_y = y[end:next_end].mean()
+        area = np.abs((x[a] - avg_x) * (y[start:end] - y[a]) - (x[a] - x[start:end]) * (avg_y - y[a]))
+        a = start + int(area.argmax())
+        keep[i + 1] = a
+    return series.iloc[keep]
+
+
+METHODS = {"minmax": minmax_decimate, "lttb": lttb}
+
+
+def decimate(series, n_points=DEFAULT_POINTS, method="minmax"):
+    return METHODS[method](series, n_points)
+
+
+def plot_decimated(ax, series, n_points=DEFAULT_POINTS, method="minmax", **kwargs):
+    """matplotlib: plot a decimated version of a long series on ax."""
+    reduced = decimate(series, n_points, method)
+    return ax.plot(reduced.index, reduced.values, **kwargs)
+
+
+def decimated_scatter(series, n_points=DEFAULT_POINTS, method="minmax", **kwargs):
+    """plotly: WebGL line trace of a decimated version of a long series."""
+    import plotly.graph_objects as go
+
+    reduced = decimate(series, n_points, method)
+    return go.Scattergl(x=reduced.index, y=reduced.values, mode="lines", **kwargs)
@@ -0,0 +1,323 @@
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import highspy
+import numpy as np
+import pandas as pd
+from scipy.stats import qmc
+
+import scenario
+import shared_inputs
+
+# Global sensitivity study: which battery and renewable parameters drive the yearly cost over their whole range.
+# Morris screening (elementary effects, few runs) and Sobol indices (variance shares, Saltelli design) are evaluated
+# on a surrogate of the full-year LP: the same network on one representative week per month, weighted to the year.
+# Samples are solved in parallel worker processes that share the reduced inputs (shared_inputs.py).
+
+logger = logging.getLogger("aibel.global_sensitivity")
+
+# Uniform ranges of the studied parameters around the BatteryWindSolar_Case defaults.
+# e_nom, e_min_pu and grid_p_nom are bounded so the first-hour charge up to e_min_pu (e_initial = 0) stays feasible.
+PARAMETER_RANGES = {
+    "e_nom": (500, 1500),
+    "efficiency_store": (0.8, 1.0),
+    "efficiency_dispatch": (0.8, 1.0),
+    "standing_loss": (0.0, 0.005),
+    "e_min_pu": (0.0, 0.3),
+    "e_max_pu": (0.7, 1.0),
+    "grid_p_nom": (4000, 6000),
+    "roof_area_scale": (0.5, 2.0),
+    "turbine_count": (0, 3),
+}
+
+BASE_CASE = "BatteryWindSolar_Case"
+
+#------------------------------------------------Surrogate--------------------------------------------------------------
+
+
+def representative_weeks(inputs, per_month=1):
+    """
+    One week per month (the 7 days closest to the month's mean daily profile), with a "weight" column that scales
+    each hour to its share of the year. About 1/4 of the hours of the full LP.
+    """
+    days = inputs.groupby(inputs.index.normalize())
+    daily = days.mean()
+    weeks = []
+    for _, month in daily.groupby(daily.index.to_period("M")):
+        # Scale each series so load, price and renewables count alike in the distance
+        scaled = (month - daily.mean()) / daily.std().replace(0, 1)
+        distance = ((scaled - scaled.mean()) ** 2).sum(axis=1).rolling(7).sum().dropna().sort_values()
+        starts = [distance.index[i] - pd.Timedelta(days=6) for i in range(min(per_month, len(distance)))]
+        hours = int(days.size().loc[month.index].sum())
+        for start in starts:
+            week = inputs[(inputs.index >= start) & (inputs.index < start + pd.Timedelta(days=7))].copy()
+            week["weight"] = hours / (len(week) * len(starts))
+            weeks.append(week)
+    return pd.concat(weeks)
+
+
+class SurrogateModel:
+    """
+    The LP on the representative weeks compiled once into HiGHS; each parameter set only changes row bounds and the
+    standing loss coefficients, and HiGHS warm-starts from the previous basis (as mpc.WindowModel).
+    """
+
+    def __init__(self, reduced, base=None):
+        self.params = scenario.scenario_params(BASE_CASE, **(base or {}))
+        self.reduced = reduced
+        network = scenario.build_network(reduced.drop(columns="weight"), self.params)
+        network.snapshot_weightings["objective"] = reduced["weight"].values
+        model = network.optimize.create_model()
+        scenario.extra_functionality(network, network.snapshots)
+        matrices = model.matrices
+
+        def rows(constraint, **selection):
+            labels = model.constraints[constraint].labels.sel(**selection).values.ravel()
+            return np.searchsorted(matrices.clabels, labels).astype(np.int32)
+
+        def columns(variable, **selection):
+            labels = model.variables[variable].labels.sel(**selection).values.ravel()
+            return np.searchsorted(matrices.vlabels, labels).astype(np.int32)
+
+        stores = list(network.stores.index)
+        self.e_lower_rows = rows("Store-fix-e-lower", name=stores)
+        self.e_upper_rows = rows("Store-fix-e-upper", name=stores)
+        self.grid_rows = rows("Generator-fix-p-upper", name="Grid")
+        self.renewables = [(rows("Generator-fix-p-upper", name=generator), reduced[column].to_numpy(dtype=float), count)
+                           for generator, column, count in (("wind_turbine", f"wind_{self.params['wind']}", "turbine_count"),
+                                                            ("solar_pv", "solar", "roof_area_scale"))
+                           if generator in network.generators.index]
+
+        # Coefficient of e(t-1) in the energy balance of hour t, -(1 - standing_loss)
+        snapshots = network.snapshots
+        balance = rows("Store-energy_balance", snapshot=snapshots[1:], name=stores)
+        previous = columns("Store-e", snapshot=snapshots[:-1], name=stores)
+        base_coefficients = np.asarray(matrices.A[balance, previous]).ravel()
+        self.loss_entries = (balance, previous, base_coefficients / (1 - self.params["standing_loss"]))
+
+        self.highs = model.to_highspy()
+        self.highs.setOptionValue("output_flag", False)
+        self.standing_loss = self.params["standing_loss"]
+
+    def _set_rows(self, rows, lower, upper):
+        n = len(rows)
+        self.highs.changeRowsBounds(n, rows, np.broadcast_to(np.asarray(lower, dtype=float), n).copy(),
+                                    np.broadcast_to(np.asarray(upper, dtype=float), n).copy())
+
+    def cost(self, params):
+        """Yearly cost estimate of one parameter set (overrides of the base parameters); NaN when infeasible."""
+        p = {**self.params, **params}
+        inf = highspy.kHighsInf
+        self._set_rows(self.e_lower_rows, p["e_min_pu"] * p["e_nom"], inf)
+        self._set_rows(self.e_upper_rows, -inf, p["e_max_pu"] * p["e_nom"])
+        self._set_rows(self.grid_rows, -inf, p["grid_p_nom"])
+        for rows, profile, count in self.renewables:
+            self._set_rows(rows, -inf, profile * p[count])
+        if p["standing_loss"] != self.standing_loss:
+            balance, previous, unit = self.loss_entries
+            for row, column, value in zip(balance, previous, unit * (1 - p["standing_loss"])):
+                self.highs.changeCoeff(int(row), int(column), float(value))
+            self.standing_loss = p["standing_loss"]
+
+        self.highs.run()
+        if self.highs.getModelStatus() != highspy.HighsModelStatus.kOptimal:
+            return np.nan
+        return float(self.highs.getInfo().objective_function_value)
+
+
+def surrogate_cost(params, reduced):
+    """Yearly cost estimate of one full parameter set: the LP on the representative weeks, weighted to the year."""
+    network = scenario.build_network(reduced.drop(columns="weight"), params)
+    network.snapshot_weightings["objective"] = reduced["weight"].values
+    status, condition = scenario.solve(network, log_to_console=False)
+    return float(network.objective) if status == "ok" else np.nan
+
+
+# One compiled surrogate per worker process, built on the first chunk
+_worker = {}
+
+
+def _evaluate_chunk(chunk):
+    base, specs = chunk
+    if "model" not in _worker:
+        logging.getLogger("pypsa").setLevel(logging.ERROR)
+        logging.getLogger("linopy").setLevel(logging.ERROR)
+        _worker["model"] = SurrogateModel(shared_inputs.worker_inputs(), base)
+    return [_worker["model"].cost(params) for params in specs]
+
+
+def evaluate(samples, reduced, base=None, workers=None, chunk_size=64):
+    """Surrogate cost of every row of `samples` (DataFrame, one column per parameter) in parallel."""
+    specs = samples.to_dict("records")
+    chunks = [(base, specs[i:i + chunk_size]) for i in range(0, len(specs), chunk_size)]
+    block, handle = shared_inputs.publish(reduced)
+    try:
+        with ProcessPoolExecutor(workers or os.cpu_count(), initializer=shared_inputs.init_worker,
+                                 initargs=(handle,)) as pool:
+            costs = np.concatenate([np.asarray(c, dtype=float) for c in pool.map(_evaluate_chunk, chunks)])
+    finally:
+        block.close()
+        block.unlink()
+    if np.isnan(costs).any():
+        logger.warning(f"{int(np.isnan(costs).sum())} of {len(costs)} samples not solved")
+    return costs
+
+#------------------------------------------------Designs----------------------------------------------------------------
+
+
+def _scale(unit, ranges):
+    low = np.array([r[0] for r in ranges.values()])
+    high = np.array([r[1] for r in ranges.values()])
+    return pd.DataFrame(low + unit * (high - low), columns=list(ranges))
+
+
+def morris_design(ranges=None, trajectories=20, levels=4, seed=0):
+    """
+    Morris one-at-a-time trajectories on a `levels` grid; (k + 1) * trajectories rows.
+
+    Returns (samples, steps): steps[i] = (trajectory, factor, signed unit step) of the move into row i (None at
+    the start of a trajectory).
+    """
+    ranges = ranges or PARAMETER_RANGES
+    k = len(ranges)
+    rng = np.random.default_rng(seed)
+    delta = levels / (2 * (levels - 1))
+    grid = np.arange(levels // 2) / (levels - 1)  # base points from which +delta stays in [0, 1]
+    rows, steps = [], []
+    for r in range(trajectories):
+        point = rng.choice(grid, size=k)
+        # Start at the base point or its +delta mirror, then move every factor once in random order
+        sign = rng.choice([-1, 1], size=k)
+        point = np.where(sign < 0, point + delta, point)
+        rows.append(point.copy())
+        steps.append(None)
+        for factor in rng.permutation(k):
+            point[factor] += sign[factor] * delta
+            rows.append(point.copy())
+            steps.append((r, factor, sign[factor] * delta))
+    return _scale(np.array(rows), ranges), steps
+
+
+def morris_indices(costs, steps, ranges=None, bootstrap=1000, seed=0):
+    """mu* (mean |elementary effect|), mu, sigma per parameter, with a 95 % bootstrap interval for mu*."""
+    ranges = ranges or PARAMETER_RANGES
+    effects = {name: [] for name in ranges}
+    names = list(ranges)
+    for i, step in enumerate(steps):
+        if step is not None:
+            _, factor, unit_step = step
+            # Elementary effect per unit of the normalised range, so parameters of different units compare
+            effects[names[factor]].append((costs[i] - costs[i - 1]) / unit_step)
+    rng = np.random.default_rng(seed)
+    rows = []
+    for name, values in effects.items():
+        values = np.array(values)
+        values = values[~np.isnan(values)]
+        resampled = np.abs(rng.choice(values, size=(bootstrap, len(values)))).mean(axis=1)
+        rows.append({"parameter": name, "mu_star": np.abs(values).mean(), "mu": values.mean(),
+                     "sigma": values.std(ddof=1), "mu_star_low": np.percentile(resampled, 2.5),
+                     "mu_star_high": np.percentile(resampled, 97.5)})
+    return pd.DataFrame(rows).set_index("parameter").sort_values("mu_star", ascending=False)
+
+
+def sobol_design(ranges=None, n=256, seed=0):
+    """Saltelli design: matrices A, B and the k matrices AB_i (A with column i from B); n * (k + 2) rows."""
+    ranges = ranges or PARAMETER_RANGES
+    k = len(ranges)
+    unit = qmc.Sobol(2 * k, scramble=True, seed=seed).random(n)
+    a, b = unit[:, :k], unit[:, k:]
+    blocks = [a, b]
+    for i in range(k):
+        ab = a.copy()
+        ab[:, i] = b[:, i]
+        blocks.append(ab)
+    return _scale(np.vstack(blocks), ranges)
+
+
+def _sobol_estimates(f_a, f_b, f_ab):
+    # Centring does not change the estimators' expectation but removes the large cost level from their variance
+    mean = np.concatenate([f_a, f_b]).mean()
+    f_a, f_b, f_ab = f_a - mean, f_b - mean, f_ab - mean
+    variance = np.var(np.concatenate([f_a, f_b]), ddof=1)
+    first = (f_b[:, None] * (f_ab - f_a[:, None])).mean(axis=0) / variance  # Saltelli 2010
+    total = 0.5 * ((f_a[:, None] - f_ab) ** 2).mean(axis=0) / variance  # Jansen 1999
+    return first, total
+
+
+def sobol_indices(costs, ranges=None, bootstrap=1000, seed=0):
+    """First-order (S1) and total (ST) Sobol indices with 95 % bootstrap intervals."""
+    ranges = ranges or PARAMETER_RANGES
+    k = len(ranges)
+    n = len(costs) // (k + 2)
+    f = np.asarray(costs).reshape(k + 2, n)
+    f_a, f_b, f_ab = f[0], f[1], f[2:].T
+    keep = ~(np.isnan(f_a) | np.isnan(f_b) | np.isnan(f_ab).any(axis=1))
+    f_a, f_b, f_ab = f_a[keep], f_b[keep], f_ab[keep]
+
+    first, total = _sobol_estimates(f_a, f_b, f_ab)
+    rng = np.random.default_rng(seed)
+    samples = [_sobol_estimates(f_a[rows], f_b[rows], f_ab[rows])
+               for rows in rng.integers(0, len(f_a), size=(bootstrap, len(f_a)))]
+    boot_first = np.array([s[0] for s in samples])
+    boot_total = np.array([s[1] for s in samples])
+    return pd.DataFrame({
+        "S1": first,
+        "S1_low": np.percentile(boot_first, 2.5, axis=0),
+        "S1_high": np.percentile(boot_first, 97.5, axis=0),
+        "ST": total,
+        "ST_low": np.percentile(boot_total, 2.5, axis=0),
+        "ST_high": np.percentile(boot_total, 97.5, axis=0),
+    }, index=pd.Index(list(ranges), name="parameter")).sort_values("ST", ascending=False)
+
+#------------------------------------------------Study------------------------------------------------------------------
+
+
+def run_study(method="morris", inputs=None, ranges=None, samples=None, workers=None, seed=0):
+    """
+    Morris (samples = trajectories, default 20) or Sobol (samples = base sample size n, a power of 2, default 256)
+    study on the surrogate; returns (indices, design with the cost of every row).
+    """
+    ranges = ranges or PARAMETER_RANGES
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    reduced = representative_weeks(inputs)
+    if method == "morris":
+        design, steps = morris_design(ranges, trajectories=samples or 20, seed=seed)
+    elif method == "sobol":
+        design = sobol_design(ranges, n=samples or 256, seed=seed)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+
+    start = time.perf_counter()
+    design["cost"] = evaluate(design[list(ranges)], reduced, workers=workers)
+    logger.info(f"{len(design)} surrogate solves in {time.perf_counter() - start:.1f} s")
+    if method == "morris":
+        return morris_indices(design["cost"].values, steps, ranges), design
+    return sobol_indices(design["cost"].values, ranges), design
+
+
+def surrogate_error(inputs=None, cases=None):
+    """Surrogate vs full-year LP cost for the scenario cases."""
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    reduced = representative_weeks(inputs)
+    rows = []
+    for case in cases or scenario.CASES:
+        params = scenario.scenario_params(case)
+        network = scenario.build_network(inputs, params)
+        scenario.solve(network, log_to_console=False)
+        rows.append({"case": case, "full": float(network.objective), "surrogate": surrogate_cost(params, reduced)})
+    result = pd.DataFrame(rows).set_index("case")
+    result["rel_error"] = result["surrogate"] / result["full"] - 1
+    return result
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    method = sys.argv[1] if len(sys.argv) > 1 else "morris"
+    samples = int(sys.argv[2]) if len(sys.argv) > 2 else None
+    indices, _ = run_study(method, samples=samples)
+    print(indices.to_string())
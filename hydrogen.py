@@ -0,0 +1,77 @@
+import numpy as np
+import pandas as pd
+
+# Hydrogen as a long-duration store next to the batteries: electricity -> electrolyser (Link) -> H2 bus with a
+# hydrogen Store -> fuel cell (Link) -> electricity. Energy on the H2 bus is kWh of hydrogen (lower heating value), so
+# the round trip is electrolyser_efficiency * fuel_cell_efficiency. The H2 store is cyclic: it ends the horizon with
+# the energy it started with, so hydrogen bought cheaply in summer has to be produced within the year.
+#
+# A year of hourly snapshots couples all 8760 hours through the store. segment_inputs() merges consecutive hours into
+# snapshots of snapshot_hours hours with their duration as snapshot weighting, which keeps the chronology (and so the
+# seasonal coupling) exact and divides the LP size by snapshot_hours; only the variation within a segment is lost.
+
+ELECTROLYSER = "Electrolyser"
+FUEL_CELL = "Fuel_cell"
+H2_STORE = "H2_storage"
+
+#------------------------------------------------Time segments----------------------------------------------------------
+
+
+def segment_inputs(inputs, hours):
+    """
+    Inputs averaged over consecutive blocks of `hours` hours (the last one may be shorter), indexed by the start of
+    each block, with an "hours" column giving its duration.
+    """
+    blocks = np.arange(len(inputs)) // hours
+    grouped = inputs.groupby(blocks)
+    segments = grouped.mean()
+    segments.index = inputs.index[np.unique(blocks, return_index=True)[1]]
+    segments["hours"] = grouped.size().to_numpy(dtype=float)
+    return segments
+
+
+def set_snapshot_hours(network, hours):
+    """Weight each snapshot by its duration in the objective, the generator energy and the store balance."""
+    network.snapshot_weightings.loc[:, :] = np.repeat(np.asarray(hours, dtype=float)[:, None], 3, axis=1)
+
+#------------------------------------------------Network----------------------------------------------------------------
+
+
+def add_hydrogen(network, params, bus="bus0"):
+    """Electrolyser, hydrogen bus and store, fuel cell."""
+    network.add("Carrier", "H2")
+    network.add("Bus", "H2", carrier="H2")
+    network.add("Link", ELECTROLYSER, bus0=bus, bus1="H2", carrier="H2",
+                p_nom=params["electrolyser_p_nom"], efficiency=params["electrolyser_efficiency"])
+    network.add("Store", H2_STORE, bus="H2", carrier="H2", e_nom=params["h2_e_nom"], e_cyclic=True,
+                standing_loss=params["h2_standing_loss"])
+    network.add("Link", FUEL_CELL, bus0="H2", bus1=bus, carrier="H2",
+                p_nom=params["fuel_cell_p_nom"], efficiency=params["fuel_cell_efficiency"])
+
+
+def hydrogen_flows(network):
+    """Electricity into the electrolyser and out of the fuel cell per snapshot, kW."""
+    return pd.DataFrame({
+        "Electrolyser (kWh)": network.links_t.p0[ELECTROLYSER],
+        "Fuel cell (kWh)": -network.links_t.p1[FUEL_CELL],
+    })
+
+
+if __name__ == "__main__":
+    import logging
+    import time
+
+    import scenario
+
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    inputs = scenario.load_inputs()
+    for hours in (1, 3, 6, 24):
+        start = time.perf_counter()
+        network = scenario.build_network(inputs, scenario.scenario_params("BatteryWind_Case", hydrogen=True,
+                                                                          snapshot_hours=hours))
+        scenario.solve(network, log_to_console=False)
+        _, economic_results = scenario.extract_results(network)
+        print(f"{hours:>2} h snapshots: {len(network.snapshots)} snapshots, cost {float(network.objective):.0f} Euro, "
+              f"fuel cell {economic_results['Fuel Cell Generation (kWh)'].iloc[0]:.0f} kWh, "
+              f"{time.perf_counter() - start:.1f} s")
@@ -0,0 +1,106 @@
+import importlib
+import logging
+import time
+from pathlib import Path
+
+import pandas as pd
+
+import ingest
+import results_store
+
+# Incremental update after new rows are appended to the raw data (a new month of weather or meter data):
+# 1. ingest.ingest() parses only the appended rows of each raw file and reports the first new time stamp,
+# 2. the production profiles derived from that source are computed for the new hours only and appended to their
+#    CSVs in Datasets/ (the models are per hour, earlier hours do not change),
+# 3. results_store.update_cubes() re-aggregates only the periods of the result cubes whose hours changed.
+# A file that was rewritten rather than appended to is parsed and its profile recomputed in full.
+#
+# The input caches of alignment.py are keyed by file size and mtime and pick the new profiles up by themselves. The
+# yearly LP of a case couples all hours through the battery state of charge, so re-solving a case stays a full
+# solve; its cubes are then updated from the first hour whose results changed.
+
+logger = logging.getLogger("aibel.incremental")
+
+# Profiles computed from ingested sources: the function (module, name) maps cleaned source rows to output rows.
+# hourly: resample the source to hourly means first. time_column/time_format: where the output keeps its times.
+PRODUCTION = {
+    "rain": {"source": "met_rain", "function": ("rain_product", "rain_production"),
+             "path": Path("Datasets/rain_production.csv"), "index": False,
+             "time_column": "Tid(norsk normaltid)", "time_format": "%d.%m.%Y %H:%M"},
+    "wind_park": {"source": "met_weather", "function": ("Wind_prod", "wind_production"),
+                  "path": Path("Datasets/wind_turbine_output_wind_park.csv"), "index": True,
+                  "time_column": "time", "time_format": None},
+    "solar": {"source": "nsrdb", "function": ("PV_prod", "pv_production"),
+              "path": Path("Datasets/PV_system_production.csv"), "index": True, "hourly": True,
+              "columns": ["temp_air", "wind_speed", "humidity", "precipitable_water", "ghi", "dni", "dhi"],
+              "time_column": "datetime", "time_format": None},
+}
+
+
+def _function(production):
+    # Imported on use: the PV and wind models need pvlib and windpowerlib
+    module, name = production["function"]
+    return getattr(importlib.import_module(module), name)
+
+
+def _last_time(production):
+    times = pd.read_csv(production["path"], usecols=[production["time_column"]])[production["time_column"]]
+    return pd.to_datetime(times.dropna().iloc[-1], format=production["time_format"])
+
+
+def _compute(production, start=None):
+    weather = ingest.load(production["source"], columns=production.get("columns"), start=start, refresh=False)
+    if production.get("hourly"):
+        weather = weather.resample("h").mean()
+    return _function(production)(weather)
+
+
+def update_production(reports, names=None):
+    """
+    Bring the profiles derived from the sources in `reports` (of ingest.ingest) up to date: appended source rows
+    give appended profile rows, anything else a full recompute. Returns one row per updated profile.
+    """
+    rows = []
+    for name in names or PRODUCTION:
+        production = PRODUCTION[name]
+        parsed = reports[reports["source"] == production["source"]]
+        if not len(parsed):
+            continue
+        start = time.perf_counter()
+        path = production["path"]
+        if (parsed["mode"] == "append").all() and path.exists():
+            first = parsed["first_time"].dropna().min()
+            if pd.isna(first):
+                continue
+            if production.get("hourly"):
+                first = first.floor("h")
+            out = _compute(production, first)
+            out = out[out.index > _last_time(production)]
+            out.to_csv(path, mode="a", header=False, index=production["index"])
+            mode = "append"
+        else:
+            out = _compute(production)
+            out.to_csv(path, index=production["index"])
+            mode = "full"
+        rows.append({"profile": name, "mode": mode, "rows": len(out),
+                     "first_time": out.index.min() if len(out) else None, "seconds": time.perf_counter() - start})
+        logger.info(f"{name}: {mode}, {len(out)} rows to {path}")
+    return pd.DataFrame(rows, columns=["profile", "mode", "rows", "first_time", "seconds"])
+
+
+def update(cases=None, workers=None):
+    """Ingest new raw rows, extend the production profiles and update the result cubes of `cases`."""
+    reports = ingest.ingest(workers=workers)
+    profiles = update_production(reports)
+    cubes = results_store.update_cubes(cases)
+    return reports, profiles, cubes
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    reports, profiles, cubes = update()
+    print(reports.to_string() if len(reports) else "Raw data unchanged")
+    print(profiles.to_string() if len(profiles) else "Profiles up to date")
+    print(f"Cubes updated from: {cubes}" if cubes else "Cubes up to date")
+    print(f"Incremental update in {time.perf_counter() - start:.2f} s")
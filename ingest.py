@@ -0,0 +1,340 @@
+import fcntl
+import hashlib
+import json
+import logging
+import os
+import resource
+import shutil
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from glob import glob
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+# Chunked ingestion of the raw weather and meter data. Every raw CSV is read in chunks of CHUNK_ROWS rows, each chunk
+# is cleaned (header juggling, explicit time formats, numbers coerced to float) and appended as one row group to a
+# Parquet file in Datasets/.cache/ingest/<source>/<file>/, so memory stays bounded by the chunk size however many years are
+# fed. Independent files (one per year, station or meter) are parsed in parallel processes.
+#
+# The cache keeps the time stamps as they are in the files (naive, in the source's convention given by "tz"); moving
+# them to UTC stays with alignment.py. Files whose size and modification time are unchanged are not parsed again;
+# files that only grew at the end (a new month appended) get just the new rows parsed into an extra part.
+# Processes sharing the cache (e.g. pipeline stages running side by side) take turns through a file lock, so the
+# manifest is never read and rewritten by two of them at once.
+
+logger = logging.getLogger("aibel.ingest")
+
+CACHE_DIR = Path("Datasets/.cache/ingest")
+MANIFEST_PATH = CACHE_DIR / "manifest.json"
+LOCK_PATH = CACHE_DIR / ".lock"
+
+# Rows per chunk: ~10 years of hourly data or ~3 years of 15 minute meter data of one file
+CHUNK_ROWS = 100_000
+
+STANDARD_TIME = "Etc/GMT-1"  # "norsk normaltid", UTC+1 all year without daylight saving
+
+#------------------------------------------------Parsers----------------------------------------------------------------
+
+# Each parser turns one raw chunk into a frame with a "time" column (datetime64, naive) and float columns (plus
+# string columns identifying the station, where a source has several)
+
+
+def _numeric(chunk, columns):
+    out = pd.DataFrame({new: pd.to_numeric(chunk[old], errors="coerce") for old, new in columns.items()},
+                       index=chunk.index)
+    return out.astype("float64")
+
+
+def parse_nsrdb(chunk):
+    # NSRDB PSM export: two metadata rows are skipped by read_csv, times are split over Year..Minute
+    out = _numeric(chunk, {"Temperature": "temp_air", "Wind Speed": "wind_speed", "Relative Humidity": "humidity",
+                           "Precipitable Water": "precipitable_water", "GHI": "ghi", "DNI": "dni", "DHI": "dhi"})
+    parts = chunk[["Year", "Month", "Day", "Hour", "Minute"]].apply(pd.to_numeric, errors="coerce")
+    out.insert(0, "time", pd.to_datetime(parts, errors="coerce"))
+    return out
+
+
+def parse_met_weather(chunk):
+    # MET Norway export with a second header row of measurement heights, skipped by read_csv
+    out = _numeric(chunk, {"wind_speed": "wind_speed", "temperature": "temperature"})
+    out.insert(0, "time", pd.to_datetime(chunk["time"], format="%d.%m.%Y %H:%M", errors="coerce"))
+    return out
+
+
+def parse_met_rain(chunk):
+    out = _numeric(chunk, {"Nedbør (1 t)": "precipitation"})
+    out.insert(0, "time", pd.to_datetime(chunk["Tid(norsk normaltid)"], format="%d.%m.%Y %H:%M", errors="coerce"))
+    # Station name and id are kept: a source glob can cover several stations
+    out.insert(1, "station", chunk["Stasjon"].astype(str))
+    out.insert(2, "station_name", chunk["Navn"].astype(str))
+    return out
+
+
+def parse_meter(chunk):
+    # Meter export: ISO 8601 time stamps (with or without offset), energy per interval in kWh
+    out = _numeric(chunk, {"Energy (kWh)": "energy"})
+    out.insert(0, "time", pd.to_datetime(chunk["Time"], format="ISO8601", errors="coerce", utc=True)
+               .dt.tz_localize(None))
+    return out
+
+
+# files: glob of the raw files, one or more per year. read_csv: options of pd.read_csv. tz: convention of the times.
+# Wind speeds are measured at "height" metres, needed by windpowerlib.
+SOURCES = {
+    "nsrdb": {"files": "Datasets/479237_59.41_5.26_*.csv", "parser": parse_nsrdb,
+              "read_csv": {"skiprows": 2}, "tz": STANDARD_TIME},
+    "met_weather": {"files": "Datasets/weather_data*.csv", "parser": parse_met_weather,
+                    "read_csv": {"skiprows": [1], "encoding": "utf-8-sig"}, "tz": STANDARD_TIME, "height": 92},
+    "met_rain": {"files": "Datasets/rain_data_storasund*.csv", "parser": parse_met_rain,
+                 "read_csv": {"sep": ";", "decimal": ",", "encoding": "utf-8-sig"}, "tz": STANDARD_TIME},
+    "meter": {"files": "Datasets/meter/*.csv", "parser": parse_meter, "read_csv": {}, "tz": "UTC"},
+}
+
+#------------------------------------------------Ingestion--------------------------------------------------------------
+
+
+def _require_pyarrow():
+    if pq is None:
+        raise ImportError("The ingestion cache needs pyarrow: pip install pyarrow")
+
+
+def source_files(name):
+    return sorted(glob(SOURCES[name]["files"]))
+
+
+def cache_dir(name, path):
+    # One directory per raw file: part-00000.parquet from the full parse, one more part per appended tail
+    return CACHE_DIR / name / Path(path).stem
+
+
+def cache_parts(name, path):
+    return sorted(cache_dir(name, path).glob("part-*.parquet"))
+
+
+def _signature(path):
+    stat = Path(path).stat()
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _tail_hash(path, size, length=4096):
+    # Hash of the last bytes parsed so far; if they are unchanged the file only grew at the end
+    with open(path, "rb") as f:
+        f.seek(max(0, size - length))
+        return hashlib.sha256(f.read(size - f.tell())).hexdigest()
+
+
+def _ends_with_newline(path, size):
+    with open(path, "rb") as f:
+        f.seek(max(0, size - 1))
+        return f.read(1) == b"\n"
+
+
+def ingest_file(name, path, offset=0, part=0, columns=None):
+    """
+    Parse one raw file chunk by chunk into a Parquet part of its cache directory, one row group per chunk.
+
+    offset=0 parses the whole file and replaces all parts. offset>0 parses only the rows after that byte (appended
+    since the last run) into part number `part`, with the header `columns` of the full parse.
+    """
+    _require_pyarrow()
+    source = SOURCES[name]
+    directory = cache_dir(name, path)
+    directory.mkdir(parents=True, exist_ok=True)
+    target = directory / f"part-{part:05d}.parquet"
+    tmp = target.with_suffix(".parquet.tmp")
+    signature = _signature(path)
+    start = time.perf_counter()
+    report = {"source": name, "file": str(path), "mode": "append" if offset else "full", "part": part, "rows": 0,
+              "invalid_times": 0, "chunks": 0, "first_time": None}
+    writer = None
+    with open(path, "rb") as handle:
+        if offset:
+            handle.seek(offset)
+            options = {k: v for k, v in source["read_csv"].items() if k not in ("skiprows", "encoding")}
+            reader = pd.read_csv(handle, chunksize=CHUNK_ROWS, header=None, names=columns, encoding="utf-8",
+                                 **options)
+        else:
+            reader = pd.read_csv(handle, chunksize=CHUNK_ROWS, **source["read_csv"])
+        try:
+            for chunk in reader:
+                if columns is None:
+                    columns = chunk.columns.tolist()
+                df = source["parser"](chunk)
+                invalid = df["time"].isna()
+                report["invalid_times"] += int(invalid.sum())
+                df = df[~invalid]
+                if not len(df):
+                    continue
+                first = df["time"].min()
+                report["first_time"] = first if report["first_time"] is None else min(first, report["first_time"])
+                if writer is None:
+                    table = pa.Table.from_pandas(df, preserve_index=False)
+                    writer = pq.ParquetWriter(tmp, table.schema)
+                else:
+                    table = pa.Table.from_pandas(df, schema=writer.schema, preserve_index=False)
+                writer.write_table(table)
+                report["rows"] += len(df)
+                report["chunks"] += 1
+        finally:
+            if writer is not None:
+                writer.close()
+    if writer is None and not offset:
+        raise ValueError(f"{path} has no data rows")
+    if not offset:
+        for old in cache_parts(name, path):
+            old.unlink()
+    if writer is not None:
+        tmp.replace(target)
+    report["seconds"] = time.perf_counter() - start
+    report["peak_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return {**report, **signature, "columns": columns, "parts": part + (writer is not None),
+            "tail_hash": _tail_hash(path, signature["size"]),
+            "appendable": _ends_with_newline(path, signature["size"])}
+
+
+def _ingest_task(task):
+    return ingest_file(*task)
+
+
+def _load_manifest():
+    return json.loads(MANIFEST_PATH.read_text()) if MANIFEST_PATH.exists() else {}
+
+
+def _save_manifest(manifest):
+    MANIFEST_PATH.parent.mkdir(parents=True, exist_ok=True)
+    tmp = MANIFEST_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(manifest, sort_keys=True, indent=1))
+    tmp.replace(MANIFEST_PATH)
+
+
+@contextmanager
+def _cache_lock():
+    # Exclusive lock for the whole check-parse-record cycle, released when the file is closed
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH, "w") as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        yield
+
+
+def _task(name, path, entry, force):
+    """(name, path, offset, part, columns) to bring one file up to date, None if its cache is current."""
+    if force or entry is None or not cache_parts(name, path):
+        return name, path, 0, 0, None
+    signature = _signature(path)
+    if all(entry[k] == signature[k] for k in signature):
+        return None
+    # Grown at the end only: the bytes parsed last time are unchanged and ended with a complete row
+    if entry["appendable"] and signature["size"] > entry["size"] \
+            and _tail_hash(path, entry["size"]) == entry["tail_hash"]:
+        return name, path, entry["size"], entry["parts"], entry["columns"]
+    return name, path, 0, 0, None
+
+
+def ingest(names=None, workers=None, force=False):
+    """
+    Bring the Parquet cache of the sources `names` (default all) up to date. New or rewritten files are parsed in
+    full, files that only had rows appended get the new rows parsed into one more part, unchanged ones are
+    skipped; files are processed in parallel. Returns one report row per parsed file, with the mode (full/append)
+    and the first time stamp parsed, which is where downstream results have to be updated from.
+    """
+    _require_pyarrow()
+    with _cache_lock():
+        return _ingest(names, workers, force)
+
+
+def _ingest(names, workers, force):
+    manifest = _load_manifest()
+    tasks = []
+    for name in names or SOURCES:
+        for path in source_files(name):
+            task = _task(name, path, manifest.get(path), force)
+            if task is not None:
+                tasks.append(task)
+        # Cache files of raw files that were removed
+        for path, entry in list(manifest.items()):
+            if entry["source"] == name and not Path(path).exists():
+                shutil.rmtree(cache_dir(name, path), ignore_errors=True)
+                del manifest[path]
+
+    workers = min(workers or os.cpu_count(), len(tasks))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            reports = list(pool.map(_ingest_task, tasks))
+    else:
+        reports = [ingest_file(*task) for task in tasks]
+    for report in reports:
+        rows = report["rows"] + (manifest[report["file"]]["rows"] if report["mode"] == "append" else 0)
+        manifest[report["file"]] = {"rows": rows, **{k: report[k] for k in ("source", "size", "mtime_ns", "columns",
+                                                                            "parts", "tail_hash", "appendable")}}
+        logger.info(f"{report['file']}: {report['mode']}, {report['rows']} rows in {report['chunks']} chunks, "
+                    f"{report['seconds']:.2f} s")
+    if reports or not MANIFEST_PATH.exists():
+        _save_manifest(manifest)
+    columns = ["source", "file", "mode", "part", "rows", "invalid_times", "chunks", "first_time", "seconds",
+               "peak_rss_mb"]
+    return pd.DataFrame(reports, columns=columns)
+
+#------------------------------------------------Reading----------------------------------------------------------------
+
+
+def _filters(start, end):
+    filters = []
+    if start is not None:
+        filters.append(("time", ">=", pd.Timestamp(start)))
+    if end is not None:
+        filters.append(("time", "<", pd.Timestamp(end)))
+    return filters or None
+
+
+def load(name, columns=None, start=None, end=None, refresh=True):
+    """
+    Cleaned data of one source as a frame indexed by time, all files concatenated; [start, end) and `columns`
+    are pushed down to the Parquet reader, so only the needed row groups and columns are read.
+    """
+    if refresh:
+        ingest([name])
+    paths = [part for path in source_files(name) for part in cache_parts(name, path)]
+    if not paths:
+        raise FileNotFoundError(f"No files match {SOURCES[name]['files']}")
+    # Sources with several stations keep the station column, rows are unique per time and station
+    keys = ["time"] + (["station"] if "station" in pq.read_schema(paths[0]).names else [])
+    read = None if columns is None else keys + [column for column in columns if column not in keys]
+    frames = [pd.read_parquet(path, columns=read, filters=_filters(start, end)) for path in paths]
+    df = pd.concat(frames, ignore_index=True).sort_values("time", kind="stable")
+    # Overlapping files (e.g. a re-export of the last year): the later file wins
+    df = df.drop_duplicates(keys, keep="last")
+    return df.set_index("time")
+
+
+def iter_chunks(name, columns=None, refresh=True):
+    """Yield the cached data of one source row group by row group, for consumers with bounded memory."""
+    if refresh:
+        ingest([name])
+    read = None if columns is None else ["time"] + list(columns)
+    for path in (part for path in source_files(name) for part in cache_parts(name, path)):
+        parquet = pq.ParquetFile(path)
+        for group in range(parquet.num_row_groups):
+            yield parquet.read_row_group(group, columns=read).to_pandas().set_index("time")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    report = ingest(force="--force" in sys.argv)
+    print(report.to_string() if len(report) else "Cache up to date")
+    print(f"Ingested in {time.perf_counter() - start:.2f} s, "
+          f"peak RSS {resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024:.0f} MB")
+    for name in SOURCES:
+        if source_files(name):
+            df = load(name, refresh=False)
+            print(f"{name}: {len(df)} rows {df.index.min()} .. {df.index.max()}, {np.round(df.mean(numeric_only=True).values, 2)}")
@@ -0,0 +1,278 @@
+import hashlib
+import json
+import logging
+import pickle
+import time
+
+import highspy
+import numpy as np
+import pandas as pd
+
+import carbon
+import results_store
+import scenario
+
+# Model-predictive control: step through the year hour by hour, plan over a receding 24-48 h window with forecasts
+# and apply only the first hour. The current hour is measured, the rest of the window is forecast.
+# The window LP is built once by PyPSA/linopy and handed to HiGHS; every step only changes costs, right-hand sides
+# and bounds, so HiGHS keeps its model and warm-starts from the previous basis.
+
+logger = logging.getLogger("aibel.mpc")
+
+FORECAST_COLUMNS = ["load", "spot_price", "wind_small", "wind_park", "solar", "rain", "carbon_intensity"]
+
+# Input column feeding each renewable generator of scenario.build_network
+RENEWABLE_INPUTS = {"solar_pv": "solar", "Rain_power": "rain"}
+
+
+class WindowModel:
+    """
+    The battery network over `horizon` hours, compiled once into HiGHS and re-solved with new data.
+
+    The window is always hourly: the controller applies one hour per step, so snapshot_hours is set to 1. Stores
+    carried from window to window (the batteries) start from the given SOC; cyclic stores (the H2 store) are cyclic
+    within each window.
+    """
+
+    def __init__(self, params=None, horizon=24):
+        self.params = scenario.scenario_params(**(params or {}))
+        if self.params["snapshot_hours"] != 1:
+            logger.warning(f"MPC runs hourly, ignoring snapshot_hours={self.params['snapshot_hours']}")
+            self.params["snapshot_hours"] = 1
+        self.horizon = horizon
+
+        template = pd.DataFrame(1.0, index=pd.date_range("2024-01-01", periods=horizon, freq="h"), columns=FORECAST_COLUMNS)
+        network = scenario.build_network(template, self.params)
+        model = network.optimize.create_model()
+        matrices = model.matrices
+        first = network.snapshots[0]
+
+        def columns(variable, **selection):
+            labels = model.variables[variable].labels.sel(**selection).values
+            return np.atleast_1d(np.searchsorted(matrices.vlabels, labels)).astype(np.int32)
+
+        def rows(constraint, **selection):
+            labels = model.constraints[constraint].labels.sel(**selection).values
+            return np.atleast_1d(np.searchsorted(matrices.clabels, labels)).astype(np.int32)
+
+        self.stores = list(network.stores.index)
+        self.grid_columns = columns("Generator-p", name="Grid")
+        self.export_columns = None
+        if "Grid_export" in network.generators.index:
+            self.export_columns = columns("Generator-p", name="Grid_export")
+        self.balance_rows = rows("Bus-nodal_balance", name="bus0")
+        # Cyclic stores have no initial SOC to set, their first row links to the end of the window
+        self.carried = ~network.stores["e_cyclic"].to_numpy(dtype=bool)
+        self.batteries = network.stores.index.isin(scenario.BATTERY_NAMES)
+        self.soc_rows = rows("Store-energy_balance", snapshot=first, name=[store for store, carried in
+                                                                           zip(self.stores, self.carried) if carried])
+        self.store_p_columns = columns("Store-p", snapshot=first, name=self.stores)
+        self.store_e_columns = columns("Store-e", snapshot=first, name=self.stores)
+
+        self.renewables = {}
+        for generator in network.generators.index.drop(["Grid", "Grid_export"], errors="ignore"):
+            column = "wind_" + self.params["wind"] if generator == "wind_turbine" else RENEWABLE_INPUTS[generator]
+            self.renewables[generator] = (rows("Generator-fix-p-upper", name=generator), column,
+                                          network.generators.at[generator, "p_nom"],
+                                          columns("Generator-p", snapshot=first, name=generator))
+
+        self.highs = model.to_highspy()
+        self.highs.setOptionValue("output_flag", False)
+
+    def _set_rhs(self, rows, lower, upper):
+        self.highs.changeRowsBounds(len(rows), rows, np.asarray(lower, dtype=float), np.asarray(upper, dtype=float))
+
+    def solve(self, window, soc):
+        """
+        Solve for `window` (horizon rows of FORECAST_COLUMNS) starting from per-store `soc` (entries of cyclic stores
+        are ignored), return the first hour.
+        """
+        if len(window) != self.horizon:
+            raise ValueError(f"window has {len(window)} rows, the model {self.horizon} hours")
+        h = self.highs
+        spot_price = window["spot_price"].to_numpy(dtype=float)
+        carbon_rate = carbon.carbon_cost_rate(window["carbon_intensity"].to_numpy(dtype=float), self.params["carbon_price"])
+        h.changeColsCost(len(self.grid_columns), self.grid_columns, spot_price + self.params["import_tariff"] + carbon_rate)
+        if self.export_columns is not None:
+            h.changeColsCost(len(self.export_columns), self.export_columns, spot_price - self.params["export_tariff"])
+        load = window["load"].to_numpy(dtype=float)
+        self._set_rhs(self.balance_rows, load, load)
+        for rows, column, p_nom, _ in self.renewables.values():
+            upper = window[column].to_numpy(dtype=float) * p_nom
+            self._set_rhs(rows, np.full(len(rows), -highspy.kHighsInf), upper)
+        soc = np.asarray(soc, dtype=float)[self.carried]
+        self._set_rhs(self.soc_rows, -soc, -soc)
+
+        h.run()
+        status = h.getModelStatus()
+        if status != highspy.HighsModelStatus.kOptimal:
+            raise RuntimeError(f"Window solve failed: {h.modelStatusToString(status)}")
+
+        values = np.asarray(h.getSolution().col_value)
+        return {
+            "grid": float(values[self.grid_columns[0]]),
+            "export": float(-values[self.export_columns[0]]) if self.export_columns is not None else 0.0,
+            "store_p": values[self.store_p_columns],
+            "soc": values[self.store_e_columns],
+            "renewables": {generator: float(values[cols][0]) for generator, (_, _, _, cols) in self.renewables.items()},
+            "objective": float(h.getInfo().objective_function_value),
+        }
+
+#------------------------------------------------Forecasts--------------------------------------------------------------
+
+
+def perfect_forecast(values, t, horizon, rng=None, sigma=None):
+    return values[t:t + horizon].copy()
+
+
+def persistence_forecast(values, t, horizon, rng=None, sigma=None):
+    # Hour t + k is forecast by the latest measured value at the same hour of day
+    k = np.arange(horizon)
+    source = t + k - 24 * np.ceil(k / 24).astype(int)
+    return values[np.where(source < 0, t, source)].copy()
+
+
+def perturbed_forecast(values, t, horizon, rng, sigma):
+    # Actuals with relative noise growing with the square root of the lead time
+    window = values[t:t + horizon].copy()
+    lead = np.sqrt(np.arange(horizon))[:, None]
+    window *= 1 + sigma[None, :] * lead * rng.standard_normal(window.shape)
+    return window
+
+
+FORECASTS = {"perfect": perfect_forecast, "persistence": persistence_forecast, "perturbed": perturbed_forecast}
+
+DEFAULT_SIGMA = {"load": 0.03, "spot_price": 0.08, "wind_small": 0.10, "wind_park": 0.10, "solar": 0.10, "rain": 0.10,
+                 "carbon_intensity": 0.05}
+
+#------------------------------------------------Checkpoints------------------------------------------------------------
+
+# A long simulation saves its state (next hour, battery SOC, results so far, random generator state) every
+# checkpoint_every hours, so a restarted run continues from the last saved window SOC. The resumed run has the same
+# grid dispatch and cost; the split of the charge over identical batteries can differ because the HiGHS warm-start
+# basis is not saved, and that split is degenerate.
+CHECKPOINT_DIR = results_store.RESULTS_DIR / "checkpoints"
+
+
+def run_key(params, inputs, horizon, forecast, sigma, seed, hours):
+    """Idempotent id of a simulation run: the scenario id with the inputs plus everything else changing its result."""
+    payload = {"scenario": scenario.scenario_id(params, inputs), "horizon": horizon, "forecast": forecast, "sigma": sigma,
+               "seed": seed, "hours": hours}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+
+def _checkpoint_path(key):
+    return CHECKPOINT_DIR / f"mpc_{key}.pkl"
+
+
+def _save_checkpoint(key, state):
+    CHECKPOINT_DIR.mkdir(parents=True, exist_ok=True)
+    path = _checkpoint_path(key)
+    temporary = path.with_suffix(".tmp")
+    with open(temporary, "wb") as f:
+        pickle.dump(state, f)
+    temporary.replace(path)
+
+
+def _load_checkpoint(key):
+    path = _checkpoint_path(key)
+    if not path.exists():
+        return None
+    with open(path, "rb") as f:
+        return pickle.load(f)
+
+
+#------------------------------------------------Simulation-------------------------------------------------------------
+
+
+def simulate(inputs, params=None, horizon=24, forecast="perturbed", sigma=None, seed=0, hours=None,
+             checkpoint_every=None):
+    """
+    Run the MPC loop over `hours` of `inputs` (default all) and return (energy_system, summary).
+
+    energy_system has the columns of scenario.extract_results; summary holds the grid cost and solve time stats.
+    checkpoint_every: save the state every that many hours and resume from a saved state of the same run.
+    """
+    model = WindowModel(params, horizon)
+    hours = len(inputs) if hours is None else hours
+    key = run_key(model.params, inputs, horizon, forecast, sigma, seed, hours) if checkpoint_every else None
+    actual = inputs[FORECAST_COLUMNS].to_numpy(dtype=float)
+    # Repeat the last hour so windows near the end of the data keep their length
+    padded = np.vstack([actual, np.repeat(actual[-1:], horizon, axis=0)])
+    sigma = np.array([(sigma or DEFAULT_SIGMA).get(column, 0.0) for column in FORECAST_COLUMNS])
+    rng = np.random.default_rng(seed)
+    make_forecast = FORECASTS[forecast]
+
+    soc = np.full(len(model.stores), float(model.params["e_initial"]))
+    grid, export, store_soc, renewables, solve_times = [], [], [], [], []
+    first = 0
+    state = _load_checkpoint(key) if key else None
+    if state is not None:
+        first, soc = state["t"], state["soc"]
+        grid, export, store_soc, renewables, solve_times = (state[name] for name in
+                                                            ("grid", "export", "store_soc", "renewables", "solve_times"))
+        rng.bit_generator.state = state["rng"]
+        logger.info(f"Resuming {key} at hour {first}")
+
+    for t in range(first, hours):
+        window = make_forecast(padded, t, horizon, rng, sigma)
+        window[0] = actual[t]
+        window = np.clip(window, 0.0, None) if forecast == "perturbed" else window
+        start = time.perf_counter()
+        plan = model.solve(pd.DataFrame(window, columns=FORECAST_COLUMNS), soc)
+        solve_times.append(time.perf_counter() - start)
+
+        soc = plan["soc"]
+        grid.append(plan["grid"])
+        export.append(plan["export"])
+        store_soc.append(soc)
+        renewables.append(plan["renewables"])
+
+        if key and (t + 1) % checkpoint_every == 0 and t + 1 < hours:
+            _save_checkpoint(key, {"t": t + 1, "soc": soc, "grid": grid, "export": export, "store_soc": store_soc,
+                                   "renewables": renewables, "solve_times": solve_times,
+                                   "rng": rng.bit_generator.state})
+
+    if key:
+        _checkpoint_path(key).unlink(missing_ok=True)
+    index = inputs.index[:hours]
+    energy_system = pd.DataFrame({
+        "Load (kWh)": inputs["load"].iloc[:hours].values,
+        "Grid supply (kWh)": grid,
+        "Spot Price (Euro/kWh)": inputs["spot_price"].iloc[:hours].values,
+    }, index=index)
+    if model.export_columns is not None:
+        energy_system["Grid export (kWh)"] = export
+    renewables = pd.DataFrame(renewables, index=index)
+    for generator, column in scenario.RENEWABLE_COLUMNS.items():
+        if generator in renewables:
+            energy_system[column] = renewables[generator]
+    energy_system[[f"{store} (kWh)" for store in model.stores]] = np.array(store_soc)
+    energy_system["CO2 (kg)"] = energy_system["Grid supply (kWh)"] * inputs["carbon_intensity"].iloc[:hours].values
+
+    solve_times = np.array(solve_times)
+    summary = {
+        "forecast": forecast,
+        "horizon": horizon,
+        "hours": hours,
+        "grid_cost": float((energy_system["Grid supply (kWh)"] * energy_system["Spot Price (Euro/kWh)"]).sum()),
+        "grid_supply": float(energy_system["Grid supply (kWh)"].sum()),
+        "grid_export": float(sum(export)),
+        "co2_t": float(energy_system["CO2 (kg)"].sum() / 1000),
+        "solve_time_total": float(solve_times.sum()),
+        "solve_time_mean": float(solve_times.mean()),
+        "solve_time_max": float(solve_times.max()),
+    }
+    return energy_system, summary
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    inputs = scenario.load_inputs()
+    params = scenario.scenario_params("BatteryWind_Case")
+    for forecast in FORECASTS:
+        _, summary = simulate(inputs, params, horizon=24, forecast=forecast)
+        print(summary)
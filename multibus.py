@@ -0,0 +1,97 @@
+import logging
+import sys
+import time
+
+import pandas as pd
+
+import profiling
+import scenario
+import solvers
+
+# Multi-bus version of the scenario network: the grid connection and renewables sit at the main substation
+# ("bus0"), the yard load and the batteries are spread over feeder buses. Feeders are modelled as pairs of
+# directed Links (one per direction) with a capacity and a loss factor, which keeps the model an LP of the same
+# structure as the single bus case.
+
+logger = logging.getLogger("aibel.multibus")
+
+
+def radial_topology(n_buses, feeder_capacity=5000, feeder_loss=0.01, load_shares=None, ring=False):
+    """
+    Substation bus0 feeding n_buses - 1 buses in a chain (or a ring when ring=True).
+
+    load_shares maps bus -> share of the yard load (default: spread evenly over the feeder buses).
+    """
+    buses = ["bus0"] + [f"bus{i}" for i in range(1, n_buses)]
+    feeders = [(buses[i], buses[i + 1]) for i in range(n_buses - 1)]
+    if ring and n_buses > 2:
+        feeders.append((buses[-1], buses[0]))
+    load_buses = buses[1:] or buses
+    if load_shares is None:
+        load_shares = {bus: 1 / len(load_buses) for bus in load_buses}
+    return {
+        "buses": buses,
+        "feeders": [{"bus0": a, "bus1": b, "p_nom": feeder_capacity, "loss": feeder_loss} for a, b in feeders],
+        "load_shares": load_shares,
+        "store_buses": load_buses,
+    }
+
+
+def build_multibus_network(inputs, params=None, topology=None):
+    """scenario.build_network with its load and batteries moved onto the buses of `topology`."""
+    topology = topology or radial_topology(1)
+    network = scenario.build_network(inputs, params)
+    load = network.loads_t.p_set["Shipyard_Load"].copy()
+
+    for bus in topology["buses"]:
+        if bus not in network.buses.index:
+            network.add("Bus", bus)
+
+    for feeder in topology["feeders"]:
+        name = f"{feeder['bus0']}-{feeder['bus1']}"
+        efficiency = 1 - feeder["loss"]
+        network.add("Link", name, bus0=feeder["bus0"], bus1=feeder["bus1"], p_nom=feeder["p_nom"], efficiency=efficiency)
+        network.add("Link", name + "-reverse", bus0=feeder["bus1"], bus1=feeder["bus0"], p_nom=feeder["p_nom"],
+                    efficiency=efficiency)
+
+    network.remove("Load", "Shipyard_Load")
+    for bus, share in topology["load_shares"].items():
+        network.add("Load", f"Shipyard_Load_{bus}", bus=bus, p_set=load * share)
+
+    # Only the batteries move; the H2 store (hydrogen.py) stays on its own bus between electrolyser and fuel cell
+    store_buses = topology["store_buses"]
+    for i, store in enumerate(network.stores.index.intersection(scenario.BATTERY_NAMES, sort=False)):
+        network.stores.at[store, "bus"] = store_buses[i % len(store_buses)]
+
+    return network
+
+
+def benchmark(bus_counts=(1, 2, 5, 10, 20, 50), hours=None, params=None, inputs=None):
+    """Build and solve the radial network for each bus count; returns wall times and model size per count."""
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    inputs = inputs if hours is None else inputs.iloc[:hours]
+    params = params or scenario.scenario_params("BatteryWind_Case")
+    rows = []
+    for n_buses in bus_counts:
+        timer = profiling.PhaseTimer()
+        with timer.phase("build"):
+            network = build_multibus_network(inputs, params, radial_topology(n_buses))
+        with timer.phase("model"):
+            model = network.optimize.create_model()
+        with timer.phase("solve"):
+            status, condition, _ = solvers.solve_model(model, log_to_console=False)
+        row = {"buses": n_buses, "status": condition, **timer.phases, **profiling.model_statistics(model),
+               "objective": float(model.objective.value) if status == "ok" else None}
+        logger.info(row)
+        rows.append(row)
+    return pd.DataFrame(rows).set_index("buses")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    hours = int(sys.argv[1]) if len(sys.argv) > 1 else None
+    start = time.perf_counter()
+    print(benchmark(hours=hours))
+    print(f"Total {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,224 @@
+import logging
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import highspy
+import matplotlib
+import numpy as np
+import pandas as pd
+
+import scenario
+import shared_inputs
+
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+
+# Multi-objective mode: operating (grid) cost vs. grid import vs. capital. Battery size, turbine count and PV roof
+# area become decision variables; the LP minimises the operating cost subject to a capital budget and an epsilon
+# constraint on the yearly grid import. Sweeping both right-hand sides traces the Pareto front.
+#
+# The model is built once (per worker) and compiled into HiGHS; a front point only changes the two right-hand sides
+# and warm-starts from the previous basis. Budgets are spread over worker processes.
+
+logger = logging.getLogger("aibel.pareto")
+
+BASE_CASE = "BatteryWindSolar_Case"
+
+# Investment cost assumptions (EUR, overnight). The battery figure is the scripts' capital_cost of 100000 per
+# 1000 kWh store; turbine (small profile, 810 kW peak) and roof (6000 m² PV, 1.9 MWp peak) are typical prices.
+CAPITAL_COSTS = {"battery": 100.0, "turbine": 1_000_000.0, "roof": 1_500_000.0}
+
+# Largest capacity the optimiser may choose: kWh of battery, turbines, PV roofs
+LIMITS = {"battery": 20_000.0, "turbine": 5.0, "roof": 3.0}
+
+# Stand-in for "no limit" on a row; HiGHS treats bounds >= 1e20 as infinite, linopy needs a number at build time
+NO_LIMIT = 1e20
+
+
+class FrontModel:
+    """Investment LP with a capital budget row and a grid import row, compiled once into HiGHS."""
+
+    def __init__(self, inputs, params=None, capital_costs=None, limits=None):
+        self.params = scenario.scenario_params(BASE_CASE, **{**(params or {}), "battery_count": 1})
+        capital_costs = {**CAPITAL_COSTS, **(capital_costs or {})}
+        limits = {**LIMITS, **(limits or {})}
+        network = scenario.build_network(inputs, self.params)
+
+        # Capacities become variables; their cost enters through the budget row, not the objective
+        network.stores["e_nom_extendable"] = True
+        network.stores["e_nom_max"] = limits["battery"]
+        network.stores["capital_cost"] = 0.0
+        self.assets = {"battery": ("Store-e_nom", network.stores.index[0])}
+        for asset, generator in (("turbine", "wind_turbine"), ("roof", "solar_pv")):
+            if generator in network.generators.index:
+                network.generators.loc[generator, ["p_nom_extendable", "p_nom_max", "capital_cost"]] = \
+                    [True, limits[asset], 0.0]
+                self.assets[asset] = ("Generator-p_nom", generator)
+
+        model = network.optimize.create_model()
+        scenario.extra_functionality(network, network.snapshots)
+        capacity = {asset: model.variables[variable].sel(name=name, drop=True)
+                    for asset, (variable, name) in self.assets.items()}
+        capital = sum(capital_costs[asset] * variable for asset, variable in capacity.items())
+        model.add_constraints(capital <= NO_LIMIT, name="capital-budget")
+        grid = model.variables["Generator-p"].sel(name="Grid")
+        model.add_constraints(grid.sum() <= NO_LIMIT, name="grid-import-cap")
+
+        matrices = model.matrices
+
+        def row(constraint):
+            return np.searchsorted(matrices.clabels, model.constraints[constraint].labels.values.ravel()).astype(np.int32)
+
+        def column(variable, **selection):
+            labels = model.variables[variable].labels.sel(**selection).values.ravel()
+            return np.searchsorted(matrices.vlabels, labels).astype(np.int32)
+
+        self.budget_row = row("capital-budget")
+        self.import_row = row("grid-import-cap")
+        self.grid_columns = column("Generator-p", name="Grid")
+        self.capacity_columns = {asset: column(variable, name=name) for asset, (variable, name) in self.assets.items()}
+        self.capital_costs = capital_costs
+
+        self.highs = model.to_highspy()
+        self.highs.setOptionValue("output_flag", False)
+        self.costs = np.asarray(self.highs.getLp().col_cost_, dtype=float)
+
+    def _set_upper(self, row, value):
+        upper = highspy.kHighsInf if value is None or not np.isfinite(value) else float(value)
+        self.highs.changeRowsBounds(1, row, np.array([-highspy.kHighsInf]), np.array([upper]))
+
+    def solve(self, budget=None, import_cap=None):
+        """Minimum operating cost for a capital budget (EUR) and an import cap (kWh/year); None = unconstrained."""
+        self._set_upper(self.budget_row, budget)
+        self._set_upper(self.import_row, import_cap)
+        self.highs.run()
+        status = self.highs.getModelStatus()
+        if status != highspy.HighsModelStatus.kOptimal:
+            return {"budget": budget, "import_cap": import_cap, "status": self.highs.modelStatusToString(status)}
+        values = np.asarray(self.highs.getSolution().col_value)
+        grid = values[self.grid_columns]
+        # Clip the solver's -1e-12 style zeros
+        capacities = {asset: max(0.0, float(values[columns][0])) for asset, columns in self.capacity_columns.items()}
+        return {
+            "budget": budget,
+            "import_cap": import_cap,
+            "status": "optimal",
+            "operating_cost": float(grid @ self.costs[self.grid_columns]),
+            "grid_import": float(grid.sum()),
+            "capital": sum(self.capital_costs[asset] * value for asset, value in capacities.items()),
+            **{f"{asset}_capacity": value for asset, value in capacities.items()},
+        }
+
+    def min_import(self, budget=None):
+        """
+        Smallest yearly grid import reachable within the budget (the other end of the epsilon range), None when the
+        solve does not end optimal (infeasible, time or iteration limit).
+        """
+        n = len(self.costs)
+        objective = np.zeros(n)
+        objective[self.grid_columns] = 1.0
+        self.highs.changeColsCost(n, np.arange(n, dtype=np.int32), objective)
+        try:
+            self._set_upper(self.budget_row, budget)
+            self._set_upper(self.import_row, None)
+            self.highs.run()
+            status = self.highs.getModelStatus()
+            value = float(self.highs.getInfo().objective_function_value)
+        finally:
+            self.highs.changeColsCost(n, np.arange(n, dtype=np.int32), self.costs)
+        if status != highspy.HighsModelStatus.kOptimal:
+            logger.warning(f"Minimum import for budget {budget}: {self.highs.modelStatusToString(status)}")
+            return None
+        return value
+
+#------------------------------------------------Front------------------------------------------------------------------
+
+# One FrontModel per worker process, built on the first task
+_worker = {}
+
+
+def _budget_slice(task):
+    budget, levels, params = task
+    if "model" not in _worker:
+        logging.getLogger("pypsa").setLevel(logging.ERROR)
+        logging.getLogger("linopy").setLevel(logging.ERROR)
+        _worker["model"] = FrontModel(shared_inputs.worker_inputs(), params)
+    model = _worker["model"]
+    # Cost-optimal end first, then tighten the import cap towards the minimum import
+    unconstrained = model.solve(budget)
+    if unconstrained["status"] != "optimal":
+        return [unconstrained]
+    lowest = model.min_import(budget)
+    if lowest is None or lowest >= unconstrained["grid_import"] * (1 - 1e-9):
+        # Nothing to trade off (e.g. a zero budget), or no reliable lower end to place the import caps
+        return [unconstrained]
+    caps = np.linspace(unconstrained["grid_import"], lowest, levels)[1:]
+    # Just above the minimum, so the last point stays feasible up to the solver tolerance
+    caps[-1] = lowest * (1 + 1e-6)
+    return [unconstrained] + [model.solve(budget, cap) for cap in caps]
+
+
+def pareto_front(inputs=None, budgets=None, levels=6, params=None, workers=None):
+    """
+    Solve `levels` import caps for every capital budget (EUR), budgets in parallel; returns all points with a
+    'pareto' flag marking those not dominated in (operating cost, grid import, capital).
+    """
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    budgets = budgets if budgets is not None else [0, 1e6, 2e6, 4e6, 8e6]
+    block, handle = shared_inputs.publish(inputs)
+    try:
+        with ProcessPoolExecutor(workers or min(len(budgets), os.cpu_count()), initializer=shared_inputs.init_worker,
+                                 initargs=(handle,)) as pool:
+            slices = list(pool.map(_budget_slice, [(budget, levels, params) for budget in budgets]))
+    finally:
+        block.close()
+        block.unlink()
+    points = pd.DataFrame([point for points in slices for point in points])
+    points = points[points["status"] == "optimal"].reset_index(drop=True)
+    points["pareto"] = non_dominated(points[["operating_cost", "grid_import", "capital"]].values)
+    return points
+
+
+def non_dominated(values, tolerance=1e-6):
+    """Boolean mask of the rows that no other row beats in every column (all minimised)."""
+    scale = np.abs(values).max(axis=0)
+    scale[scale == 0] = 1.0
+    v = values / scale
+    # a dominates b: a <= b everywhere and a < b somewhere
+    better_or_equal = (v[:, None, :] <= v[None, :, :] + tolerance).all(axis=2)
+    strictly_better = (v[:, None, :] < v[None, :, :] - tolerance).any(axis=2)
+    return ~(better_or_equal & strictly_better).any(axis=0)
+
+
+def plot_front(points, output="Results/Analysis/pareto_front.png"):
+    """Operating cost against grid import, one line per capital budget."""
+    fig, ax = plt.subplots(figsize=(10, 6))
+    for budget, group in points.groupby("budget", dropna=False):
+        group = group.sort_values("grid_import")
+        label = "unlimited" if budget is None or not np.isfinite(budget) else f"{budget / 1e6:.1f} MEUR"
+        ax.plot(group["grid_import"] / 1e6, group["operating_cost"] / 1e3, marker="o", label=label)
+    front = points[points["pareto"]]
+    ax.scatter(front["grid_import"] / 1e6, front["operating_cost"] / 1e3, facecolors="none", edgecolors="black",
+               s=120, label="Pareto optimal")
+    ax.set_xlabel("Grid import (GWh/year)")
+    ax.set_ylabel("Operating cost (kEUR/year)")
+    ax.set_title("Operating cost vs. grid import by capital budget")
+    ax.legend(title="Capital budget")
+    ax.grid(True, linestyle="--", alpha=0.6)
+    fig.tight_layout()
+    fig.savefig(output)
+    plt.close(fig)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    levels = int(sys.argv[1]) if len(sys.argv) > 1 else 6
+    start = time.perf_counter()
+    points = pareto_front(levels=levels)
+    print(points.round(2).to_string())
+    print(f"{len(points)} points in {time.perf_counter() - start:.1f} s")
+    plot_front(points)
@@ -0,0 +1,268 @@
+import argparse
+import hashlib
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from glob import glob
+from pathlib import Path
+
+import pandas as pd
+
+# The study as a DAG of stages. Each stage runs one script in a subprocess and declares the files it reads (its own
+# source and local modules included) and writes; a stage depends on the stages that write its inputs. Independent
+# stages run in parallel. A stage is re-executed only when the hash of its command and input files differs from its
+# last successful run or its outputs are missing or were changed, so a full refresh does the minimum and an
+# upstream stage that rewrites identical bytes does not trigger its dependents.
+
+logger = logging.getLogger("aibel.pipeline")
+
+STATE_DIR = Path("Results/.pipeline")
+STATE_PATH = STATE_DIR / "state.json"
+
+# Load and spot prices are read by every battery case
+CASE_INPUTS = ["Datasets/aibel_yearly.csv", "Datasets/shuffled_power_timeseries_by_day.csv", "Datasets/Spot_price.csv"]
+
+# script and args: the command. inputs: files or globs read. outputs: files written that later stages or the
+# results store use (figures written along the way are not tracked).
+STAGES = {
+    "pv_production": {"script": "PV_prod.py", "args": [],
+                      "inputs": ["PV_prod.py", "ingest.py", "decimation.py", "Datasets/479237_59.41_5.26_*.csv"],
+                      "outputs": ["Datasets/PV_system_production.csv"]},
+    "wind_park_production": {"script": "Wind_prod.py", "args": [],
+                             "inputs": ["Wind_prod.py", "ingest.py", "Datasets/weather_data*.csv"],
+                             "outputs": ["Datasets/wind_turbine_output_wind_park.csv"]},
+    "rain_production": {"script": "rain_product.py", "args": [],
+                        "inputs": ["rain_product.py", "ingest.py", "Datasets/rain_data_storasund*.csv"],
+                        "outputs": ["Datasets/rain_production.csv"]},
+    "load_profile": {"script": "data_plots_processing.py", "args": ["dataset"],
+                     "inputs": ["data_plots_processing.py", "Datasets/Consumption.csv"],
+                     "outputs": ["Datasets/shuffled_power_timeseries_by_day.csv"]},
+    "battery_case": {"script": "battery_case.py", "args": [],
+                     "inputs": ["battery_case.py"] + CASE_INPUTS,
+                     "outputs": ["Results/Battery_Case/energy_system.csv", "Results/Battery_Case/economic_results.csv"]},
+    "battery_rain": {"script": "battery_rain.py", "args": [],
+                     "inputs": ["battery_rain.py", "Datasets/rain_production.csv"] + CASE_INPUTS,
+                     "outputs": ["Results/BatteryRain_Case/energy_system_br.csv",
+                                 "Results/BatteryRain_Case/economic_results_br.csv"]},
+    "battery_solar": {"script": "battery_solar.py", "args": [],
+                      "inputs": ["battery_solar.py", "Datasets/PV_system_production.csv"] + CASE_INPUTS,
+                      "outputs": ["Results/BatterySolar_Case/energy_system_bs.csv",
+                                  "Results/BatterySolar_Case/economic_results_bs.csv"]},
+    "battery_wind": {"script": "battery_wind.py", "args": [],
+                     "inputs": ["battery_wind.py", "Datasets/wind_turbine_output.csv"] + CASE_INPUTS,
+                     "outputs": ["Results/BatteryWind_Case/energy_system_bw.csv",
+                                 "Results/BatteryWind_Case/economic_results_bw.csv"]},
+    "battery_solar_wind": {"script": "battery_solar_wind.py", "args": [],
+                           "inputs": ["battery_solar_wind.py", "Datasets/wind_turbine_output.csv",
+                                      "Datasets/PV_system_production.csv"] + CASE_INPUTS,
+                           "outputs": ["Results/BatteryWindSolar_Case/energy_system_bws.csv",
+                                       "Results/BatteryWindSolar_Case/economic_results_bws.csv"]},
+    "battery_wind_park": {"script": "battery_wind_park.py", "args": [],
+                          "inputs": ["battery_wind_park.py", "Datasets/wind_turbine_output_wind_park.csv"] + CASE_INPUTS,
+                          "outputs": ["Results/BatteryWindPark_Case/energy_system_bwp.csv",
+                                      "Results/BatteryWindPark_Case/economic_results_bwp.csv"]},
+    "analysis": {"script": "data_plots_processing.py", "args": ["plots"],
+                 "inputs": ["data_plots_processing.py", "Datasets/shuffled_power_timeseries_by_day.csv",
+                            "Datasets/Spot_price.csv", "Results/Battery_Case/energy_system.csv",
+                            "Results/BatterySolar_Case/energy_system_bs.csv",
+                            "Results/BatteryRain_Case/energy_system_br.csv",
+                            "Results/BatteryWind_Case/energy_system_bw.csv",
+                            "Results/BatteryWindSolar_Case/energy_system_bws.csv",
+                            "Results/BatteryWindPark_Case/energy_system_bwp.csv"],
+                 "outputs": ["Results/Analysis/monthly_grid_consumption.png",
+                             "Results/Analysis/grid_consumption_comparison.png",
+                             "Results/Analysis/grid_consumption_cost_comparison.png",
+                             "Results/Analysis/monthly_wind_windpark.png"]},
+}
+
+#------------------------------------------------Graph------------------------------------------------------------------
+
+
+def dependencies(stages=None):
+    """{stage: set of stages writing one of its inputs}."""
+    stages = stages or STAGES
+    writers = {}
+    for name, stage in stages.items():
+        for output in stage["outputs"]:
+            if output in writers:
+                raise ValueError(f"{output} is written by both {writers[output]} and {name}")
+            writers[output] = name
+    return {name: {writers[path] for path in stage["inputs"] if path in writers and writers[path] != name}
+            for name, stage in stages.items()}
+
+
+def topological_order(stages=None):
+    """Stages in an order where every stage comes after the stages it depends on."""
+    remaining = dependencies(stages)
+    order = []
+    while remaining:
+        ready = sorted(name for name, deps in remaining.items() if not deps & set(remaining))
+        if not ready:
+            raise ValueError(f"Cycle between the stages {sorted(remaining)}")
+        order += ready
+        for name in ready:
+            del remaining[name]
+    return order
+
+
+def upstream(targets, stages=None):
+    """The targets and every stage they depend on, directly or not."""
+    deps = dependencies(stages)
+    selected, todo = set(), list(targets)
+    while todo:
+        name = todo.pop()
+        if name not in selected:
+            selected.add(name)
+            todo += deps[name]
+    return selected
+
+#------------------------------------------------Hashing----------------------------------------------------------------
+
+
+class FileHashes:
+    """sha256 of files, re-read only when size or mtime changed since the hash was recorded."""
+
+    def __init__(self, known=None):
+        self.known = known or {}
+
+    def __call__(self, path):
+        stat = os.stat(path)
+        entry = self.known.get(path)
+        if entry and entry[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return entry[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        self.known[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return self.known[path][2]
+
+
+def _expand(patterns):
+    paths = []
+    for pattern in patterns:
+        paths += sorted(glob(pattern)) if any(c in pattern for c in "*?[") else [pattern]
+    return paths
+
+
+def stage_key(stage, file_hash):
+    """Hash of the command and the contents of every input; None if an input is missing."""
+    inputs = {}
+    for path in _expand(stage["inputs"]):
+        if not os.path.exists(path):
+            return None
+        inputs[path] = file_hash(path)
+    payload = {"command": [stage["script"]] + stage["args"], "inputs": inputs}
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+def _outputs_current(stage, record, file_hash):
+    return all(os.path.exists(path) and record["outputs"].get(path) == file_hash(path) for path in stage["outputs"])
+
+
+def load_state():
+    return json.loads(STATE_PATH.read_text()) if STATE_PATH.exists() else {"stages": {}, "files": {}}
+
+
+def save_state(state):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    tmp = STATE_PATH.with_suffix(".json.tmp")
+    tmp.write_text(json.dumps(state, indent=1, sort_keys=True))
+    tmp.replace(STATE_PATH)
+
+#------------------------------------------------Execution--------------------------------------------------------------
+
+
+def run_stage(name, stage):
+    """Run one stage's script headless; stdout and stderr go to Results/.pipeline/<stage>.log."""
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    env = {**os.environ, "MPLBACKEND": "Agg", "PYTHONHASHSEED": "0"}
+    start = time.perf_counter()
+    with open(STATE_DIR / f"{name}.log", "w") as log:
+        process = subprocess.run([sys.executable, stage["script"], *stage["args"]], stdout=log,
+                                 stderr=subprocess.STDOUT, env=env)
+    missing = [path for path in stage["outputs"] if not os.path.exists(path)]
+    return process.returncode, missing, time.perf_counter() - start
+
+
+def run(targets=None, workers=None, force=False, dry_run=False, stages=None):
+    """
+    Bring the targets (default all stages) and their upstream stages up to date, independent stages in parallel.
+    Returns one row per stage with its status: ran, skipped (up to date), failed, blocked (an upstream stage
+    failed) or, with dry_run, stale.
+    """
+    stages = stages or STAGES
+    deps = dependencies(stages)
+    selected = upstream(targets or list(stages), stages)
+    state = load_state()
+    file_hash = FileHashes(state["files"])
+
+    status, rows = {}, {}
+    running = {}
+    with ThreadPoolExecutor(workers or os.cpu_count()) as pool:
+        while len(status) < len(selected):
+            for name in topological_order(stages):
+                if name not in selected or name in status or name in running.values():
+                    continue
+                if not all(dep in status for dep in deps[name] & selected):
+                    continue
+                if any(status[dep] in ("failed", "blocked") for dep in deps[name] & selected):
+                    status[name] = "blocked"
+                    continue
+                if dry_run and any(status[dep] == "stale" for dep in deps[name] & selected):
+                    # Whether the upstream outputs change is only known after running it
+                    status[name] = "stale"
+                    continue
+                key = stage_key(stages[name], file_hash)
+                record = state["stages"].get(name)
+                if not force and key is not None and record and record["key"] == key \
+                        and _outputs_current(stages[name], record, file_hash):
+                    status[name] = "skipped"
+                elif dry_run:
+                    status[name] = "stale"
+                elif key is None:
+                    logger.error(f"{name}: missing inputs {[p for p in _expand(stages[name]['inputs']) if not os.path.exists(p)]}")
+                    status[name] = "failed"
+                else:
+                    logger.info(f"{name}: running {stages[name]['script']} {' '.join(stages[name]['args'])}")
+                    running[pool.submit(run_stage, name, stages[name])] = name
+                    rows[name] = {"key": key}
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                returncode, missing, seconds = future.result()
+                rows[name]["seconds"] = seconds
+                if returncode or missing:
+                    logger.error(f"{name}: failed (exit code {returncode}, missing outputs {missing}), "
+                                 f"see {STATE_DIR / (name + '.log')}")
+                    status[name] = "failed"
+                    continue
+                logger.info(f"{name}: done in {seconds:.1f} s")
+                status[name] = "ran"
+                state["stages"][name] = {"key": rows[name]["key"], "seconds": seconds, "finished": time.time(),
+                                         "outputs": {path: file_hash(path) for path in stages[name]["outputs"]}}
+                save_state(state)
+
+    if not dry_run:
+        save_state(state)
+    return pd.DataFrame([{"stage": name, "status": status[name], "seconds": rows.get(name, {}).get("seconds")}
+                         for name in topological_order(stages) if name in selected]).set_index("stage")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    parser = argparse.ArgumentParser(description="Run the study pipeline, re-executing only stale stages.")
+    parser.add_argument("stages", nargs="*", help="target stages (default all)")
+    parser.add_argument("--workers", type=int)
+    parser.add_argument("--force", action="store_true", help="re-run every selected stage")
+    parser.add_argument("--dry-run", action="store_true", help="only report which stages are stale")
+    args = parser.parse_args()
+    report = run(args.stages or None, args.workers, args.force, args.dry_run)
+    print(report.to_string())
+    sys.exit(1 if (report["status"].isin(["failed", "blocked"])).any() else 0)
@@ -0,0 +1,264 @@
+import hashlib
+import inspect
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from functools import lru_cache
+
+import matplotlib
+matplotlib.use("Agg")  # Non-interactive backend, no GUI event loop needed to write PNGs
+import matplotlib.pyplot as plt
+
+import decimation
+import results_store
+from decimation import plot_decimated
+
+MANIFEST_PATH = results_store.RESULTS_DIR / ".plot_manifest.json"
+
+# Same window as the "1 week" plots in the battery scripts
+WEEK_START = 6000
+WEEK_END = 6100
+
+# Bump when the look of all figures changes outside the template functions (e.g. matplotlib style settings)
+STYLE_VERSION = 1
+
+#------------------------------------------------Figure templates-------------------------------------------------------
+
+# Each template draws onto an already created figure, so a worker can reuse one figure per size
+
+
+def week_dispatch(fig, df, case):
+    ax = fig.add_subplot()
+    week = df.iloc[WEEK_START:WEEK_END]
+    battery = week[results_store.BATTERY_COLUMNS].sum(axis=1)
+    ax.plot(week.index, week["Load (kWh)"], label="Load (kWh)", linestyle="dashed", color="black")
+    ax.plot(week.index, week["Grid supply (kWh)"], label="Grid Supply (kWh)", color="blue")
+    ax.plot(week.index, battery.diff(), label="Battery Charge/Discharge (kWh)", color="green")
+    ax.plot(week.index, week["Spot Price (Euro/kWh)"] * 10000, label="Spot price", color="red", linestyle="dotted")
+    for column in results_store.CASES[case]["production"]:
+        ax.plot(week.index, week[column], label=column, color="orange")
+    ax.axhline(0, color="gray", linestyle="dotted")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Power (kWh)")
+    ax.set_title("Load, Grid Supply, and Battery Usage Over Time")
+    ax.legend()
+    ax.grid(True)
+
+
+def week_soc(fig, df, case):
+    ax = fig.add_subplot()
+    week = df.iloc[WEEK_START:WEEK_END]
+    ax.plot(week.index, week[results_store.BATTERY_COLUMNS].sum(axis=1), label="Battery SOC (kWh)", color="purple")
+    ax.set_xlabel("Time")
+    ax.set_ylabel("Stored Energy (kWh)")
+    ax.set_title("Battery State of Charge Over Time")
+    ax.legend()
+    ax.grid(True)
+
+
+def year_production(fig, df, case):
+    ax = fig.add_subplot()
+    for column in results_store.CASES[case]["production"]:
+        plot_decimated(ax, df[column], label=column)
+    ax.set_xlabel("Time")
+    ax.set_ylabel("kWh")
+    ax.set_title("Production Profile")
+    ax.legend()
+    ax.grid(True)
+
+
+def monthly_production(fig, df, case):
+    ax = fig.add_subplot()
+    monthly = df[results_store.CASES[case]["production"]].resample("ME").sum()
+    x = range(len(monthly.index))
+    bottom = None
+    for column in monthly.columns:
+        ax.bar(x, monthly[column].values, width=0.6, bottom=bottom, label=column)
+        bottom = monthly[column].values if bottom is None else bottom + monthly[column].values
+    ax.set_xticks(list(x), monthly.index.strftime("%b"))
+    ax.set_xlabel("Month")
+    ax.set_ylabel("kWh")
+    ax.set_title("Monthly Generation")
+    ax.legend()
+
+
+def monthly_grid_cost(fig, df, case):
+    ax = fig.add_subplot()
+    cost_no_battery = (df["Load (kWh)"] * df["Spot Price (Euro/kWh)"]).resample("ME").sum()
+    cost_with_battery = (df["Grid supply (kWh)"] * df["Spot Price (Euro/kWh)"]).resample("ME").sum()
+    bar_width = 0.20
+    x = range(len(cost_with_battery))
+    ax.bar(x, cost_no_battery.values, width=bar_width, label="Base", color="red")
+    ax.bar([i + bar_width for i in x], cost_with_battery.values, width=bar_width, label=results_store.CASES[case]["label"], color="green")
+    ax.set_xticks([i + bar_width / 2 for i in x], cost_with_battery.index.strftime("%b"))
+    ax.set_xlabel("Month")
+    ax.set_ylabel("Grid Cost (€)")
+    ax.set_title("Monthly Grid Cost: Base vs " + results_store.CASES[case]["label"])
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.6)
+
+
+def monthly_grid_supply(fig, df, case):
+    ax = fig.add_subplot()
+    supply_og = df["Load (kWh)"].resample("ME").sum()
+    supply_with_battery = df["Grid supply (kWh)"].resample("ME").sum()
+    bar_width = 0.35
+    x = range(len(supply_og))
+    ax.bar(x, supply_og.values, width=bar_width, label="Base", color="dodgerblue")
+    ax.bar([i + bar_width for i in x], supply_with_battery.values, width=bar_width, label=results_store.CASES[case]["label"], color="yellowgreen")
+    for i, val in enumerate(supply_with_battery.values):
+        ax.text(i + bar_width + 0.05, val + 10, f"{val / supply_og.values[i] * 100:.1f}%", ha="center", va="bottom")
+    ax.set_xticks([i + bar_width / 2 for i in x], supply_og.index.strftime("%b"))
+    ax.set_xlabel("Month")
+    ax.set_ylabel("kWh")
+    ax.set_title("Monthly Grid supply: Base vs " + results_store.CASES[case]["label"])
+    ax.legend()
+    ax.grid(True, linestyle="--", alpha=0.6)
+
+
+def energy_pie(fig, df, case):
+    ax = fig.add_subplot()
+    columns = ["Grid supply (kWh)"] + results_store.CASES[case]["production"]
+    labels = ["Grid"] + [column.split(" ")[0] for column in columns[1:]]
+    ax.pie(df[columns].sum().clip(lower=0).values, labels=labels, autopct="%1.1f%%", shadow=True, startangle=90,
+           colors=["lightcoral", "lightgreen", "lightblue"][:len(columns)])
+    ax.axis("equal")
+
+
+TEMPLATES = {
+    "week_dispatch": (week_dispatch, (16, 5)),
+    "week_soc": (week_soc, (16, 5)),
+    "year_production": (year_production, (16, 5)),
+    "monthly_production": (monthly_production, (15, 6)),
+    "monthly_grid_cost": (monthly_grid_cost, (16, 5)),
+    "monthly_grid_supply": (monthly_grid_supply, (15, 6)),
+    "energy_pie": (energy_pie, (8, 8)),
+}
+
+#------------------------------------------------Figure specs-----------------------------------------------------------
+
+
+def case_figure_specs(case):
+    """Figure specs for the standard set of plots of one case, written next to its results."""
+    suffix = results_store.CASES[case]["suffix"]
+    names = ["week_dispatch", "week_soc", "monthly_grid_cost", "monthly_grid_supply"]
+    if results_store.CASES[case]["production"]:
+        names += ["year_production", "monthly_production", "energy_pie"]
+    return [{"template": name, "case": case, "output": str(results_store.case_dir(case) / f"{name}{suffix}.png")}
+            for name in names]
+
+
+def _file_hash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _shared_source():
+    # What every template depends on besides its own function: the week window, the figure rendering, the
+    # decimation helpers and STYLE_VERSION for anything else
+    return {"style": STYLE_VERSION, "week": [WEEK_START, WEEK_END], "render": inspect.getsource(render_spec),
+            "decimation": inspect.getsource(decimation)}
+
+
+def spec_hash(spec, data_hash):
+    # Template source and the shared code are part of the hash, so editing either re-renders the figures
+    draw, figsize = TEMPLATES[spec["template"]]
+    payload = json.dumps({"spec": spec, "template": inspect.getsource(draw), "figsize": figsize,
+                          "case": results_store.CASES.get(spec["case"]), "shared": _shared_source(),
+                          "data": data_hash}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def load_manifest():
+    if MANIFEST_PATH.exists():
+        return json.loads(MANIFEST_PATH.read_text())
+    return {}
+
+
+def save_manifest(manifest):
+    MANIFEST_PATH.write_text(json.dumps(manifest, indent=1, sort_keys=True))
+
+#------------------------------------------------Rendering--------------------------------------------------------------
+
+
+@lru_cache(maxsize=None)
+def _figure(figsize):
+    return plt.figure(figsize=figsize)
+
+
+@lru_cache(maxsize=8)
+def _case_data(case):
+    return results_store.load_energy_system(case)
+
+
+def render_spec(spec):
+    draw, figsize = TEMPLATES[spec["template"]]
+    fig = _figure(figsize)
+    fig.clf()
+    draw(fig, _case_data(spec["case"]), spec["case"])
+    fig.tight_layout()
+    fig.savefig(spec["output"])
+    return spec["output"]
+
+
+def year_overlay(column, cases, output, n_points=2000, method="minmax"):
+    """One full-year column of several cases overlaid in one figure, each series decimated to n_points."""
+    fig = _figure((16, 5))
+    fig.clf()
+    ax = fig.add_subplot()
+    for case in cases:
+        plot_decimated(ax, _case_data(case)[column], n_points, method, label=results_store.CASES[case]["label"], linewidth=0.8)
+    ax.set_xlabel("Time")
+    ax.set_ylabel(column)
+    ax.legend()
+    ax.grid(True)
+    fig.tight_layout()
+    fig.savefig(output)
+    return output
+
+
+def render_figures(specs, workers=None, force=False):
+    """Render figure specs in a process pool, skipping figures whose inputs are unchanged since the last run."""
+    manifest = load_manifest()
+    data_hashes = {case: _file_hash(results_store.energy_system_path(case)) for case in {spec["case"] for spec in specs}}
+
+    pending = []
+    for spec in specs:
+        key = spec_hash(spec, data_hashes[spec["case"]])
+        if not force and manifest.get(spec["output"]) == key and os.path.exists(spec["output"]):
+            continue
+        pending.append((spec, key))
+
+    print(f"Rendering {len(pending)} of {len(specs)} figures")
+    if not pending:
+        return []
+
+    rendered, failures = [], {}
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(render_spec, spec): (spec, key) for spec, key in pending}
+            for future in as_completed(futures):
+                spec, key = futures[future]
+                try:
+                    rendered.append(future.result())
+                except Exception as exc:
+                    # A failed figure keeps no manifest entry, so the next run draws it again
+                    failures[spec["output"]] = exc
+                    manifest.pop(spec["output"], None)
+                    continue
+                manifest[spec["output"]] = key
+    finally:
+        # Figures that did render are recorded even when others failed or the pool broke
+        save_manifest(manifest)
+    if failures:
+        output, exc = next(iter(failures.items()))
+        raise RuntimeError(f"{len(failures)} of {len(pending)} figures failed, e.g. {output}: {exc!r}") from exc
+    return rendered
+
+
+if __name__ == "__main__":
+    specs = [spec for case in results_store.available_cases() for spec in case_figure_specs(case)]
+    render_figures(specs)
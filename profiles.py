@@ -0,0 +1,95 @@
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import incremental
+import ingest
+
+# Renewable production profiles generated in memory for the scenario engine. The PV, wind park and rain models of
+# PV_prod.py, Wind_prod.py and rain_product.py read independent sources, so they run concurrently in a process pool;
+# the profiles are placed on the index of the scenario inputs the same way scenario.load_inputs() places the CSVs
+# (by position, or by timestamp with aligned=True) and replace those columns, without writing Datasets/*.csv.
+
+logger = logging.getLogger("aibel.profiles")
+
+# Input column of scenario.load_inputs -> (incremental.PRODUCTION entry, output column, factor to kWh). The small
+# turbine profile (wind_small) has no model in the repo and keeps its CSV.
+MODELS = {"solar": ("solar", None, 1.0),
+          "wind_park": ("wind_park", "power_output_kW", 1.0),
+          "rain": ("rain", "rain_production", 1 / 1000)}
+
+
+def profile(name):
+    """Hourly kWh of the model behind input column `name`, indexed by the times of its source."""
+    production, column, factor = MODELS[name]
+    out = incremental._compute(incremental.PRODUCTION[production])
+    return (out if column is None else out[column]) * factor
+
+
+def _run(name):
+    start = time.perf_counter()
+    return name, profile(name), time.perf_counter() - start
+
+
+def generate(names=None, workers=None):
+    """Run the models `names` (default all) concurrently; returns ({name: Series}, {name: seconds})."""
+    names = list(names or MODELS)
+    # Bring the ingestion cache up to date once here, the workers only read it
+    ingest.ingest([incremental.PRODUCTION[MODELS[name][0]]["source"] for name in names])
+    workers = min(workers or os.cpu_count(), len(names))
+    if workers > 1:
+        with ProcessPoolExecutor(workers) as pool:
+            results = list(pool.map(_run, names))
+    else:
+        results = [_run(name) for name in names]
+    for name, _, seconds in results:
+        logger.info(f"{name}: {seconds:.2f} s")
+    return {name: series for name, series, _ in results}, {name: seconds for name, _, seconds in results}
+
+
+def _by_position(name, series, n_hours):
+    # As scenario.load_inputs() lines up the CSVs: from the first row and zero padded to n_hours. Solar is clipped
+    # with missing hours as 0, the wind park drops its missing rows and rain keeps them as NaN in place
+    values = series.to_numpy(dtype=float)
+    if name == "solar":
+        values = np.nan_to_num(np.clip(values, 0.0, None))
+    elif name == "wind_park":
+        values = values[~np.isnan(values)]
+    padded = np.zeros(n_hours)
+    padded[:min(len(values), n_hours)] = values[:n_hours]
+    return padded
+
+
+def apply_profiles(inputs, profiles, aligned=False):
+    """inputs with the columns of `profiles` replaced, placed on the inputs' index."""
+    inputs = inputs.copy()
+    for name, series in profiles.items():
+        if aligned:
+            import alignment
+
+            source = alignment.SOURCES[name]
+            if name == "solar":
+                series = series.clip(lower=0.0)
+            inputs[name], _ = alignment.align_series(series, inputs.index, source["tz"], source["to_target_year"],
+                                                     source["fill"], source.get("limit"))
+        else:
+            inputs[name] = _by_position(name, series, len(inputs))
+    return inputs
+
+
+def generated_inputs(aligned=False, names=None, workers=None):
+    """scenario.load_inputs() with the renewable profiles generated in memory instead of read from Datasets/."""
+    import scenario
+
+    profiles, _ = generate(names, workers)
+    return apply_profiles(scenario.load_inputs(aligned), profiles, aligned)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    start = time.perf_counter()
+    profiles, seconds = generate()
+    print(f"Generated {list(profiles)} in {time.perf_counter() - start:.2f} s (models: {seconds})")
@@ -0,0 +1,131 @@
+import cProfile
+import json
+import logging
+import resource
+import time
+import tracemalloc
+from contextlib import contextmanager
+from pathlib import Path
+
+import scenario
+import solvers
+
+# Instrumentation around the scenario build/optimize path: where does the time of a slow scenario go?
+# Phases: inputs -> build (pypsa network) -> model (linopy model) -> solve -> write_back (solution to network)
+
+logger = logging.getLogger("aibel.profiling")
+
+PROFILE_DIR = Path("Results/profiles")
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = time.perf_counter() - start
+
+
+def model_statistics(model):
+    """Size of a linopy model: variables, constraints and nonzeros of the constraint matrix."""
+    nonzeros = sum(int((c.vars != -1).sum()) for _, c in model.constraints.items())
+    return {
+        "variables": int(model.nvars),
+        "constraints": int(model.ncons),
+        "nonzeros": nonzeros,
+    }
+
+
+@contextmanager
+def _profiler(kind, path):
+    if kind is None:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    if kind == "cprofile":
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            profiler.dump_stats(path.with_suffix(".prof"))
+    elif kind == "pyinstrument":
+        from pyinstrument import Profiler
+
+        profiler = Profiler()
+        profiler.start()
+        try:
+            yield
+        finally:
+            profiler.stop()
+            path.with_suffix(".html").write_text(profiler.output_html())
+    else:
+        raise ValueError(f"Unknown profiler: {kind}")
+
+
+def profile_scenario(params=None, inputs=None, name="scenario", profiler=None, trace_memory=True, solver_name=None,
+                     config=None, **solver_kwargs):
+    """
+    Build and solve one scenario phase by phase and return (network, record).
+
+    record holds the wall time per phase, the linopy model size, solver statistics and the peak Python memory,
+    and is also logged as one JSON line. trace_memory=False skips tracemalloc, which slows model building down;
+    the process high-water mark (max_rss_mb, includes solver memory) is always recorded.
+    profiler="cprofile" or "pyinstrument" additionally writes a dump per scenario to Results/profiles/<name>.
+    """
+    timer = PhaseTimer()
+    if trace_memory:
+        tracemalloc.start()
+
+    with _profiler(profiler, PROFILE_DIR / name):
+        with timer.phase("inputs"):
+            inputs = scenario.load_inputs() if inputs is None else inputs
+        with timer.phase("build"):
+            network = scenario.build_network(inputs, params)
+        with timer.phase("model"):
+            model = network.optimize.create_model()
+            scenario.extra_functionality(network, network.snapshots)
+        with timer.phase("solve"):
+            status, condition, attempts = solvers.solve_model(model, solver_name, config, **solver_kwargs)
+        with timer.phase("write_back"):
+            if status == "ok":
+                network.optimize.assign_solution()
+                network.optimize.assign_duals()
+                network.optimize.post_processing()
+
+    peak = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1] / 2**20
+        tracemalloc.stop()
+
+    record = {
+        "scenario": name,
+        "status": status,
+        "condition": condition,
+        "objective": float(model.objective.value) if status == "ok" else None,
+        "solver": attempts[-1]["solver"],
+        "tier": attempts[-1]["tier"],
+        "phases": timer.phases,
+        "total": sum(timer.phases.values()),
+        **model_statistics(model),
+        **solvers.solver_statistics(model),
+        "peak_memory_mb": peak,
+        "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }
+    logger.info(json.dumps(record))
+    return network, record
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    inputs = scenario.load_inputs()
+    for case in scenario.CASES:
+        profile_scenario(scenario.scenario_params(case), inputs, name=case)
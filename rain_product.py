@@ -6,12 +6,10 @@ Created on Tue Apr 22 14:47:02 2025
 @author: rafaelagramata
 """
 
-import pandas as pd 
 from pathlib import Path  
 
 
-# Reading the CSV file
-df = pd.read_csv("Datasets/rain_data_storasund_1year.csv", sep= ";", decimal= ",") 
+import ingest
 
 factor = 1E-3 / 3600
 
@@ -22,14 +20,20 @@ avg_voldrop = 50E-9 #m^3
 roof_area = 18100 #m^2
 
 
+def rain_production(rain):
+    """Rows of rain_production.csv for cleaned precipitation (ingest source met_rain) indexed by time."""
+    df = rain.rename(columns={"station_name": "Navn", "station": "Stasjon", "precipitation": "Nedbør (1 t)"})
+    df.insert(2, "Tid(norsk normaltid)", df.index.strftime("%d.%m.%Y %H:%M"))
+    df = df[["Navn", "Stasjon", "Tid(norsk normaltid)", "Nedbør (1 t)"]]
+    df["rain_production"] = ((df["Nedbør (1 t)"] * factor) / avg_voldrop ) * energy_perdrop * roof_area
+    return df
 
-df["rain_production"] = ((df["Nedbør (1 t)"] * factor) / avg_voldrop ) * energy_perdrop * roof_area
-
-filepath = Path('Datasets/rain_production.csv')  
-filepath.parent.mkdir(parents=True, exist_ok=True)  
- 
-
-df.to_csv(filepath, index= False)
 
+if __name__ == "__main__":
+    # Cleaned precipitation of all files (see ingest.py), in the columns of the MET Norway export
+    df = rain_production(ingest.load("met_rain"))
 
+    filepath = Path('Datasets/rain_production.csv')
+    filepath.parent.mkdir(parents=True, exist_ok=True)
 
+    df.to_csv(filepath, index= False)
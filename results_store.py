@@ -0,0 +1,387 @@
+import json
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+# Results of every case live under Results/<Case>/ as energy_system*.csv (hourly) and economic_results*.csv (totals)
+RESULTS_DIR = Path("Results")
+
+CASES = {
+    "Battery_Case": {"suffix": "", "label": "Battery", "production": []},
+    "BatteryRain_Case": {"suffix": "_br", "label": "Battery & Rain", "production": ["Rain Power (kWh)"]},
+    "BatterySolar_Case": {"suffix": "_bs", "label": "Battery & Solar", "production": ["Solar (kWh)"]},
+    "BatteryWind_Case": {"suffix": "_bw", "label": "Battery & Wind", "production": ["Wind (kWh)"]},
+    "BatteryWindSolar_Case": {"suffix": "_bws", "label": "Battery & Solar & Wind", "production": ["Wind (kWh)", "Solar (kWh)"]},
+    "BatteryWindPark_Case": {"suffix": "_bwp", "label": "Battery & Windpark", "production": ["Wind (kWh)"]},
+}
+
+BATTERY_COLUMNS = ["Battery (kWh)", "Battery2 (kWh)", "Battery3 (kWh)", "Battery4 (kWh)", "Battery5 (kWh)", "Battery6 (kWh)"]
+
+
+def case_dir(case):
+    return RESULTS_DIR / case
+
+
+def energy_system_path(case):
+    return case_dir(case) / f"energy_system{CASES[case]['suffix']}.csv"
+
+
+def economic_results_path(case):
+    return case_dir(case) / f"economic_results{CASES[case]['suffix']}.csv"
+
+
+def load_energy_system(case):
+    return pd.read_csv(energy_system_path(case), index_col=0, parse_dates=True)
+
+
+def load_economic_results(case):
+    return pd.read_csv(economic_results_path(case), index_col=0)
+
+
+def available_cases():
+    return [case for case in CASES if energy_system_path(case).exists()]
+
+#------------------------------------------------Aggregated cubes-------------------------------------------------------
+
+# Pre-aggregated (case, time) tables at several resolutions so viewers slice instead of re-reading CSVs. The "case"
+# level holds the case names and the scenario ids of the stored sweep results.
+CUBES_DIR = RESULTS_DIR / "cubes"
+CUBE_FREQUENCIES = {"hourly": None, "daily": "D", "monthly": "ME"}
+
+RENEWABLE_COLUMNS = ["Wind (kWh)", "Solar (kWh)", "Rain Power (kWh)"]
+
+
+def _tidy(case, df, params=None):
+    # Grid prices as in scenario.extract_results: spot price plus import tariff, minus export tariff for exports
+    params = params or {}
+    spot_price = df["Spot Price (Euro/kWh)"]
+    import_price = spot_price + params.get("import_tariff", 0.0)
+    out = pd.DataFrame(index=df.index)
+    out["Load (kWh)"] = df["Load (kWh)"]
+    out["Grid supply (kWh)"] = df["Grid supply (kWh)"]
+    out["Grid export (kWh)"] = df["Grid export (kWh)"] if "Grid export (kWh)" in df else 0.0
+    out["Grid cost (Euro)"] = df["Grid supply (kWh)"] * import_price
+    out["Export revenue (Euro)"] = out["Grid export (kWh)"] * (spot_price - params.get("export_tariff", 0.0))
+    out["Base grid cost (Euro)"] = df["Load (kWh)"] * import_price
+    production = CASES[case]["production"] if case in CASES else [c for c in RENEWABLE_COLUMNS if c in df]
+    out["Renewables (kWh)"] = df[production].sum(axis=1)
+    out["Battery SOC (kWh)"] = df[[c for c in BATTERY_COLUMNS if c in df]].sum(axis=1)
+    out["Spot Price (Euro/kWh)"] = df["Spot Price (Euro/kWh)"]
+    return out
+
+
+# Energies and costs add up over a period, levels and prices are averaged
+CUBE_AGGREGATION = {
+    "Load (kWh)": "sum",
+    "Grid supply (kWh)": "sum",
+    "Grid export (kWh)": "sum",
+    "Grid cost (Euro)": "sum",
+    "Export revenue (Euro)": "sum",
+    "Base grid cost (Euro)": "sum",
+    "Renewables (kWh)": "sum",
+    "Battery SOC (kWh)": "mean",
+    "Spot Price (Euro/kWh)": "mean",
+}
+
+
+def _aggregate(df, freq):
+    return df if freq is None else df.resample(freq).agg(CUBE_AGGREGATION)
+
+
+def _save_cubes(cubes):
+    CUBES_DIR.mkdir(parents=True, exist_ok=True)
+    for name, cube in cubes.items():
+        cube.to_pickle(CUBES_DIR / f"{name}.pkl")
+
+
+def available_results():
+    """Cases with results followed by the scenario ids of the stored sweep results."""
+    return available_cases() + available_sweeps()
+
+
+def _result_mtime(case):
+    # params.json is written last when a sweep result is saved
+    path = energy_system_path(case) if case in CASES else sweep_dir(case) / "params.json"
+    return path.stat().st_mtime_ns
+
+
+def _load_tidy(case):
+    if case in CASES:
+        return _tidy(case, load_energy_system(case))
+    params = json.loads((sweep_dir(case) / "params.json").read_text())
+    return _tidy(case, load_sweep_energy_system(case), params)
+
+
+def build_cubes(cases=None):
+    """
+    Aggregate the hourly results of all cases and stored sweep scenarios (or of `cases`, case names or scenario ids)
+    to hourly/daily/monthly cubes and write them to Results/cubes/.
+    """
+    cases = cases or available_results()
+    hourly = {case: _load_tidy(case) for case in cases}
+    cubes = {}
+    for name, freq in CUBE_FREQUENCIES.items():
+        frames = {case: _aggregate(df, freq) for case, df in hourly.items()}
+        cubes[name] = pd.concat(frames, names=["case", "time"]).sort_index().astype("float32")
+    _save_cubes(cubes)
+    return cubes
+
+
+def load_cubes():
+    return {name: pd.read_pickle(CUBES_DIR / f"{name}.pkl") for name in CUBE_FREQUENCIES}
+
+
+def _first_change(cube, case, hourly):
+    """First hour at which the hourly results of `case` differ from the hourly cube (new, removed or changed rows)."""
+    if case not in cube.index.get_level_values("case"):
+        return hourly.index[0]
+    old = cube.xs(case, level="case")
+    new = hourly.astype("float32")
+    times = old.index.symmetric_difference(new.index)
+    common = old.index.intersection(new.index)
+    differs = ~pd.DataFrame(np.isclose(old.loc[common].values, new.loc[common].values, equal_nan=True),
+                            index=common).all(axis=1)
+    times = times.union(common[differs.values])
+    return times.min() if len(times) else None
+
+
+def _period_start(time, freq):
+    # Start of the daily/monthly period containing `time`; cube labels are day starts and month ends
+    return time if freq is None else time.to_period("M" if freq == "ME" else freq).start_time
+
+
+def update_cubes(cases=None):
+    """
+    Bring the cubes up to date with the hourly results without rebuilding them: for every case whose results
+    changed (e.g. new hours appended), only the hours and the daily/monthly periods from the first changed hour on
+    are aggregated again and replaced. Returns {case: first changed hour}.
+    """
+    if not all((CUBES_DIR / f"{name}.pkl").exists() for name in CUBE_FREQUENCIES):
+        build_cubes(cases)
+        return {case: None for case in cases or available_results()}
+    cubes = load_cubes()
+    built = (CUBES_DIR / "hourly.pkl").stat().st_mtime_ns
+    known = set(cubes["hourly"].index.get_level_values("case"))
+    changed = {}
+    for case in cases or available_results():
+        # Results not written since the cubes were saved are not even read
+        if case in known and _result_mtime(case) <= built:
+            continue
+        hourly = _load_tidy(case)
+        first = _first_change(cubes["hourly"], case, hourly)
+        if first is None:
+            continue
+        changed[case] = first
+        for name, freq in CUBE_FREQUENCIES.items():
+            since = _period_start(first, freq)
+            cube = cubes[name]
+            stale = (cube.index.get_level_values("case") == case) & (cube.index.get_level_values("time") >= since)
+            fresh = pd.concat({case: _aggregate(hourly.loc[since:], freq)}, names=["case", "time"])
+            cubes[name] = pd.concat([cube[~stale], fresh.astype("float32")]).sort_index()
+    if changed:
+        _save_cubes(cubes)
+    return changed
+
+#------------------------------------------------Compact results--------------------------------------------------------
+
+# Compact binary form of hourly results for large sweeps (.npz instead of CSV). Per column:
+# - constant (e.g. an idle store): only the value,
+# - sparse when less than `sparse_below` of the hours are non-zero (e.g. rain power): indices and values,
+# - otherwise dense,
+# with the values as float32 (default) or quantised to integer steps of `quantum` (lossy, error <= quantum / 2).
+# A regular time index is kept as start/freq/length.
+COMPACT_DEFAULTS = {"variables": None, "dtype": "float32", "quantum": None, "sparse_below": 0.3, "compress": True}
+
+
+def _encode_values(values, dtype, quantum):
+    if quantum and not np.isnan(values).any():
+        offset = float(values.min())
+        codes = np.round((values - offset) / quantum)
+        return codes.astype(np.min_scalar_type(int(codes.max()))), {"offset": offset, "quantum": quantum}
+    return values.astype(dtype), {}
+
+
+def _decode_values(values, meta):
+    if "quantum" in meta:
+        return values * meta["quantum"] + meta["offset"]
+    return values.astype("float64")
+
+
+def encode_compact(df, variables=None, dtype="float32", quantum=None, sparse_below=0.3):
+    """
+    (arrays, meta) of the compact form of `df`, keeping only the columns `variables` (default all).
+    quantum: a step for all columns or {column: step}; columns without a step stay floating point.
+    """
+    columns = list(variables) if variables is not None else list(df.columns)
+    n = len(df)
+    arrays, meta = {}, {"columns": [], "rows": n}
+    freq = pd.infer_freq(df.index) if isinstance(df.index, pd.DatetimeIndex) and n >= 3 else None
+    if freq:
+        meta["index"] = {"start": str(df.index[0]), "freq": freq, "tz": str(df.index.tz) if df.index.tz else None,
+                         "name": df.index.name}
+    else:
+        arrays["index"] = np.asarray(df.index)
+    for i, column in enumerate(columns):
+        values = df[column].to_numpy(dtype="float64")
+        step = quantum.get(column) if isinstance(quantum, dict) else quantum
+        entry = {"name": column}
+        if n and (values == values[0]).all():
+            entry.update(encoding="constant", value=float(values[0]))
+        else:
+            nonzero = np.flatnonzero(values != 0)
+            if len(nonzero) < sparse_below * n:
+                entry["encoding"] = "sparse"
+                arrays[f"i{i}"] = nonzero.astype(np.min_scalar_type(n))
+                values = values[nonzero]
+            else:
+                entry["encoding"] = "dense"
+            arrays[f"v{i}"], scaling = _encode_values(values, dtype, step)
+            entry.update(scaling)
+        meta["columns"].append(entry)
+    return arrays, meta
+
+
+def decode_compact(arrays, meta, columns=None):
+    """DataFrame (float64) back from encode_compact(), optionally only `columns`."""
+    n = meta["rows"]
+    if "index" in meta:
+        info = meta["index"]
+        index = pd.date_range(info["start"], periods=n, freq=info["freq"], tz=info["tz"], name=info["name"])
+    else:
+        index = pd.Index(arrays["index"])
+    data = {}
+    for i, entry in enumerate(meta["columns"]):
+        if columns is not None and entry["name"] not in columns:
+            continue
+        if entry["encoding"] == "constant":
+            data[entry["name"]] = np.full(n, entry["value"])
+            continue
+        values = _decode_values(arrays[f"v{i}"], entry)
+        if entry["encoding"] == "sparse":
+            dense = np.zeros(n)
+            dense[arrays[f"i{i}"]] = values
+            values = dense
+        data[entry["name"]] = values
+    return pd.DataFrame(data, index=index)
+
+
+def save_compact(path, df, variables=None, dtype="float32", quantum=None, sparse_below=0.3, compress=True):
+    arrays, meta = encode_compact(df, variables, dtype, quantum, sparse_below)
+    with open(path, "wb") as f:
+        (np.savez_compressed if compress else np.savez)(f, meta=np.array(json.dumps(meta)), **arrays)
+
+
+def load_compact(path, columns=None):
+    with np.load(path) as npz:
+        meta = json.loads(npz["meta"].item())
+        wanted = {i for i, entry in enumerate(meta["columns"]) if columns is None or entry["name"] in columns}
+        arrays = {key: npz[key] for key in npz.files
+                  if key == "index" or (key[0] in "iv" and int(key[1:]) in wanted)}
+    return decode_compact(arrays, meta, columns)
+
+
+def compact_storage_report(df, quantum=0.01):
+    """
+    Size, write and load time and worst error of one hourly result in the CSV and the compact variants; the
+    quantised variant rounds the energy (kWh) columns to `quantum` and keeps prices in float32.
+    """
+    import tempfile
+    import time
+
+    steps = {column: quantum for column in df.columns if "(kWh)" in column}
+    variants = {
+        "csv": None,
+        "npz float64": {"dtype": "float64", "sparse_below": 0.0, "compress": False},
+        "compact float32": {"compress": False},
+        "compact float32 + zlib": {},
+        f"compact quantised {quantum} kWh + zlib": {"quantum": steps},
+    }
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in variants.items():
+            path = Path(tmp) / name
+            start = time.perf_counter()
+            if options is None:
+                df.to_csv(path)
+            else:
+                save_compact(path, df, **options)
+            written = time.perf_counter() - start
+            start = time.perf_counter()
+            back = pd.read_csv(path, index_col=0, parse_dates=True) if options is None else load_compact(path)
+            loaded = time.perf_counter() - start
+            rows.append({"format": name, "bytes": path.stat().st_size, "write_s": written, "load_s": loaded,
+                         "max_abs_error": float(np.nanmax(np.abs(back.values - df.values)))})
+    report = pd.DataFrame(rows).set_index("format")
+    report["ratio_to_csv"] = report["bytes"] / report.at["csv", "bytes"]
+    return report
+
+#------------------------------------------------Sweep results----------------------------------------------------------
+
+# Scenarios of sweeps are stored by scenario id: Results/sweeps/<id>/{params.json, energy_system.csv, economic_results.csv},
+# with energy_system.npz instead of the CSV when saved compact
+SWEEPS_DIR = RESULTS_DIR / "sweeps"
+
+
+def sweep_dir(scenario_id):
+    return SWEEPS_DIR / scenario_id
+
+
+def save_sweep_result(scenario_id, params, energy_system, economic_results, compact=None):
+    """
+    Write one scenario; the files are written under temporary names first so a crash never leaves half a result.
+    compact: None for CSV, otherwise options of save_compact() ({} for the defaults, see COMPACT_DEFAULTS).
+    """
+    directory = sweep_dir(scenario_id)
+    directory.mkdir(parents=True, exist_ok=True)
+    economic_results.to_csv(directory / "economic_results.csv.tmp")
+    if compact is None:
+        hourly = "energy_system.csv"
+        energy_system.to_csv(directory / (hourly + ".tmp"))
+    else:
+        hourly = "energy_system.npz"
+        save_compact(directory / (hourly + ".tmp"), energy_system, **{**COMPACT_DEFAULTS, **compact})
+    (directory / "params.json.tmp").write_text(json.dumps(params, sort_keys=True, indent=1))
+    # Mark the old result incomplete and drop its other storage form, which would otherwise shadow the new one
+    (directory / "params.json").unlink(missing_ok=True)
+    other = "energy_system.npz" if compact is None else "energy_system.csv"
+    (directory / other).unlink(missing_ok=True)
+    # params.json last: its presence marks the result as complete
+    for name in [hourly, "economic_results.csv", "params.json"]:
+        (directory / (name + ".tmp")).replace(directory / name)
+
+
+def load_sweep_energy_system(scenario_id, columns=None):
+    """Hourly results of one stored scenario, from either storage form."""
+    directory = sweep_dir(scenario_id)
+    if (directory / "energy_system.npz").exists():
+        return load_compact(directory / "energy_system.npz", columns)
+    df = pd.read_csv(directory / "energy_system.csv", index_col=0, parse_dates=True)
+    return df if columns is None else df[list(columns)]
+
+
+def has_sweep_result(scenario_id):
+    return (sweep_dir(scenario_id) / "params.json").exists()
+
+
+def available_sweeps():
+    return sorted(p.name for p in SWEEPS_DIR.glob("*") if p.is_dir() and has_sweep_result(p.name))
+
+
+def load_sweep_economics(scenario_ids=None):
+    """economic_results of stored sweep scenarios, one row per scenario id, with the parameters as extra columns."""
+    ids = scenario_ids if scenario_ids is not None else sorted(p.name for p in SWEEPS_DIR.glob("*") if p.is_dir())
+    rows = {}
+    for scenario_id in ids:
+        if not has_sweep_result(scenario_id):
+            continue
+        params = json.loads((sweep_dir(scenario_id) / "params.json").read_text())
+        economics = pd.read_csv(sweep_dir(scenario_id) / "economic_results.csv", index_col=0).iloc[0]
+        rows[scenario_id] = {**params, **economics.to_dict()}
+    return pd.DataFrame.from_dict(rows, orient="index").rename_axis("scenario_id")
+
+
+if __name__ == "__main__":
+    for case in available_cases():
+        print(case)
+        print(compact_storage_report(load_energy_system(case)).round(4).to_string())
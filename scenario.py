@@ -0,0 +1,341 @@
+import hashlib
+import json
+
+import numpy as np
+import pandas as pd
+import pypsa
+
+import carbon
+import hydrogen
+import results_store
+import solvers
+import tariffs
+
+# Scenario engine: the network of the battery_*.py scripts, parameterised so cases and sweeps share one definition.
+# A scenario is a plain dict of parameters (see DEFAULT_PARAMS), so it can be hashed, queued and stored as JSON.
+
+BATTERY_NAMES = ["Battery", "Battery2", "Battery3", "Battery4", "Battery5", "Battery6"]
+
+DEFAULT_PARAMS = {
+    # Renewables, p_max_pu is the production in kWh of the profile times the count
+    "wind": None,  # None, "small" (wind_turbine_output.csv) or "park" (wind_turbine_output_wind_park.csv)
+    "turbine_count": 1,
+    "solar": False,
+    "roof_area_scale": 1.0,  # Scales the 6000 m² PV roof of PV_prod.py
+    "rain": False,
+
+    # Grid connection
+    "grid_p_nom": 5000,
+    "peak_charge": 0.0,  # Capacity tariff, EUR per kW of monthly peak import (tariffs.py), 0 = energy price only
+    "import_tariff": 0.0,  # EUR/kWh on top of the spot price for imported energy
+    "export_p_nom": 0.0,  # Export cap in kW, 0 = import only as in the scripts
+    "export_tariff": 0.0,  # EUR/kWh deducted from the spot price for exported energy
+
+    # Emissions of grid imports (carbon.py), hourly intensity from the inputs
+    "carbon_price": 0.0,  # EUR per tonne CO2-eq, added to the import price
+    "co2_cap": None,  # Tonnes CO2-eq per year, None = no cap
+
+    # Batteries, same defaults as the scripts
+    "battery_count": 6,
+    "e_nom": 1000,
+    "e_initial": 0,
+    "standing_loss": 0.001,
+    "efficiency_store": 0.9,
+    "efficiency_dispatch": 0.9,
+    "e_min_pu": 0.2,
+    "e_max_pu": 0.8,
+    "capital_cost": 100000,
+
+    # Hydrogen chain as long-duration store (hydrogen.py), H2 energy in kWh (LHV)
+    "hydrogen": False,
+    "electrolyser_p_nom": 1000,  # kW electric
+    "electrolyser_efficiency": 0.7,
+    "h2_e_nom": 100000,  # kWh H2, about 3 t
+    "h2_standing_loss": 0.0,
+    "fuel_cell_p_nom": 1000,  # kW electric
+    "fuel_cell_efficiency": 0.5,
+
+    # Time resolution: snapshots of this many consecutive hours (hydrogen.segment_inputs), 1 = hourly as the scripts
+    "snapshot_hours": 1,
+}
+
+CASES = {
+    "Battery_Case": {},
+    "BatteryRain_Case": {"rain": True},
+    "BatterySolar_Case": {"solar": True},
+    "BatteryWind_Case": {"wind": "small"},
+    "BatteryWindSolar_Case": {"wind": "small", "solar": True},
+    "BatteryWindPark_Case": {"wind": "park"},
+}
+
+#------------------------------------------------Inputs-----------------------------------------------------------------
+
+
+def load_inputs(aligned=False, generate=False):
+    """
+    Hourly load, spot price and renewable profiles.
+
+    By default the series are lined up by position exactly as in the battery scripts, which reproduces the CSVs in
+    Results/. aligned=True joins them on timestamps instead (see alignment.py). generate=True runs the PV, wind park
+    and rain models in memory instead of reading their CSVs (see profiles.py).
+    """
+    if generate:
+        import profiles
+
+        return profiles.generated_inputs(aligned)
+    if aligned:
+        import alignment
+
+        return alignment.aligned_inputs()
+
+    low_power_mode = pd.read_csv('Datasets/aibel_yearly.csv', header=None, index_col=0, parse_dates=True, sep=';')
+    shuffled = pd.read_csv('Datasets/shuffled_power_timeseries_by_day.csv', index_col=0, parse_dates=True, sep=',')
+    spot_prices = pd.read_csv('Datasets/Spot_price.csv', index_col=0)
+    n_hours = len(low_power_mode)
+
+    inputs = pd.DataFrame(index=shuffled.index[:n_hours])
+    inputs["load"] = shuffled['Power_Consumption'].iloc[:n_hours].values
+    inputs["spot_price"] = spot_prices['Spot Price (NO2) EUR/MWh'].iloc[:n_hours].values / 1000
+
+    for name, path in [("wind_small", 'Datasets/wind_turbine_output.csv'), ("wind_park", 'Datasets/wind_turbine_output_wind_park.csv')]:
+        wind_profile = pd.read_csv(path)['power_output_kW'].dropna().values
+        inputs[name] = np.pad(wind_profile, (0, n_hours - len(wind_profile)), 'constant', constant_values=0.0)
+
+    solar_profile = pd.read_csv('Datasets/PV_system_production.csv', index_col=0)["0"]
+    inputs["solar"] = solar_profile.clip(lower=0.0).fillna(0.0).values[:n_hours]
+
+    rain_data = pd.read_csv('Datasets/rain_production.csv', index_col=2)["rain_production"].values
+    padded = np.zeros(n_hours)
+    padded[:len(rain_data)] = rain_data[:n_hours]
+    inputs["rain"] = padded / 1000
+
+    inputs["carbon_intensity"] = carbon.intensity_by_position(n_hours)
+
+    return inputs
+
+
+def scenario_params(case=None, **overrides):
+    params = dict(DEFAULT_PARAMS)
+    if case is not None:
+        params.update(CASES[case])
+    params.update(overrides)
+    return params
+
+
+def inputs_fingerprint(inputs):
+    """Hash of the input frame (index, columns and values), so results of other input data get other ids."""
+    digest = hashlib.sha256(json.dumps(list(map(str, inputs.columns))).encode())
+    digest.update(pd.util.hash_pandas_object(inputs, index=True).to_numpy().tobytes())
+    return digest.hexdigest()[:16]
+
+
+def scenario_id(params, inputs=None):
+    """
+    Stable id of a scenario: hash of the parameters that differ from DEFAULT_PARAMS, so adding a new parameter with
+    a default keeps the ids of stored results, plus the fingerprint of the inputs when given.
+    """
+    params = scenario_params(**params)
+    payload = {name: value for name, value in params.items() if value != DEFAULT_PARAMS[name]}
+    if inputs is not None:
+        payload["inputs"] = inputs_fingerprint(inputs)
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()[:16]
+
+#------------------------------------------------Network----------------------------------------------------------------
+
+
+def build_network(inputs, params=None):
+    """Bus - Load - Generator(Grid) - renewables - Battery stores, as in the battery_*.py scripts."""
+    params = scenario_params(**(params or {}))
+    timezone = None
+    if inputs.index.tz is not None:
+        # PyPSA only takes naive snapshots; naive UTC keeps the DST hours unique. The zone is kept for billing months.
+        timezone = str(inputs.index.tz)
+        inputs = inputs.set_axis(inputs.index.tz_convert("UTC").tz_localize(None))
+    if params["snapshot_hours"] > 1:
+        inputs = hydrogen.segment_inputs(inputs, params["snapshot_hours"])
+    intensity = carbon.hourly_intensity(inputs)
+    network = pypsa.Network()
+    network.meta["params"] = params
+    network.meta["timezone"] = timezone
+    network.meta["carbon_intensity"] = intensity.tolist()
+    network.set_snapshots(inputs.index)
+    if "hours" in inputs:
+        hydrogen.set_snapshot_hours(network, inputs["hours"])
+
+    network.add("Bus", "bus0")
+    network.add("Carrier", "grid", co2_emissions=intensity.mean())
+    network.add("Load", "Shipyard_Load", bus="bus0", p_set=inputs["load"])
+    network.add("Generator", "Grid", bus="bus0", carrier="grid", p_nom=params["grid_p_nom"],
+                marginal_cost=inputs["spot_price"] + params["import_tariff"]
+                + carbon.carbon_cost_rate(intensity, params["carbon_price"]))
+    if params["export_p_nom"]:
+        # Export as a generator running backwards: p <= 0, so marginal_cost * p is the (negative) cost of exporting
+        network.add("Generator", "Grid_export", bus="bus0", p_nom=params["export_p_nom"], p_min_pu=-1, p_max_pu=0,
+                    marginal_cost=inputs["spot_price"] - params["export_tariff"])
+
+    if params["wind"]:
+        network.add("Generator", "wind_turbine", bus="bus0", carrier="wind",
+                    p_nom=params["turbine_count"], p_max_pu=inputs["wind_" + params["wind"]], marginal_cost=0.0)
+    if params["solar"]:
+        network.add("Generator", "solar_pv", bus="bus0", carrier="solar",
+                    p_nom=params["roof_area_scale"], p_max_pu=inputs["solar"], marginal_cost=0.0)
+    if params["rain"]:
+        network.add("Generator", "Rain_power", bus="bus0", carrier="rain",
+                    p_nom=1, p_max_pu=inputs["rain"], marginal_cost=0.0)
+
+    for battery_name in BATTERY_NAMES[:params["battery_count"]]:
+        network.add("Store", battery_name,
+                    bus="bus0",
+                    e_nom=params["e_nom"],
+                    e_cyclic=False,
+                    e_initial=params["e_initial"],
+                    standing_loss=params["standing_loss"],
+                    efficiency_store=params["efficiency_store"],
+                    efficiency_dispatch=params["efficiency_dispatch"],
+                    e_min_pu=params["e_min_pu"],
+                    e_max_pu=params["e_max_pu"],
+                    capital_cost=params["capital_cost"],
+                    )
+    if params["hydrogen"]:
+        hydrogen.add_hydrogen(network, params)
+
+    return network
+
+
+def extra_functionality(network, snapshots):
+    """Constraints beyond PyPSA's own that the scenario parameters ask for, hooked into network.optimize()."""
+    params = network.meta.get("params", DEFAULT_PARAMS)
+    if params["peak_charge"]:
+        tariffs.add_peak_demand_charge(network, snapshots, params["peak_charge"])
+    if params["co2_cap"] is not None:
+        carbon.add_co2_cap(network, snapshots, params["co2_cap"])
+
+
+def solve(network, solver_name=None, config=None, **kwargs):
+    """
+    Optimise the network with solvers.py: settings by model size, solver stats in network.meta["solver"] and
+    fallback to the next installed solver. config overrides the generic settings, e.g. {"time_limit": 60}.
+    """
+    kwargs.setdefault("extra_functionality", extra_functionality)
+    return solvers.optimize(network, solver_name, config, **kwargs)
+
+#------------------------------------------------Results----------------------------------------------------------------
+
+RENEWABLE_COLUMNS = {"wind_turbine": "Wind (kWh)", "solar_pv": "Solar (kWh)", "Rain_power": "Rain Power (kWh)"}
+
+
+def extract_results(network):
+    """energy_system and economic_results frames with the columns written by the battery scripts."""
+    params = network.meta.get("params", DEFAULT_PARAMS)
+    # Energy per snapshot is power times its duration (hours > 1 with snapshot_hours)
+    hours = network.snapshot_weightings.generators
+    carbon_rate = carbon.carbon_cost_rate(network.meta["carbon_intensity"], params["carbon_price"])
+    spot_price = network.generators_t.marginal_cost["Grid"] - params["import_tariff"] - carbon_rate
+    grid_supply = network.generators_t.p["Grid"] * hours
+    import_cost = (grid_supply * (spot_price + params["import_tariff"])).sum()
+    co2 = carbon.emissions(network) * hours
+
+    energy_system = pd.DataFrame({
+        # All loads: multibus.py splits the yard load over the feeder buses
+        "Load (kWh)": network.loads_t.p_set.sum(axis=1) * hours,
+        "Grid supply (kWh)": grid_supply,
+        "Spot Price (Euro/kWh)": spot_price,
+    })
+    if "Grid_export" in network.generators.index:
+        energy_system["Grid export (kWh)"] = -network.generators_t.p["Grid_export"] * hours
+    for generator, column in RENEWABLE_COLUMNS.items():
+        if generator in network.generators.index:
+            energy_system[column] = network.generators_t.p[generator] * hours
+    if hydrogen.ELECTROLYSER in network.links.index:
+        energy_system = energy_system.join(hydrogen.hydrogen_flows(network).mul(hours, axis=0))
+    for store in network.stores.index:
+        energy_system[f"{store} (kWh)"] = network.stores_t.e[store]
+    energy_system["CO2 (kg)"] = co2
+
+    economic_results = pd.DataFrame({
+        "Grid supply (kWh)": [grid_supply.sum()],
+        "Total System Cost(Euro)": [network.objective],
+        "Grid Cost(Euro)": [import_cost],
+        "Marginal Prices (Avg Euro/kWh)": [network.buses_t.marginal_price["bus0"].mean()],
+    })
+    if "Grid_export" in network.generators.index:
+        export_revenue = (energy_system["Grid export (kWh)"] * network.generators_t.marginal_cost["Grid_export"]).sum()
+        economic_results["Grid export (kWh)"] = [energy_system["Grid export (kWh)"].sum()]
+        economic_results["Export Revenue(Euro)"] = [export_revenue]
+        economic_results["Net Grid Cost(Euro)"] = [import_cost - export_revenue]
+    for generator, column in RENEWABLE_COLUMNS.items():
+        if generator in network.generators.index:
+            economic_results[column.replace("(kWh)", "Generation (kWh)")] = [energy_system[column].sum()]
+    if hydrogen.ELECTROLYSER in network.links.index:
+        economic_results["Electrolyser Consumption (kWh)"] = [energy_system["Electrolyser (kWh)"].sum()]
+        economic_results["Fuel Cell Generation (kWh)"] = [energy_system["Fuel cell (kWh)"].sum()]
+
+    economic_results["CO2 Emissions (t)"] = [co2.sum() / 1000]
+    economic_results["Import Carbon Intensity (kg/kWh)"] = [co2.sum() / grid_supply.sum() if grid_supply.sum() else 0.0]
+    if params["carbon_price"]:
+        economic_results["Carbon Cost(Euro)"] = [co2.sum() / 1000 * params["carbon_price"]]
+    if params["co2_cap"] is not None:
+        economic_results["CO2 Shadow Price (Euro/t)"] = [carbon.co2_shadow_price(network)]
+
+    peak_charge = params["peak_charge"]
+    if peak_charge:
+        peaks = tariffs.peak_shaving(network, peak_charge)
+        economic_results["Peak Charge(Euro)"] = [peaks["Peak Charge (Euro)"].sum()]
+        economic_results["Peak Charge saved(Euro)"] = [peaks["Peak Charge saved (Euro)"].sum()]
+
+    return energy_system, economic_results
+
+
+def run_case(case, inputs=None, save=False, **solver_kwargs):
+    """
+    Solve one of the CASES and return (energy_system, economic_results).
+
+    The frames have the columns of extract_results, not those the battery_*.py scripts write to Results/ (e.g. no
+    "Battery Charge Cost(Euro)", renewables named per source), so the committed result files are only replaced with
+    save=True.
+    """
+    inputs = load_inputs() if inputs is None else inputs
+    network = build_network(inputs, scenario_params(case))
+    solve(network, **solver_kwargs)
+    energy_system, economic_results = extract_results(network)
+    if save:
+        energy_system.to_csv(results_store.energy_system_path(case))
+        economic_results.to_csv(results_store.economic_results_path(case))
+    return energy_system, economic_results
+
+
+def run_scenario(params, inputs=None, resume=True, compact=None, **solver_kwargs):
+    """
+    Solve one sweep scenario and store it in the results store under its scenario id; returns the id.
+
+    With resume=True a scenario whose result is already stored is skipped, so a restarted sweep continues where it
+    stopped. The id covers the inputs too, so a result of other (aligned, generated or appended) input data is not
+    taken for this one. compact: store the hourly results in compact binary form (see results_store.save_compact).
+    """
+    params = scenario_params(**params)
+    inputs = load_inputs() if inputs is None else inputs
+    run_id = scenario_id(params, inputs)
+    if resume and results_store.has_sweep_result(run_id):
+        return run_id
+    network = build_network(inputs, params)
+    solver_kwargs.setdefault("log_to_console", False)
+    status, condition = solve(network, **solver_kwargs)
+    # A time-limited solution is not stored as a complete sweep result
+    if status != "ok" or condition != "optimal":
+        raise RuntimeError(f"scenario {run_id}: solver returned {status} ({condition})")
+    energy_system, economic_results = extract_results(network)
+    results_store.save_sweep_result(run_id, params, energy_system, economic_results, compact)
+    return run_id
+
+
+def run_sweep(specs, inputs=None, resume=True, compact=None, **solver_kwargs):
+    inputs = load_inputs() if inputs is None else inputs
+    return [run_scenario(spec, inputs, resume, compact, **solver_kwargs) for spec in specs]
+
+
+if __name__ == "__main__":
+    inputs = load_inputs()
+    for case in CASES:
+        _, economic_results = run_case(case, inputs)
+        print(case)
+        print(economic_results.T)
@@ -0,0 +1,219 @@
+import argparse
+import itertools
+import json
+import logging
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+from contextlib import contextmanager
+from pathlib import Path
+
+import results_store
+import scenario
+
+# Work queue for scenario sweeps without an external service: scenario specs (plain params dicts, see scenario.py)
+# are rows of a SQLite table, workers on any host that sees the database file claim a row, solve the scenario,
+# write the result to the results store and mark the row done.
+#
+# - Idempotent: a scenario's row id is scenario.scenario_id(params), submitting it twice queues it once. The result
+#   is stored under scenario.scenario_id(params, inputs) of the inputs the worker solved it with.
+# - Retry: a failed scenario goes back to pending until it has been tried max_attempts times.
+# - Resume: a running worker refreshes a heartbeat; rows whose heartbeat is older than the lease (crashed worker,
+#   lost host) are handed out again. Restarting workers after a crash just continues the queue, and scenarios whose
+#   result was stored just before a crash are not solved again (scenario.run_scenario).
+#
+# SQLite's locking needs a file system with working POSIX locks; for several hosts put the database on such a share
+# (not every NFS setup qualifies) or run one queue per host.
+
+logger = logging.getLogger("aibel.queue")
+
+QUEUE_PATH = results_store.RESULTS_DIR / "queue.sqlite"
+LEASE = 600  # Seconds without heartbeat after which a running scenario counts as abandoned
+MAX_ATTEMPTS = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenarios (
+    id TEXT PRIMARY KEY,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL DEFAULT 'pending',  -- pending, running, done, failed
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    heartbeat REAL,
+    submitted REAL,
+    finished REAL,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS scenarios_status ON scenarios (status);
+"""
+
+
+def connect(path=QUEUE_PATH):
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    connection = sqlite3.connect(path, timeout=60, isolation_level=None)
+    connection.execute("PRAGMA journal_mode=WAL")
+    connection.executescript(SCHEMA)
+    return connection
+
+
+@contextmanager
+def _transaction(connection):
+    # BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim the same row
+    connection.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+        connection.execute("COMMIT")
+    except BaseException:
+        connection.execute("ROLLBACK")
+        raise
+
+#------------------------------------------------Scheduler--------------------------------------------------------------
+
+
+def submit(connection, specs):
+    """Queue params dicts (overrides of scenario.DEFAULT_PARAMS); returns their scenario ids."""
+    ids = []
+    with _transaction(connection):
+        for spec in specs:
+            params = scenario.scenario_params(**spec)
+            scenario_id = scenario.scenario_id(params)
+            connection.execute("INSERT OR IGNORE INTO scenarios (id, params, submitted) VALUES (?, ?, ?)",
+                               (scenario_id, json.dumps(params, sort_keys=True), time.time()))
+            ids.append(scenario_id)
+    return ids
+
+
+def case_specs(cases=None):
+    return [scenario.scenario_params(case) for case in (cases or scenario.CASES)]
+
+
+def grid_specs(base=None, **axes):
+    """Cartesian sweep: grid_specs(scenario_params("BatteryWind_Case"), battery_count=[2, 4, 6], e_nom=[500, 1000])."""
+    base = base or {}
+    names = list(axes)
+    return [{**base, **dict(zip(names, values))} for values in itertools.product(*axes.values())]
+
+
+def requeue_stale(connection, lease=LEASE, max_attempts=MAX_ATTEMPTS):
+    """Hand abandoned running scenarios out again (or fail them when out of attempts); returns how many."""
+    now = time.time()
+    with _transaction(connection):
+        stale = connection.execute(
+            "UPDATE scenarios SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, worker = NULL, "
+            "error = 'lease expired' WHERE status = 'running' AND heartbeat < ?", (max_attempts, now - lease)).rowcount
+    return stale
+
+
+def retry_failed(connection):
+    """Put failed scenarios back into the queue with a fresh attempt budget."""
+    with _transaction(connection):
+        return connection.execute("UPDATE scenarios SET status = 'pending', attempts = 0 WHERE status = 'failed'").rowcount
+
+
+def status(connection):
+    rows = connection.execute("SELECT status, COUNT(*) FROM scenarios GROUP BY status").fetchall()
+    return dict(rows)
+
+
+def failures(connection):
+    return connection.execute("SELECT id, attempts, error FROM scenarios WHERE status = 'failed'").fetchall()
+
+#------------------------------------------------Worker-----------------------------------------------------------------
+
+
+def claim(connection, worker, lease=LEASE, max_attempts=MAX_ATTEMPTS):
+    """Take the oldest pending scenario; returns (id, params) or None when nothing is left to do."""
+    requeue_stale(connection, lease, max_attempts)
+    with _transaction(connection):
+        row = connection.execute(
+            "SELECT id, params FROM scenarios WHERE status = 'pending' ORDER BY submitted, id LIMIT 1").fetchone()
+        if row is None:
+            return None
+        connection.execute("UPDATE scenarios SET status = 'running', worker = ?, heartbeat = ?, "
+                           "attempts = attempts + 1 WHERE id = ?", (worker, time.time(), row[0]))
+    return row[0], json.loads(row[1])
+
+
+def _finish(connection, scenario_id, worker, error=None, max_attempts=MAX_ATTEMPTS):
+    with _transaction(connection):
+        if error is None:
+            connection.execute("UPDATE scenarios SET status = 'done', finished = ?, error = NULL WHERE id = ? "
+                               "AND worker = ?", (time.time(), scenario_id, worker))
+        else:
+            connection.execute(
+                "UPDATE scenarios SET status = CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "worker = NULL, error = ? WHERE id = ? AND worker = ?", (max_attempts, error, scenario_id, worker))
+
+
+def _heartbeat(path, scenario_id, worker, stop, interval):
+    # Own connection: sqlite3 connections must not be shared between threads
+    connection = connect(path)
+    while not stop.wait(interval):
+        connection.execute("UPDATE scenarios SET heartbeat = ? WHERE id = ? AND worker = ?",
+                           (time.time(), scenario_id, worker))
+    connection.close()
+
+
+def run_worker(path=QUEUE_PATH, inputs=None, lease=LEASE, max_attempts=MAX_ATTEMPTS, max_scenarios=None, wait=0,
+               compact=None):
+    """
+    Solve queued scenarios until the queue is empty; returns the number solved.
+
+    wait > 0 keeps polling for new work every `wait` seconds instead of exiting when the queue is empty.
+    compact: store hourly results in compact form (see results_store.save_compact).
+    """
+    worker = f"{socket.gethostname()}:{threading.get_native_id()}:{time.time_ns()}"
+    connection = connect(path)
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    solved = 0
+    while max_scenarios is None or solved < max_scenarios:
+        job = claim(connection, worker, lease, max_attempts)
+        if job is None:
+            if wait:
+                time.sleep(wait)
+                continue
+            break
+        scenario_id, params = job
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(path, scenario_id, worker, stop, lease / 4), daemon=True)
+        beat.start()
+        start = time.perf_counter()
+        try:
+            scenario.run_scenario(params, inputs, compact=compact)
+            error = None
+        except Exception:
+            error = traceback.format_exc(limit=5)
+        finally:
+            stop.set()
+            beat.join()
+        _finish(connection, scenario_id, worker, error, max_attempts)
+        if error is None:
+            solved += 1
+            logger.info(f"{scenario_id} done in {time.perf_counter() - start:.1f} s")
+        else:
+            logger.warning(f"{scenario_id} failed: {error.strip().splitlines()[-1]}")
+    connection.close()
+    return solved
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    parser = argparse.ArgumentParser(description="Scenario work queue")
+    parser.add_argument("command", choices=["submit-cases", "worker", "status", "retry"])
+    parser.add_argument("--db", default=QUEUE_PATH, type=Path)
+    parser.add_argument("--wait", default=0, type=float, help="worker: poll interval when idle, 0 = exit when empty")
+    parser.add_argument("--compact", action="store_true", help="worker: store hourly results as float32 .npz")
+    args = parser.parse_args()
+
+    db = connect(args.db)
+    if args.command == "submit-cases":
+        print(submit(db, case_specs()))
+    elif args.command == "worker":
+        print(f"Solved {run_worker(args.db, wait=args.wait, compact={} if args.compact else None)} scenarios")
+    elif args.command == "retry":
+        print(f"Requeued {retry_failed(db)} scenarios")
+    print(status(db))
@@ -0,0 +1,140 @@
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import scenario
+
+# First-order sensitivities of the optimal cost from one solve, instead of one re-solve per perturbation.
+#
+# For the LP  min c'x  s.t.  A x (<=, =, >=) b  with optimal primal x and duals y (linopy sign convention,
+# d objective / d b_i = y_i), the envelope theorem gives for any parameter p of the data
+#
+#     d objective / dp = x' dc/dp + y' db/dp - y' (dA/dp) x
+#
+# The model data depends affinely on the scenario parameters, so dc/dp, db/dp and dA/dp come from building (not
+# solving) the model once more with p moved by a small step. That costs one model build per parameter and is exact
+# away from degenerate points, where the LP cost has a kink and the dual gives one of the one-sided slopes.
+#
+# Note: PyPSA's Store has no charge/discharge efficiency (efficiency_store/dispatch are passed by the scripts but
+# ignored), so those two come out as exactly zero; the loss that is modelled is standing_loss.
+
+logger = logging.getLogger("aibel.sensitivity")
+
+# Continuous scenario parameters that keep the model structure
+PARAMETERS = ["e_nom", "e_initial", "standing_loss", "efficiency_store", "efficiency_dispatch", "e_min_pu", "e_max_pu",
+              "grid_p_nom", "import_tariff", "export_tariff", "turbine_count", "roof_area_scale", "peak_charge",
+              "carbon_price"]
+
+# Input series whose level is scaled; the sensitivity is per unit scale factor (EUR per +100 %)
+INPUT_SCALES = ["spot_price", "load"]
+
+#------------------------------------------------Shadow prices----------------------------------------------------------
+
+SHADOW_PRICES = {
+    "Bus-nodal_balance": "Marginal price (Euro/kWh)",
+    "Store-fix-e-lower": "Store energy lower bound (Euro/kWh)",
+    "Store-fix-e-upper": "Store energy upper bound (Euro/kWh)",
+    "Store-energy_balance": "Store energy balance (Euro/kWh)",
+    "Generator-fix-p-upper": "Generator capacity (Euro/kW)",
+}
+
+
+def shadow_prices(network):
+    """Duals of the solved model per constraint group as (snapshot x component) frames, EUR per unit of rhs."""
+    model = network.model
+    return {label: model.constraints[name].dual.to_pandas()
+            for name, label in SHADOW_PRICES.items() if name in model.constraints}
+
+
+def shadow_price_summary(network):
+    """Shadow prices summed over the year per component: the cost change of relaxing the limit in every hour."""
+    return pd.concat({label: df.sum() for label, df in shadow_prices(network).items()}, names=["constraint", "name"])
+
+#------------------------------------------------Sensitivities----------------------------------------------------------
+
+
+def _model_data(inputs, params):
+    network = scenario.build_network(inputs, params)
+    model = network.optimize.create_model()
+    scenario.extra_functionality(network, network.snapshots)
+    matrices = model.matrices
+    return matrices.c, matrices.b, matrices.A
+
+
+def _perturbed(inputs, params, name, step):
+    if name in INPUT_SCALES:
+        inputs = inputs.copy()
+        inputs[name] = inputs[name] * (1 + step)
+        return inputs, params
+    return inputs, {**params, name: params[name] + step}
+
+
+def _step(params, name, rel_step):
+    return rel_step if name in INPUT_SCALES else rel_step * max(abs(params[name]), 1.0)
+
+
+def sensitivities(network, inputs, parameters=None, rel_step=1e-4):
+    """
+    d cost / d parameter for a solved scenario network, from its primal and dual solution.
+
+    inputs: the inputs the network was built from. parameters: names of PARAMETERS and INPUT_SCALES (default all).
+    Returns one row per parameter with the value, the derivative and the elasticity (relative cost change per
+    relative parameter change). Parameters that would change the model structure (e.g. peak_charge from 0) get NaN.
+    """
+    params = network.meta["params"]
+    matrices = network.model.matrices
+    x, y = matrices.sol, matrices.dual
+    c, b, A = matrices.c, matrices.b, matrices.A
+    objective = float(network.objective)
+
+    rows = []
+    for name in parameters or PARAMETERS + INPUT_SCALES:
+        value = 1.0 if name in INPUT_SCALES else params[name]
+        step = _step(params, name, rel_step)
+        c2, b2, A2 = _model_data(*_perturbed(inputs, params, name, step))
+        if A2.shape != A.shape:
+            derivative = np.nan
+        else:
+            derivative = (x @ (c2 - c) + y @ (b2 - b) - y @ ((A2 - A) @ x)) / step
+        rows.append({"parameter": name, "value": value, "d_cost": derivative,
+                     "elasticity": derivative * value / objective if objective else np.nan})
+    return pd.DataFrame(rows).set_index("parameter")
+
+
+def validate(network, inputs, parameters=None, rel_step=1e-3):
+    """Compare the dual-based derivatives with forward and backward finite differences of full re-solves."""
+    params = network.meta["params"]
+    objective = float(network.objective)
+    estimates = sensitivities(network, inputs, parameters)
+    rows = []
+    for name in estimates.index:
+        step = _step(params, name, rel_step)
+        slopes = {}
+        for side, sign in (("forward", 1), ("backward", -1)):
+            perturbed = scenario.build_network(*_perturbed(inputs, params, name, sign * step))
+            status, _ = scenario.solve(perturbed, log_to_console=False)
+            slopes[side] = sign * (float(perturbed.objective) - objective) / step if status == "ok" else np.nan
+        dual = estimates.at[name, "d_cost"]
+        # At a kink the dual is one of the one-sided slopes, compare with the closer one
+        closest = min(slopes.values(), key=lambda slope: abs(slope - dual))
+        rows.append({"parameter": name, "dual": dual, **slopes,
+                     "rel_error": abs(dual - closest) / max(abs(closest), 1e-9)})
+    return pd.DataFrame(rows).set_index("parameter")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    inputs = scenario.load_inputs()
+    network = scenario.build_network(inputs, scenario.scenario_params("BatteryWind_Case"))
+    scenario.solve(network, log_to_console=False)
+
+    start = time.perf_counter()
+    print(sensitivities(network, inputs).to_string())
+    print(f"Dual-based sensitivities: {time.perf_counter() - start:.1f} s")
+    start = time.perf_counter()
+    print(validate(network, inputs, ["e_nom", "standing_loss", "e_max_pu", "grid_p_nom", "spot_price"]).to_string())
+    print(f"Finite-difference validation: {time.perf_counter() - start:.1f} s")
@@ -0,0 +1,151 @@
+import os
+import pickle
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+import scenario
+
+# Publish the input series once and let sweep workers attach to them without copying.
+# The values (float64, hours x series) and the index (int64 ns) are written into one shared memory block; workers
+# receive a small picklable handle and build a DataFrame view on the block. A memory-mapped .npy variant is
+# available for workers that are started independently of the parent (e.g. on the same host by the queue).
+
+MEMMAP_DIR = Path("Datasets/.cache")
+
+
+def publish(inputs):
+    """Copy `inputs` into shared memory; returns (block, handle). Keep block alive and unlink() it when done."""
+    values = np.ascontiguousarray(inputs.to_numpy(dtype=np.float64))
+    index = inputs.index.tz_convert("UTC") if inputs.index.tz is not None else inputs.index
+    index = index.as_unit("ns").asi8
+    block = shared_memory.SharedMemory(create=True, size=values.nbytes + index.nbytes)
+    np.ndarray(values.shape, np.float64, block.buf)[:] = values
+    np.ndarray(index.shape, np.int64, block.buf, offset=values.nbytes)[:] = index
+    handle = {
+        "name": block.name,
+        "shape": values.shape,
+        "columns": list(inputs.columns),
+        "tz": str(inputs.index.tz) if inputs.index.tz is not None else None,
+        "index_name": inputs.index.name,
+    }
+    return block, handle
+
+
+def attach(handle):
+    """DataFrame view on a published block (no copy); returns (block, inputs), keep block referenced while in use."""
+    # Pool workers share the publisher's resource tracker, so attaching (which registers the name again before
+    # Python 3.13) does not unlink the block when a worker exits; the publisher unlinks it
+    block = shared_memory.SharedMemory(name=handle["name"])
+    rows, cols = handle["shape"]
+    values = np.ndarray((rows, cols), np.float64, block.buf)
+    values.flags.writeable = False
+    index = pd.DatetimeIndex(np.ndarray((rows,), np.int64, block.buf, offset=values.nbytes).view("datetime64[ns]"),
+                             name=handle["index_name"])
+    if handle["tz"] is not None:
+        index = index.tz_localize("UTC").tz_convert(handle["tz"])
+    return block, pd.DataFrame(values, index=index, columns=handle["columns"], copy=False)
+
+
+def publish_memmap(inputs, name="inputs"):
+    """Write `inputs` as .npy files that workers open with attach_memmap(); returns the handle."""
+    MEMMAP_DIR.mkdir(parents=True, exist_ok=True)
+    values_path = MEMMAP_DIR / f"{name}_values.npy"
+    index_path = MEMMAP_DIR / f"{name}_index.npy"
+    np.save(values_path, inputs.to_numpy(dtype=np.float64))
+    index = inputs.index.tz_convert("UTC") if inputs.index.tz is not None else inputs.index
+    np.save(index_path, index.as_unit("ns").asi8)
+    return {"values": str(values_path), "index": str(index_path), "columns": list(inputs.columns),
+            "tz": str(inputs.index.tz) if inputs.index.tz is not None else None, "index_name": inputs.index.name}
+
+
+def attach_memmap(handle):
+    values = np.load(handle["values"], mmap_mode="r")
+    index = pd.DatetimeIndex(np.load(handle["index"]).view("datetime64[ns]"), name=handle["index_name"])
+    if handle["tz"] is not None:
+        index = index.tz_localize("UTC").tz_convert(handle["tz"])
+    return pd.DataFrame(values, index=index, columns=handle["columns"], copy=False)
+
+#------------------------------------------------Worker side------------------------------------------------------------
+
+# Set once per worker process by init_worker, read by the tasks through worker_inputs()
+_worker = {}
+
+
+def init_worker(handle):
+    """ProcessPoolExecutor initializer: attach to the published inputs (shared memory or memmap handle)."""
+    if "name" in handle:
+        _worker["block"], _worker["inputs"] = attach(handle)
+    else:
+        _worker["inputs"] = attach_memmap(handle)
+
+
+def worker_inputs():
+    return _worker["inputs"]
+
+#------------------------------------------------Benchmark--------------------------------------------------------------
+
+
+def _private_memory_mb():
+    # Private (anonymous) resident memory is what a worker adds; shared memory and file pages are counted once
+    status = Path(f"/proc/{os.getpid()}/status")
+    if status.exists():
+        for line in status.read_text().splitlines():
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1]) / 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _pickled_task(payload):
+    before = _private_memory_mb()
+    start = time.perf_counter()
+    inputs = pickle.loads(payload)
+    total = float(inputs.to_numpy().sum())
+    return {"startup": time.perf_counter() - start, "checksum": total, "added_mb": _private_memory_mb() - before}
+
+
+def _shared_task(handle):
+    before = _private_memory_mb()
+    start = time.perf_counter()
+    init_worker(handle)
+    total = float(worker_inputs().to_numpy().sum())
+    return {"startup": time.perf_counter() - start, "checksum": total, "added_mb": _private_memory_mb() - before}
+
+
+def benchmark(inputs=None, workers=4, years=20):
+    """Per-worker startup time and memory for pickled DataFrames vs shared memory vs memmap, with `years` of data."""
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    # Stack copies so the arrays have the size of a multi-year sweep input
+    big = pd.concat([inputs] * years, ignore_index=True)
+    big.index = pd.date_range("2024-01-01", periods=len(big), freq="h")
+    print(f"Input size: {big.memory_usage().sum() / 2**20:.1f} MB")
+
+    results = {}
+    with ProcessPoolExecutor(workers) as pool:
+        payload = pickle.dumps(big)
+        results["pickle"] = list(pool.map(_pickled_task, [payload] * workers))
+
+    block, handle = publish(big)
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            results["shared_memory"] = list(pool.map(_shared_task, [handle] * workers))
+    finally:
+        block.close()
+        block.unlink()
+
+    memmap_handle = publish_memmap(big, "benchmark")
+    with ProcessPoolExecutor(workers) as pool:
+        results["memmap"] = list(pool.map(_shared_task, [memmap_handle] * workers))
+    for key in ("values", "index"):
+        Path(memmap_handle[key]).unlink()
+
+    return pd.DataFrame({method: pd.DataFrame(rows).drop(columns="checksum").mean() for method, rows in results.items()}).T
+
+
+if __name__ == "__main__":
+    print(benchmark())
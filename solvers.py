@@ -0,0 +1,192 @@
+import logging
+import os
+import sys
+import time
+
+import linopy
+import pandas as pd
+
+# Solver configuration for the scenario engine. network.optimize() alone uses linopy's default solver without time
+# limit, thread count or tolerances; here the settings are picked from the size of the model, translated to the
+# option names of each backend, and when a solver fails (not installed, crash, time limit, numerical trouble) the
+# next installed one is tried on the same linopy model.
+
+logger = logging.getLogger("aibel.solvers")
+
+# Tried in this order; only the installed ones are used
+PREFERENCE = ["highs", "cbc", "glpk"]
+
+# Generic setting -> option name of each backend (None: the backend has no such option)
+OPTION_NAMES = {
+    "highs": {"threads": "threads", "time_limit": "time_limit", "mip_gap": "mip_rel_gap",
+              "tolerance": "primal_feasibility_tolerance", "log_to_console": "log_to_console"},
+    "cbc": {"threads": "threads", "time_limit": "sec", "mip_gap": "ratio", "tolerance": "primalTolerance",
+            "log_to_console": None},
+    "glpk": {"threads": None, "time_limit": "tmlim", "mip_gap": "mipgap", "tolerance": None, "log_to_console": None},
+}
+GENERIC_OPTIONS = set(OPTION_NAMES["highs"])
+
+# Settings by model size, the first tier whose max_variables is not exceeded applies.
+# One battery case over a year has 114k-131k variables and solves in about a second; multi-bus and multi-year models are larger.
+SIZE_TIERS = [
+    {"name": "small", "max_variables": 50_000, "threads": 1, "time_limit": 120, "mip_gap": 1e-4, "tolerance": 1e-7},
+    {"name": "medium", "max_variables": 500_000, "threads": 2, "time_limit": 900, "mip_gap": 1e-4, "tolerance": 1e-7},
+    {"name": "large", "max_variables": None, "threads": None, "time_limit": 3600, "mip_gap": 1e-3, "tolerance": 1e-7},
+]
+
+
+def installed_solvers():
+    return [solver for solver in PREFERENCE if solver in linopy.available_solvers]
+
+
+def solver_config(model, **overrides):
+    """Generic settings (threads, time_limit, mip_gap, tolerance) for a linopy model, from SIZE_TIERS."""
+    n_variables = int(model.nvars)
+    tier = next(t for t in SIZE_TIERS if t["max_variables"] is None or n_variables <= t["max_variables"])
+    config = {key: value for key, value in tier.items() if key != "max_variables"}
+    if config["threads"] is None:
+        config["threads"] = os.cpu_count() or 1
+    config.update(overrides)
+    return config
+
+
+def solver_options(solver_name, config):
+    """Translate generic settings to the option names of `solver_name`; settings it does not know are dropped."""
+    names = OPTION_NAMES.get(solver_name, {})
+    return {names[key]: value for key, value in config.items() if names.get(key) and value is not None}
+
+
+def solver_statistics(model):
+    """Iteration counts and runtime reported by the solver, when the backend exposes them (HiGHS does)."""
+    stats = {}
+    solver_model = getattr(model, "solver_model", None)
+    if solver_model is not None and hasattr(solver_model, "getInfo"):
+        info = solver_model.getInfo()
+        stats["simplex_iterations"] = int(info.simplex_iteration_count)
+        stats["ipm_iterations"] = int(info.ipm_iteration_count)
+        stats["mip_gap"] = float(info.mip_gap) if info.mip_node_count > 0 else None
+        stats["solver_runtime"] = float(solver_model.getRunTime())
+    return stats
+
+
+def _usable(model, status):
+    # linopy says "ok" at a time limit whatever the iterate; HiGHS tells whether it is primal feasible
+    if status != "ok":
+        return False
+    solver_model = getattr(model, "solver_model", None)
+    if solver_model is not None and hasattr(solver_model, "getInfo"):
+        return solver_model.getInfo().primal_solution_status == 2  # kSolutionStatusFeasible
+    return True
+
+
+def _save_result(model):
+    # Solution, duals and status of a usable attempt, a later solver call resets them
+    return {"variables": {name: var.solution.copy() for name, var in model.variables.items()},
+            "duals": {name: con.dual.copy() for name, con in model.constraints.items()},
+            "objective": model.objective.value, "status": model.status, "condition": model.termination_condition}
+
+
+def _restore_result(model, saved):
+    for name, solution in saved["variables"].items():
+        model.variables[name].solution = solution
+    for name, dual in saved["duals"].items():
+        model.constraints[name].dual = dual
+    model.objective._value = saved["objective"]
+    model.status, model.termination_condition = saved["status"], saved["condition"]
+
+
+def solve_model(model, solver_name=None, config=None, fallback=True, **options):
+    """
+    Solve a linopy model with the configured settings, falling back to the next installed solver on failure.
+
+    Returns (status, condition, attempts); attempts has one record per solver tried. Without an optimal solution the
+    best usable one (status "ok", e.g. at a time limit) of all attempts is kept on the model and returned.
+    options with generic names (see OPTION_NAMES, e.g. time_limit, log_to_console) override the config and are
+    translated for each backend; other options are backend specific and only passed to the first solver.
+    """
+    config = solver_config(model, **(config or {}), **{k: v for k, v in options.items() if k in GENERIC_OPTIONS})
+    specific = {k: v for k, v in options.items() if k not in GENERIC_OPTIONS}
+    candidates = installed_solvers()
+    if solver_name is not None:
+        candidates = [solver_name] + [s for s in candidates if s != solver_name]
+    if not fallback:
+        candidates = candidates[:1]
+    if not candidates:
+        raise RuntimeError(f"None of {PREFERENCE} is installed")
+
+    attempts = []
+    status, condition = "error", "no solver"
+    best = None
+    for name in candidates:
+        start = time.perf_counter()
+        try:
+            status, condition = model.solve(solver_name=name, **solver_options(name, config),
+                                            **(specific if name == candidates[0] else {}))
+            error = None
+        except Exception as exc:
+            status, condition, error = "error", "exception", f"{type(exc).__name__}: {exc}"
+        record = {"solver": name, "status": status, "condition": condition, "wall_time": time.perf_counter() - start,
+                  "tier": config["name"], "variables": int(model.nvars), "constraints": int(model.ncons),
+                  "error": error}
+        if error is None:
+            record.update(solver_statistics(model))
+        attempts.append(record)
+        # linopy reports "ok" for a time limit with a solution at hand, only an optimal solution ends the search
+        if status == "ok" and condition == "optimal":
+            return status, condition, attempts
+        if _usable(model, status) and (best is None or model.objective.value < best["objective"]):
+            best = _save_result(model)
+        logger.warning(f"{name} failed ({condition}{': ' + error if error else ''}), "
+                       f"{'trying next solver' if name != candidates[-1] else 'no solver left'}")
+    if best is not None:
+        _restore_result(model, best)
+        status, condition = best["status"], best["condition"]
+        logger.warning(f"No optimal solution, keeping the best usable one ({condition})")
+    elif status == "ok":
+        status = "warning"  # Only an unusable iterate, e.g. a time limit before a feasible point was found
+    return status, condition, attempts
+
+
+def optimize(network, solver_name=None, config=None, extra_functionality=None, fallback=True, **options):
+    """
+    network.optimize() through solve_model: same model, same write-back, configured solver with fallback.
+
+    The solver records are stored in network.meta["solver"].
+    """
+    model = network.optimize.create_model()
+    if extra_functionality is not None:
+        extra_functionality(network, network.snapshots)
+    status, condition, attempts = solve_model(model, solver_name, config, fallback, **options)
+    if status == "ok":
+        network.optimize.assign_solution()
+        network.optimize.assign_duals()
+        network.optimize.post_processing()
+    network.meta["solver"] = attempts
+    return status, condition
+
+#------------------------------------------------Benchmark--------------------------------------------------------------
+
+
+def benchmark(cases=None, solvers=None, inputs=None, config=None):
+    """Solve every case with every installed solver (no fallback); one row per (case, solver)."""
+    import scenario
+
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    rows = []
+    for case in cases or scenario.CASES:
+        for solver_name in solvers or installed_solvers():
+            network = scenario.build_network(inputs, scenario.scenario_params(case))
+            start = time.perf_counter()
+            status, _ = optimize(network, solver_name, config, scenario.extra_functionality, fallback=False,
+                                 log_to_console=False)
+            record = network.meta["solver"][-1]
+            rows.append({"case": case, **record, "total_time": time.perf_counter() - start,
+                         "objective": network.objective if status == "ok" else None})
+    return pd.DataFrame(rows).set_index(["case", "solver"])
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    print(benchmark(solvers=sys.argv[1:] or None).to_string())
@@ -0,0 +1,146 @@
+import csv
+import logging
+import time
+
+import numpy as np
+import pandas as pd
+
+import mpc
+import scenario
+
+# Streaming dispatch: every hour a new measurement (load, spot price, renewables) arrives, the battery network is
+# re-solved over a short look-ahead window starting from the current SOC and only the next hour is applied.
+# The window model is compiled once (mpc.WindowModel), each hour only updates its data.
+
+logger = logging.getLogger("aibel.streaming")
+
+INPUT_COLUMNS = mpc.FORECAST_COLUMNS
+
+#------------------------------------------------Feeds------------------------------------------------------------------
+
+
+def stub_feed(inputs, start=0, hours=None, delay=0.0):
+    """Replay rows of scenario.load_inputs() as hourly updates, optionally sleeping delay seconds between them."""
+    stop = len(inputs) if hours is None else min(len(inputs), start + hours)
+    for i in range(start, stop):
+        row = inputs.iloc[i]
+        yield {"time": inputs.index[i], **{column: float(row[column]) for column in inputs.columns}}
+        if delay:
+            time.sleep(delay)
+
+
+def tail_feed(path, poll_interval=1.0, timeout=None):
+    """
+    Follow a CSV file like `tail -f` and yield each appended row as an update.
+
+    The header must contain time plus any of INPUT_COLUMNS. Stops when no new row arrived within timeout seconds.
+    """
+    with open(path, newline="") as f:
+        header = next(csv.reader([f.readline()]))
+        last_row = time.monotonic()
+        buffer = ""
+        while True:
+            line = f.readline()
+            if not line or not line.endswith("\n"):
+                buffer += line
+                if timeout is not None and time.monotonic() - last_row > timeout:
+                    return
+                time.sleep(poll_interval)
+                continue
+            line, buffer = buffer + line, ""
+            values = next(csv.reader([line]))
+            last_row = time.monotonic()
+            update = {"time": pd.Timestamp(values[0])}
+            update.update({name: float(value) for name, value in zip(header[1:], values[1:]) if value != ""})
+            yield update
+
+#------------------------------------------------Dispatcher-------------------------------------------------------------
+
+
+class StreamingDispatcher:
+    """
+    Receding-horizon dispatch of the battery network driven by hourly updates.
+
+    Values for the hours after the newest update are forecast by persistence (same hour one day earlier), unless
+    the update carries a "forecast" DataFrame with INPUT_COLUMNS for the coming hours.
+    """
+
+    def __init__(self, params=None, horizon=24, latency_budget=5.0):
+        self.params = scenario.scenario_params(**(params or {}))
+        self.horizon = horizon
+        self.latency_budget = latency_budget
+        self.model = mpc.WindowModel(self.params, horizon)
+        self.params = self.model.params
+        self.history = pd.DataFrame(columns=INPUT_COLUMNS, dtype=float)
+        self.soc = pd.Series(float(self.params["e_initial"]), index=self.model.stores)
+        self.latencies = []
+
+    def _window(self, now, forecast=None):
+        index = pd.date_range(now, periods=self.horizon, freq="h")
+        window = pd.DataFrame(index=index, columns=INPUT_COLUMNS, dtype=float)
+        window.iloc[0] = self.history.loc[now, INPUT_COLUMNS]
+        if forecast is not None:
+            window.update(forecast.reindex(index))
+        # Persistence: same hour yesterday if seen, otherwise the latest value
+        yesterday = self.history.reindex(index - pd.Timedelta(hours=24))
+        yesterday.index = index
+        window = window.fillna(yesterday).fillna(self.history.iloc[-1])
+        return window.fillna(0.0)
+
+    def step(self, update):
+        """Ingest one hourly update and return the setpoint for that hour."""
+        start = time.perf_counter()
+        update = dict(update)
+        now = pd.Timestamp(update.pop("time"))
+        forecast = update.pop("forecast", None)
+        self.history.loc[now] = pd.Series(update).reindex(INPUT_COLUMNS).fillna(0.0)
+
+        window = self._window(now, forecast)
+        plan = self.model.solve(window, self.soc.values)
+
+        setpoint = {
+            "time": now,
+            "grid": plan["grid"],
+            "battery": float(-plan["store_p"][self.model.batteries].sum()),  # Positive when the batteries charge
+            "soc": float(plan["soc"][self.model.batteries].sum()),
+            "window_cost": plan["objective"],
+        }
+        self.soc = pd.Series(plan["soc"], index=self.soc.index)
+
+        latency = time.perf_counter() - start
+        self.latencies.append(latency)
+        setpoint["latency"] = latency
+        if latency > self.latency_budget:
+            logger.warning(f"Dispatch at {now} took {latency:.2f} s, budget is {self.latency_budget:.2f} s")
+        return setpoint
+
+    def run(self, feed):
+        for update in feed:
+            yield self.step(update)
+
+    def latency_report(self):
+        latencies = np.array(self.latencies)
+        if not len(latencies):
+            return {}
+        return {
+            "steps": len(latencies),
+            "mean": float(latencies.mean()),
+            "p50": float(np.percentile(latencies, 50)),
+            "p95": float(np.percentile(latencies, 95)),
+            "max": float(latencies.max()),
+            "budget": self.latency_budget,
+            "over_budget": int((latencies > self.latency_budget).sum()),
+        }
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+
+    inputs = scenario.load_inputs()
+    dispatcher = StreamingDispatcher(scenario.scenario_params("BatteryWind_Case"), horizon=24)
+    for setpoint in dispatcher.run(stub_feed(inputs, start=6000, hours=48)):
+        print(f"{setpoint['time']}  grid {setpoint['grid']:8.1f} kW  battery {setpoint['battery']:8.1f} kW  "
+              f"SOC {setpoint['soc']:8.1f} kWh  ({setpoint['latency'] * 1000:.0f} ms)")
+    print(dispatcher.latency_report())
@@ -0,0 +1,223 @@
+import logging
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.linalg import cho_factor, cho_solve
+from scipy.optimize import minimize
+from scipy.stats import qmc
+
+import global_sensitivity
+import results_store
+import scenario
+
+# Regression surrogate of the full-year results: maps design parameters to grid cost, grid supply and renewable
+# share, trained on scenarios solved by the scenario runner (scenario.run_sweep, stored in Results/sweeps).
+# The model is a Gaussian process (ARD squared-exponential kernel, numpy/scipy only): it is accurate with the tens to
+# hundreds of solved scenarios we can afford, and its predictive standard deviation tells active learning which
+# scenario to solve next.
+
+logger = logging.getLogger("aibel.surrogate")
+
+# Design space: the global sensitivity ranges without the Store efficiencies, which PyPSA ignores
+DESIGN_RANGES = {name: bounds for name, bounds in global_sensitivity.PARAMETER_RANGES.items()
+                 if not name.startswith("efficiency")}
+
+BASE_CASE = global_sensitivity.BASE_CASE
+
+TARGETS = ["Grid Cost(Euro)", "Grid supply (kWh)", "Renewable share"]
+
+
+def training_data(scenario_ids=None, ranges=None):
+    """(X, Y) from the stored sweep results: design parameters and the TARGETS, one row per scenario."""
+    ranges = ranges or DESIGN_RANGES
+    results = results_store.load_sweep_economics(scenario_ids)
+    # Only the renewable generators: the fuel cell (hydrogen.py) also reports a "Generation (kWh)" total, but its
+    # energy comes from the grid through the electrolyser
+    columns = [column.replace("(kWh)", "Generation (kWh)") for column in scenario.RENEWABLE_COLUMNS.values()]
+    renewables = results.reindex(columns=columns).fillna(0.0).sum(axis=1)
+    results["Renewable share"] = renewables / (renewables + results["Grid supply (kWh)"])
+    return results[list(ranges)].astype(float), results[TARGETS].astype(float)
+
+#------------------------------------------------Gaussian process-------------------------------------------------------
+
+
+class GaussianProcess:
+    """GP regression with an ARD squared-exponential kernel and a noise term, hyperparameters by max. likelihood."""
+
+    def __init__(self, ranges, restarts=3, seed=0):
+        self.low = np.array([r[0] for r in ranges.values()], dtype=float)
+        self.span = np.array([r[1] - r[0] for r in ranges.values()], dtype=float)
+        self.restarts = restarts
+        self.rng = np.random.default_rng(seed)
+
+    def _kernel(self, a, b, lengthscales, amplitude):
+        d = (a[:, None, :] - b[None, :, :]) / lengthscales
+        return amplitude * np.exp(-0.5 * (d ** 2).sum(axis=2))
+
+    def _unpack(self, theta):
+        k = len(self.span)
+        return np.exp(theta[:k]), np.exp(theta[k]), np.exp(theta[k + 1])
+
+    def _negative_log_likelihood(self, theta, x, y):
+        lengthscales, amplitude, noise = self._unpack(theta)
+        K = self._kernel(x, x, lengthscales, amplitude) + (noise + 1e-8) * np.eye(len(x))
+        try:
+            factor = cho_factor(K, lower=True)
+        except np.linalg.LinAlgError:
+            return 1e10
+        alpha = cho_solve(factor, y)
+        return 0.5 * y @ alpha + np.log(np.diag(factor[0])).sum()
+
+    def fit(self, X, y, optimize=True):
+        self.x = (np.asarray(X, dtype=float) - self.low) / self.span
+        y = np.asarray(y, dtype=float)
+        self.mean, self.scale = y.mean(), y.std() or 1.0
+        self.y = (y - self.mean) / self.scale
+        k = self.x.shape[1]
+        if optimize or not hasattr(self, "theta"):
+            bounds = [(np.log(0.05), np.log(20.0))] * k + [(np.log(0.05), np.log(20.0)), (np.log(1e-6), np.log(0.1))]
+            starts = [np.r_[np.zeros(k), 0.0, np.log(1e-3)]]
+            starts += [np.array([self.rng.uniform(low, high) for low, high in bounds]) for _ in range(self.restarts)]
+            fits = [minimize(self._negative_log_likelihood, start, args=(self.x, self.y), method="L-BFGS-B",
+                             bounds=bounds) for start in starts]
+            self.theta = min(fits, key=lambda fit: fit.fun).x
+        lengthscales, amplitude, noise = self._unpack(self.theta)
+        K = self._kernel(self.x, self.x, lengthscales, amplitude) + (noise + 1e-8) * np.eye(len(self.x))
+        self.factor = cho_factor(K, lower=True)
+        self.alpha = cho_solve(self.factor, self.y)
+        return self
+
+    def predict(self, X):
+        """Predictive mean and standard deviation (of the noise-free function) at the rows of X."""
+        x = (np.asarray(X, dtype=float) - self.low) / self.span
+        lengthscales, amplitude, _ = self._unpack(self.theta)
+        k = self._kernel(x, self.x, lengthscales, amplitude)
+        mean = k @ self.alpha
+        variance = amplitude - (k * cho_solve(self.factor, k.T).T).sum(axis=1)
+        return mean * self.scale + self.mean, np.sqrt(np.clip(variance, 0.0, None)) * self.scale
+
+    def leave_one_out(self):
+        """Closed-form leave-one-out predictions at the training points (no refits)."""
+        K_inv = cho_solve(self.factor, np.eye(len(self.x)))
+        mean = self.y - self.alpha / np.diag(K_inv)
+        return mean * self.scale + self.mean
+
+    @property
+    def lengthscales(self):
+        # In units of the parameter range: short = the target changes quickly with that parameter
+        return self._unpack(self.theta)[0]
+
+
+class ScenarioSurrogate:
+    """One GaussianProcess per target, trained on (X, Y) of training_data()."""
+
+    def __init__(self, ranges=None, targets=None):
+        self.ranges = ranges or DESIGN_RANGES
+        self.targets = targets or TARGETS
+        self.models = {target: GaussianProcess(self.ranges) for target in self.targets}
+
+    def fit(self, X, Y, optimize=True):
+        X = X[list(self.ranges)]
+        for target, model in self.models.items():
+            model.fit(X.values, Y[target].values, optimize)
+        return self
+
+    def predict(self, X):
+        """DataFrame with the predicted mean and '<target> std' of every target at the rows of X."""
+        X = X[list(self.ranges)]
+        out = pd.DataFrame(index=X.index)
+        for target, model in self.models.items():
+            out[target], out[f"{target} std"] = model.predict(X.values)
+        return out
+
+    def leave_one_out_error(self, Y):
+        """Leave-one-out RMSE per target, absolute and relative to the target's mean."""
+        rows = {}
+        for target, model in self.models.items():
+            error = model.leave_one_out() - Y[target].values
+            rmse = float(np.sqrt((error ** 2).mean()))
+            rows[target] = {"rmse": rmse, "relative_rmse": rmse / abs(Y[target].mean())}
+        return pd.DataFrame(rows).T
+
+    def lengthscales(self):
+        return pd.DataFrame({target: model.lengthscales for target, model in self.models.items()},
+                            index=list(self.ranges))
+
+#------------------------------------------------Active learning--------------------------------------------------------
+
+
+def design(n, ranges=None, seed=0):
+    """n space-filling points (Latin hypercube) of the design ranges."""
+    ranges = ranges or DESIGN_RANGES
+    unit = qmc.LatinHypercube(len(ranges), seed=seed).random(n)
+    low = np.array([r[0] for r in ranges.values()])
+    high = np.array([r[1] for r in ranges.values()])
+    return pd.DataFrame(low + unit * (high - low), columns=list(ranges))
+
+
+def select_batch(surrogate, candidates, batch=4, target="Grid Cost(Euro)"):
+    """
+    Greedy uncertainty sampling: take the candidate with the largest predictive std of `target`, condition the GP
+    on it (the std does not depend on the unknown result) and repeat, so the batch spreads over the design space.
+    """
+    model = surrogate.models[target]
+    x, y = model.x * model.span + model.low, model.y * model.scale + model.mean
+    pool = candidates[list(surrogate.ranges)].values
+    believed_x, believed_y = x, y
+    chosen = []
+    for _ in range(batch):
+        _, std = model.predict(pool)
+        std[chosen] = -1
+        best = int(np.argmax(std))
+        chosen.append(best)
+        mean, _ = model.predict(pool[[best]])
+        believed_x, believed_y = np.vstack([believed_x, pool[[best]]]), np.r_[believed_y, mean]
+        model.fit(believed_x, believed_y, optimize=False)
+    # Back to the model trained on solved scenarios only
+    model.fit(x, y, optimize=False)
+    return candidates.iloc[chosen]
+
+
+def solve_designs(points, inputs, base=None):
+    """Solve the design points as full-year scenarios (stored, resumable); returns their scenario ids."""
+    base = scenario.scenario_params(BASE_CASE, **(base or {}))
+    return scenario.run_sweep([{**base, **row} for row in points.to_dict("records")], inputs)
+
+
+def active_learning(inputs=None, initial=8, iterations=4, batch=4, candidates=2000, seed=0):
+    """
+    Solve a space-filling start design, then repeatedly fit the surrogate and solve the `batch` scenarios it is
+    least sure about. Returns (surrogate, X, Y, history) with the leave-one-out error after each round.
+    """
+    inputs = scenario.load_inputs() if inputs is None else inputs
+    pool = design(candidates, seed=seed + 1)
+    ids = solve_designs(design(initial, seed=seed), inputs)
+    history = []
+    surrogate = ScenarioSurrogate()
+    for iteration in range(iterations + 1):
+        X, Y = training_data(ids)
+        surrogate.fit(X, Y)
+        error = surrogate.leave_one_out_error(Y)
+        history.append({"iteration": iteration, "scenarios": len(X),
+                        **{f"{target} LOO rel. RMSE": float(error.at[target, "relative_rmse"]) for target in TARGETS}})
+        logger.info(history[-1])
+        if iteration == iterations:
+            break
+        new = select_batch(surrogate, pool, batch)
+        pool = pool.drop(new.index)
+        start = time.perf_counter()
+        ids += solve_designs(new, inputs)
+        logger.info(f"Solved {len(new)} scenarios in {time.perf_counter() - start:.1f} s")
+    return surrogate, X, Y, pd.DataFrame(history).set_index("iteration")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for name in ("linopy", "pypsa"):
+        logging.getLogger(name).setLevel(logging.ERROR)
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+    surrogate, X, Y, history = active_learning(iterations=iterations)
+    print(history.to_string())
+    print(surrogate.lengthscales().to_string())
@@ -0,0 +1,56 @@
+import pandas as pd
+import xarray as xr
+
+# Grid tariff terms that are not a plain energy price. Norwegian grid tariffs for large consumers add a monthly
+# capacity charge (EUR per kW of the highest hourly import in the month) on top of the energy price.
+#
+# The charge is added to the linopy model of network.optimize() through extra_functionality: one peak variable per
+# month, one row "import <= peak of its month" per snapshot and peak * charge in the objective. The rows grow with the
+# number of snapshots (8760 for a year), not with the number of months: the peak is a maximum over the hours of a
+# month, which an LP can only bound from below hour by hour. Each row has two non-zeros and is cheap for HiGHS.
+
+
+def snapshot_months(snapshots, tz=None):
+    """
+    Billing month of each snapshot. Snapshots of aligned inputs are naive UTC (scenario.build_network); with their
+    time zone `tz` they are billed by the local month, so the first local hours of a month are not counted in the
+    month before.
+    """
+    snapshots = pd.DatetimeIndex(snapshots)
+    if tz is not None:
+        snapshots = snapshots.tz_localize("UTC").tz_convert(tz)
+    return snapshots.strftime("%Y-%m")
+
+
+def add_peak_demand_charge(network, snapshots, peak_charge, generator="Grid"):
+    """
+    extra_functionality hook: monthly peak import variables priced at peak_charge EUR/kW; one row per snapshot.
+
+    Needs hourly snapshots: with snapshot_hours > 1 (hydrogen.segment_inputs) the import of a snapshot is an average
+    over its segment, and the charged peak would understate the hourly one.
+    """
+    weights = network.snapshot_weightings.generators.loc[snapshots]
+    if (weights != 1).any():
+        raise ValueError("The peak demand charge needs hourly snapshots, set snapshot_hours=1")
+    model = network.model
+    months = snapshot_months(snapshots, network.meta.get("timezone"))
+    peak = model.add_variables(lower=0, coords=[pd.Index(months.unique(), name="month")], name=f"{generator}-peak")
+
+    month_of_snapshot = xr.DataArray(months, coords={"snapshot": snapshots}, dims="snapshot")
+    grid = model.variables["Generator-p"].sel(name=generator)
+    model.add_constraints(grid - peak.sel(month=month_of_snapshot) <= 0, name=f"{generator}-peak-upper")
+    model.objective = model.objective + peak_charge * peak.sum()
+
+
+def peak_shaving(network, peak_charge, generator="Grid"):
+    """Monthly grid import peak with and without the local system (batteries, renewables) and its charge."""
+    months = snapshot_months(network.snapshots, network.meta.get("timezone"))
+    base = network.loads_t.p_set.sum(axis=1).groupby(months).max()
+    grid = network.generators_t.p[generator].groupby(months).max()
+    return pd.DataFrame({
+        "Base peak (kW)": base,
+        "Grid peak (kW)": grid,
+        "Peak shaving (kW)": base - grid,
+        "Peak Charge (Euro)": grid * peak_charge,
+        "Peak Charge saved (Euro)": (base - grid) * peak_charge,
+    }).rename_axis("month")
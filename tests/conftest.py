@@ -0,0 +1,25 @@
+import sys
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# The modules are flat scripts in the repository root
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+@pytest.fixture
+def inputs():
+    """Two days of synthetic scenario inputs with a daily price and load cycle."""
+    import mpc
+
+    index = pd.date_range("2024-01-01", periods=48, freq="h")
+    hour = index.hour.to_numpy()
+    inputs = pd.DataFrame(0.0, index=index, columns=mpc.FORECAST_COLUMNS)
+    inputs["load"] = 1500 + 500 * np.sin(2 * np.pi * hour / 24)
+    inputs["spot_price"] = 0.05 + 0.04 * np.sin(2 * np.pi * (hour - 6) / 24)
+    inputs["wind_small"] = 0.3
+    inputs["carbon_intensity"] = 0.025
+    return inputs
@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+
+import carbon
+import scenario
+
+
+@pytest.fixture
+def varying(inputs):
+    """The fixture with an intensity that is lowest at night, so the batteries can shift imports to clean hours."""
+    inputs = inputs.copy()
+    inputs["carbon_intensity"] = 0.025 + 0.015 * np.cos(2 * np.pi * inputs.index.hour.to_numpy() / 24)
+    return inputs
+
+
+def _solve(inputs, **overrides):
+    network = scenario.build_network(inputs, scenario.scenario_params("BatteryWind_Case", **overrides))
+    status, condition = scenario.solve(network, log_to_console=False)
+    assert (status, condition) == ("ok", "optimal")
+    _, economic_results = scenario.extract_results(network)
+    return network, economic_results.iloc[0]
+
+
+@pytest.mark.parametrize("snapshot_hours", [1, 3])
+def test_co2_cap_binds_with_positive_shadow_price(varying, snapshot_hours):
+    free, free_results = _solve(varying, snapshot_hours=snapshot_hours)
+    uncapped = free_results["CO2 Emissions (t)"]
+    assert carbon.co2_shadow_price(free) is None
+
+    capped, capped_results = _solve(varying, snapshot_hours=snapshot_hours, co2_cap=0.995 * uncapped)
+    assert capped_results["CO2 Emissions (t)"] == pytest.approx(0.995 * uncapped, rel=1e-6)
+    assert capped_results["CO2 Shadow Price (Euro/t)"] > 0
+    assert float(capped.objective) > float(free.objective)
+
+    loose, loose_results = _solve(varying, snapshot_hours=snapshot_hours, co2_cap=2 * uncapped)
+    assert loose_results["CO2 Shadow Price (Euro/t)"] == pytest.approx(0, abs=1e-9)
+    assert float(loose.objective) == pytest.approx(float(free.objective))
+
+
+def test_carbon_price_is_charged_on_imports(varying):
+    free, free_results = _solve(varying)
+    priced, priced_results = _solve(varying, carbon_price=100.0)
+    carbon_cost = priced_results["Carbon Cost(Euro)"]
+    assert carbon_cost == pytest.approx(priced_results["CO2 Emissions (t)"] * 100.0)
+    # The priced optimum pays at most the carbon cost of the unpriced dispatch on top
+    upper = float(free.objective) + free_results["CO2 Emissions (t)"] * 100.0
+    assert float(free.objective) < float(priced.objective) <= upper + 1e-6
+    assert priced_results["CO2 Emissions (t)"] <= free_results["CO2 Emissions (t)"] + 1e-9
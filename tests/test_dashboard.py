@@ -0,0 +1,37 @@
+import importlib
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import results_store
+
+pytest.importorskip("dash")
+
+
+@pytest.fixture
+def cubes_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "SWEEPS_DIR", tmp_path / "sweeps")
+    monkeypatch.setattr(results_store, "RESULTS_DIR", tmp_path / "results")
+    monkeypatch.setattr(results_store, "CUBES_DIR", tmp_path / "cubes")
+    return tmp_path / "cubes"
+
+
+def test_import_builds_nothing(cubes_dir):
+    import dashboard
+
+    importlib.reload(dashboard)
+    assert not cubes_dir.exists()
+
+
+def test_build_app_over_cubes(cubes_dir):
+    import dashboard
+
+    index = pd.date_range("2024-01-01", periods=24, freq="h")
+    energy_system = pd.DataFrame({"Load (kWh)": np.arange(24.0), "Grid supply (kWh)": np.arange(24.0),
+                                  "Spot Price (Euro/kWh)": 0.1}, index=index)
+    results_store.save_sweep_result("abc", {}, energy_system, pd.DataFrame({"Total System Cost(Euro)": [1.0]}))
+
+    app = dashboard.build_app(dashboard.load_cubes())
+    assert (cubes_dir / "monthly.pkl").exists()
+    assert {"totals", "monthly", "daily", "hourly"} <= {getattr(child, "id", None) for child in app.layout.children}
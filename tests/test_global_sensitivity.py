@@ -0,0 +1,47 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import global_sensitivity
+import scenario
+
+
+@pytest.fixture
+def weeks(inputs):
+    """January and February 2024 of the fixture's two-day cycle."""
+    months = pd.concat([inputs] * 30)
+    months.index = pd.date_range("2024-01-01", periods=len(months), freq="h")
+    return months
+
+
+def test_representative_weeks_weigh_to_the_year(weeks):
+    reduced = global_sensitivity.representative_weeks(weeks)
+    assert len(reduced) == 2 * 168
+    assert reduced["weight"].sum() == pytest.approx(len(weeks))
+    assert reduced.loc["2024-01", "weight"].sum() == pytest.approx(31 * 24)
+
+
+def test_compiled_surrogate_matches_a_rebuilt_network(weeks):
+    reduced = global_sensitivity.representative_weeks(weeks.iloc[:31 * 24])
+    model = global_sensitivity.SurrogateModel(reduced)
+    for params in ({}, {"e_nom": 1400, "standing_loss": 0.004, "grid_p_nom": 4500, "roof_area_scale": 1.5}):
+        expected = global_sensitivity.surrogate_cost({**model.params, **params}, reduced)
+        assert model.cost(params) == pytest.approx(expected, rel=1e-6)
+
+
+def test_indices_of_a_linear_cost():
+    ranges = {"a": (0.0, 1.0), "b": (0.0, 1.0), "c": (0.0, 1.0)}
+
+    def cost(design):
+        return (2 * design["a"] + design["b"]).to_numpy()
+
+    design = global_sensitivity.sobol_design(ranges, n=1024)
+    indices = global_sensitivity.sobol_indices(cost(design), ranges)
+    # Variance shares 4:1:0
+    np.testing.assert_allclose(indices.loc[["a", "b", "c"], "S1"], [0.8, 0.2, 0.0], atol=0.05)
+    np.testing.assert_allclose(indices.loc[["a", "b", "c"], "ST"], [0.8, 0.2, 0.0], atol=0.05)
+
+    design, steps = global_sensitivity.morris_design(ranges, trajectories=10)
+    indices = global_sensitivity.morris_indices(cost(design), steps, ranges)
+    np.testing.assert_allclose(indices.loc[["a", "b", "c"], "mu"], [2.0, 1.0, 0.0], atol=1e-9)
+    np.testing.assert_allclose(indices.loc[["a", "b", "c"], "sigma"], 0.0, atol=1e-9)
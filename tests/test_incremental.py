@@ -0,0 +1,51 @@
+import pandas as pd
+import pytest
+
+import incremental
+import ingest
+
+pytest.importorskip("pyarrow")
+
+
+def _rain_rows(start, hours):
+    times = pd.date_range(start, periods=hours, freq="h")
+    return pd.DataFrame({"Navn": "Storasund", "Stasjon": "SN47262",
+                         "Tid(norsk normaltid)": times.strftime("%d.%m.%Y %H:%M"),
+                         "Nedbør (1 t)": [f"{hour % 4},5" for hour in range(hours)]})
+
+
+@pytest.fixture
+def rain_source(tmp_path, monkeypatch):
+    """A synthetic MET rain export of one day, with Datasets/ and the ingest cache under tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache / "manifest.json")
+    monkeypatch.setattr(ingest, "LOCK_PATH", cache / ".lock")
+    (tmp_path / "Datasets").mkdir()
+    path = tmp_path / "rain.csv"
+    _rain_rows("2024-01-01", 24).to_csv(path, sep=";", index=False, encoding="utf-8-sig")
+    monkeypatch.setattr(ingest, "SOURCES", {"met_rain": {**ingest.SOURCES["met_rain"], "files": str(path)}})
+    return path
+
+
+def test_appended_rows_extend_the_profile_like_a_full_recompute(rain_source):
+    profile = incremental.PRODUCTION["rain"]["path"]
+    first = incremental.update_production(ingest.ingest(["met_rain"]), ["rain"])
+    assert first["mode"].tolist() == ["full"] and first["rows"].tolist() == [24]
+
+    with open(rain_source, "a", encoding="utf-8") as f:
+        f.write(_rain_rows("2024-01-02", 24).to_csv(sep=";", index=False, header=False))
+    reports = ingest.ingest(["met_rain"])
+    assert reports["mode"].tolist() == ["append"]
+    appended = incremental.update_production(reports, ["rain"])
+    assert appended["mode"].tolist() == ["append"] and appended["rows"].tolist() == [24]
+    assert appended["first_time"].iloc[0] == pd.Timestamp("2024-01-02")
+    incremental_profile = profile.read_text()
+
+    full = incremental.update_production(ingest.ingest(["met_rain"], force=True), ["rain"])
+    assert full["mode"].tolist() == ["full"] and full["rows"].tolist() == [48]
+    assert profile.read_text() == incremental_profile
+
+    # Nothing new: nothing to update
+    assert incremental.update_production(ingest.ingest(["met_rain"]), ["rain"]).empty
@@ -0,0 +1,57 @@
+import multiprocessing
+
+import pandas as pd
+import pytest
+
+import ingest
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def sources(tmp_path, monkeypatch):
+    """Three meter-like sources of one small CSV each, cached under tmp_path."""
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache / "manifest.json")
+    monkeypatch.setattr(ingest, "LOCK_PATH", cache / ".lock")
+    sources = {}
+    for name in ("a", "b", "c"):
+        directory = tmp_path / name
+        directory.mkdir()
+        times = pd.date_range("2024-01-01", periods=48, freq="h", tz="UTC")
+        pd.DataFrame({"Time": times.strftime("%Y-%m-%dT%H:%M:%SZ"), "Energy (kWh)": range(48)}).to_csv(
+            directory / "meter.csv", index=False)
+        sources[name] = {**ingest.SOURCES["meter"], "files": str(directory / "*.csv")}
+    monkeypatch.setattr(ingest, "SOURCES", sources)
+    return sources
+
+
+def test_concurrent_loads_keep_every_source_in_the_manifest(sources):
+    context = multiprocessing.get_context("fork")
+    processes = [context.Process(target=ingest.load, args=(name,)) for name in sources]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join()
+        assert process.exitcode == 0
+    manifest = ingest._load_manifest()
+    assert sorted(entry["source"] for entry in manifest.values()) == ["a", "b", "c"]
+    # Nothing left to parse afterwards
+    assert ingest.ingest().empty
+
+
+def test_load_keeps_every_station(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache / "manifest.json")
+    monkeypatch.setattr(ingest, "LOCK_PATH", cache / ".lock")
+    times = pd.date_range("2024-01-01", periods=3, freq="h").strftime("%d.%m.%Y %H:%M")
+    rows = [{"Navn": name, "Stasjon": station, "Tid(norsk normaltid)": time, "Nedbør (1 t)": f"{value},5"}
+            for name, station, value in (("A", "SN1", 1), ("B", "SN2", 2)) for time in times]
+    pd.DataFrame(rows).to_csv(tmp_path / "rain.csv", sep=";", index=False, encoding="utf-8-sig")
+    monkeypatch.setattr(ingest, "SOURCES", {"rain": {**ingest.SOURCES["met_rain"], "files": str(tmp_path / "rain.csv")}})
+
+    df = ingest.load("rain", columns=["precipitation"])
+    assert len(df) == 6
+    assert df.groupby("station")["precipitation"].first().to_dict() == {"SN1": 1.5, "SN2": 2.5}
@@ -0,0 +1,43 @@
+import numpy as np
+
+import mpc
+import scenario
+
+
+def test_simulate_with_hydrogen(inputs):
+    params = scenario.scenario_params("BatteryWind_Case", hydrogen=True)
+    energy_system, summary = mpc.simulate(inputs, params, horizon=24, forecast="perfect", hours=6)
+    assert len(energy_system) == 6
+    assert "H2_storage (kWh)" in energy_system
+    battery = energy_system["Battery (kWh)"]
+    assert battery.between(params["e_nom"] * params["e_min_pu"] - 1e-6, params["e_nom"] * params["e_max_pu"] + 1e-6).all()
+    assert np.isfinite(summary["grid_cost"])
+
+    # The cyclic H2 store takes no initial SOC, whatever is passed for it
+    model = mpc.WindowModel(params, horizon=24)
+    soc = np.where(np.array(model.stores) == "H2_storage", 5000.0, 300.0)
+    plan = model.solve(inputs.iloc[:24].reset_index(drop=True), soc)
+    np.testing.assert_allclose(plan["soc"][model.batteries].sum(), 300.0 * 6 - plan["store_p"][model.batteries].sum(),
+                               atol=1e-3)
+
+
+def test_simulate_forces_hourly_window(inputs):
+    params = scenario.scenario_params("BatteryWind_Case", hydrogen=True, snapshot_hours=3)
+    model = mpc.WindowModel(params, horizon=24)
+    assert model.params["snapshot_hours"] == 1
+    assert len(model.balance_rows) == 24
+
+    hourly, _ = mpc.simulate(inputs, {**params, "snapshot_hours": 1}, forecast="perfect", hours=6)
+    energy_system, _ = mpc.simulate(inputs, params, forecast="perfect", hours=6)
+    np.testing.assert_allclose(energy_system["Grid supply (kWh)"], hourly["Grid supply (kWh)"])
+
+
+def test_streaming_with_hydrogen_and_segments(inputs):
+    import streaming
+
+    params = scenario.scenario_params("BatteryWind_Case", hydrogen=True, snapshot_hours=3)
+    dispatcher = streaming.StreamingDispatcher(params, horizon=24)
+    setpoints = list(dispatcher.run(streaming.stub_feed(inputs, hours=6)))
+    assert dispatcher.params["snapshot_hours"] == 1
+    assert len(setpoints) == 6
+    assert all(np.isfinite(setpoint["grid"]) for setpoint in setpoints)
@@ -0,0 +1,35 @@
+import numpy as np
+
+import multibus
+import scenario
+
+
+def test_extract_results_on_multibus_network(inputs):
+    params = scenario.scenario_params("BatteryWind_Case")
+    network = multibus.build_multibus_network(inputs, params, multibus.radial_topology(3))
+    status, _ = scenario.solve(network, log_to_console=False)
+    assert status == "ok"
+    energy_system, economic_results = scenario.extract_results(network)
+    np.testing.assert_allclose(energy_system["Load (kWh)"], inputs["load"].to_numpy())
+    assert economic_results["Total System Cost(Euro)"].iloc[0] == float(network.objective)
+    assert all(f"{store} (kWh)" in energy_system for store in network.stores.index)
+
+
+def test_multibus_keeps_hydrogen_store_on_h2_bus(inputs):
+    import hydrogen
+
+    params = scenario.scenario_params("BatteryWind_Case", hydrogen=True)
+    network = multibus.build_multibus_network(inputs, params, multibus.radial_topology(2))
+    assert network.stores.at[hydrogen.H2_STORE, "bus"] == "H2"
+    assert network.links.at[hydrogen.ELECTROLYSER, "bus1"] == "H2"
+    batteries = network.stores.index.intersection(scenario.BATTERY_NAMES)
+    assert (network.stores.loc[batteries, "bus"] == "bus1").all()
+
+    status, _ = scenario.solve(network, log_to_console=False)
+    assert status == "ok"
+    energy_system, _ = scenario.extract_results(network)
+    # Hydrogen only enters or leaves the store through the links
+    h2 = energy_system["H2_storage (kWh)"]
+    produced = energy_system["Electrolyser (kWh)"] * params["electrolyser_efficiency"]
+    used = energy_system["Fuel cell (kWh)"] / params["fuel_cell_efficiency"]
+    np.testing.assert_allclose(h2.iloc[-1] - h2.iloc[0], (produced - used).iloc[1:].sum(), atol=1e-3)
@@ -0,0 +1,13 @@
+import pareto
+
+
+def test_min_import_skips_non_optimal_solves(inputs):
+    model = pareto.FrontModel(inputs)
+    lowest = model.min_import(budget=1e6)
+    assert lowest is not None and lowest >= 0.0
+
+    model.highs.setOptionValue("simplex_iteration_limit", 0)
+    model.highs.clearSolver()
+    assert model.min_import(budget=2e6) is None
+    model.highs.setOptionValue("simplex_iteration_limit", 2**31 - 1)
+    assert model.solve(budget=1e6)["status"] == "optimal"
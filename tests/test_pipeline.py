@@ -0,0 +1,59 @@
+import pytest
+
+import pipeline
+
+
+def test_study_graph():
+    deps = pipeline.dependencies()
+    assert deps["battery_rain"] == {"rain_production", "load_profile"}
+    assert deps["analysis"] == {"load_profile", "battery_case", "battery_rain", "battery_solar", "battery_wind",
+                                "battery_solar_wind", "battery_wind_park"}
+    order = pipeline.topological_order()
+    assert sorted(order) == sorted(pipeline.STAGES)
+    assert all(order.index(dep) < order.index(name) for name, names in deps.items() for dep in names)
+    assert pipeline.upstream(["battery_wind_park"]) == {"battery_wind_park", "wind_park_production", "load_profile"}
+
+
+def test_graph_errors():
+    stages = {"a": {"inputs": ["b.txt"], "outputs": ["a.txt"]}, "b": {"inputs": ["a.txt"], "outputs": ["b.txt"]}}
+    with pytest.raises(ValueError, match="Cycle"):
+        pipeline.topological_order(stages)
+    with pytest.raises(ValueError, match="written by both"):
+        pipeline.dependencies({**stages, "c": {"inputs": [], "outputs": ["a.txt"]}})
+
+
+@pytest.fixture
+def stages(tmp_path, monkeypatch):
+    """clean strips in.txt into mid.txt, count writes the length of mid.txt, broken fails and blocks after."""
+    monkeypatch.chdir(tmp_path)
+    (tmp_path / "in.txt").write_text("abc")
+    (tmp_path / "clean.py").write_text("open('mid.txt', 'w').write(open('in.txt').read().strip())\n")
+    (tmp_path / "count.py").write_text("open('out.txt', 'w').write(str(len(open('mid.txt').read())))\n")
+    (tmp_path / "broken.py").write_text("raise SystemExit(1)\n")
+    return {
+        "clean": {"script": "clean.py", "args": [], "inputs": ["clean.py", "in.txt"], "outputs": ["mid.txt"]},
+        "count": {"script": "count.py", "args": [], "inputs": ["count.py", "mid.txt"], "outputs": ["out.txt"]},
+        "broken": {"script": "broken.py", "args": [], "inputs": ["broken.py", "in.txt"], "outputs": ["never.txt"]},
+        "after": {"script": "count.py", "args": [], "inputs": ["never.txt"], "outputs": ["after.txt"]},
+    }
+
+
+def _statuses(stages, **options):
+    return pipeline.run(stages=stages, workers=2, **options)["status"].to_dict()
+
+
+def test_run_skips_up_to_date_stages(stages, tmp_path):
+    assert _statuses(stages) == {"broken": "failed", "clean": "ran", "after": "blocked", "count": "ran"}
+    assert (tmp_path / "out.txt").read_text() == "3"
+    assert _statuses(stages, targets=["count"]) == {"clean": "skipped", "count": "skipped"}
+
+    # Only whitespace added: clean re-runs, but mid.txt keeps its bytes so count does not
+    (tmp_path / "in.txt").write_text("abc\n")
+    assert _statuses(stages, targets=["count"], dry_run=True) == {"clean": "stale", "count": "stale"}
+    assert _statuses(stages, targets=["count"]) == {"clean": "ran", "count": "skipped"}
+
+    # An edited output is restored
+    (tmp_path / "out.txt").write_text("edited")
+    assert _statuses(stages, targets=["count"]) == {"clean": "skipped", "count": "ran"}
+    assert (tmp_path / "out.txt").read_text() == "3"
+    assert _statuses(stages, targets=["count"], force=True) == {"clean": "ran", "count": "ran"}
@@ -0,0 +1,40 @@
+import pandas as pd
+import pytest
+
+import plotting
+import results_store
+
+
+@pytest.fixture
+def case_results(tmp_path, monkeypatch, inputs):
+    """Results of BatteryWind_Case in a temporary Results/ directory."""
+    monkeypatch.setattr(results_store, "RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(plotting, "MANIFEST_PATH", tmp_path / ".plot_manifest.json")
+    case = "BatteryWind_Case"
+    results_store.case_dir(case).mkdir()
+    energy_system = pd.DataFrame({"Load (kWh)": inputs["load"], "Grid supply (kWh)": inputs["load"] * 0.8,
+                                  "Spot Price (Euro/kWh)": inputs["spot_price"], "Wind (kWh)": inputs["load"] * 0.2,
+                                  **{column: 500.0 for column in results_store.BATTERY_COLUMNS}})
+    energy_system.to_csv(results_store.energy_system_path(case))
+    return case
+
+
+def test_failed_figure_keeps_manifest_of_rendered_ones(case_results, monkeypatch):
+    specs = plotting.case_figure_specs(case_results)
+    broken = {**specs[0], "output": str(results_store.case_dir(case_results) / "missing" / "broken.png")}
+    with pytest.raises(RuntimeError, match="1 of"):
+        plotting.render_figures(specs + [broken], workers=1)
+    manifest = plotting.load_manifest()
+    assert sorted(manifest) == sorted(spec["output"] for spec in specs)
+    # Only the failed figure is drawn again
+    with pytest.raises(RuntimeError):
+        plotting.render_figures(specs + [broken], workers=1)
+
+
+def test_style_change_rerenders(case_results, monkeypatch):
+    spec = plotting.case_figure_specs(case_results)[0]
+    before = plotting.spec_hash(spec, "data")
+    monkeypatch.setattr(plotting, "STYLE_VERSION", plotting.STYLE_VERSION + 1)
+    assert plotting.spec_hash(spec, "data") != before
+    monkeypatch.setattr(plotting, "WEEK_END", plotting.WEEK_END + 1)
+    assert plotting.spec_hash(spec, "data") != before
@@ -0,0 +1,50 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import ingest
+import profiles
+import rain_product
+import scenario
+
+pytest.importorskip("pyarrow")
+
+
+@pytest.fixture
+def datasets(tmp_path, monkeypatch):
+    """A Datasets/ directory of 48 hours with a synthetic rain source that misses two measurements."""
+    monkeypatch.chdir(tmp_path)
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache / "manifest.json")
+    monkeypatch.setattr(ingest, "LOCK_PATH", cache / ".lock")
+    directory = tmp_path / "Datasets"
+    directory.mkdir()
+    n_hours = 48
+    times = pd.date_range("2024-01-01", periods=n_hours, freq="h")
+    pd.Series(1.0, index=times).to_csv(directory / "aibel_yearly.csv", header=False, sep=";")
+    pd.DataFrame({"Power_Consumption": np.full(n_hours, 1500.0)}, index=times).to_csv(
+        directory / "shuffled_power_timeseries_by_day.csv")
+    pd.DataFrame({"Spot Price (NO2) EUR/MWh": np.full(n_hours, 50.0)}).to_csv(directory / "Spot_price.csv")
+    for name in ("wind_turbine_output.csv", "wind_turbine_output_wind_park.csv"):
+        pd.DataFrame({"power_output_kW": np.full(n_hours - 6, 10.0)}).to_csv(directory / name)
+    pd.DataFrame({"0": np.linspace(-1.0, 5.0, n_hours)}, index=times).to_csv(directory / "PV_system_production.csv")
+
+    precipitation = [f"{value % 3},5" for value in range(n_hours - 8)]
+    precipitation[5] = precipitation[20] = ""
+    raw = pd.DataFrame({"Navn": "Storasund", "Stasjon": "SN47262",
+                        "Tid(norsk normaltid)": times[:n_hours - 8].strftime("%d.%m.%Y %H:%M"),
+                        "Nedbør (1 t)": precipitation})
+    raw.to_csv(directory / "rain_data_storasund_1year.csv", sep=";", index=False, encoding="utf-8-sig")
+    monkeypatch.setattr(ingest, "SOURCES", {"met_rain": {**ingest.SOURCES["met_rain"],
+                                                         "files": str(directory / "rain_data_storasund_1year.csv")}})
+    # rain_production.csv as rain_product.py writes it
+    rain_product.rain_production(ingest.load("met_rain")).to_csv(directory / "rain_production.csv", index=False)
+    return directory
+
+
+def test_generated_rain_equals_load_inputs(datasets):
+    expected = scenario.load_inputs()
+    assert expected["rain"].isna().sum() == 2
+    generated = profiles.generated_inputs(names=["rain"], workers=1)
+    pd.testing.assert_frame_equal(generated, expected)
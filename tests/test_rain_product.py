@@ -0,0 +1,29 @@
+import pandas as pd
+import pytest
+
+import ingest
+import rain_product
+
+pytest.importorskip("pyarrow")
+
+
+def test_rain_production_keeps_the_station_columns(tmp_path, monkeypatch):
+    cache = tmp_path / "cache"
+    monkeypatch.setattr(ingest, "CACHE_DIR", cache)
+    monkeypatch.setattr(ingest, "MANIFEST_PATH", cache / "manifest.json")
+    monkeypatch.setattr(ingest, "LOCK_PATH", cache / ".lock")
+    times = pd.date_range("2024-02-25 01:00", periods=3, freq="h").strftime("%d.%m.%Y %H:%M")
+    raw = pd.DataFrame({"Navn": "Karmøy - Storasund", "Stasjon": "SN47262", "Tid(norsk normaltid)": times,
+                        "Nedbør (1 t)": ["0,0", "1,5", "2,0"]})
+    raw.to_csv(tmp_path / "rain.csv", sep=";", index=False, encoding="utf-8-sig")
+    monkeypatch.setattr(ingest, "SOURCES", {"met_rain": {**ingest.SOURCES["met_rain"],
+                                                         "files": str(tmp_path / "rain.csv")}})
+
+    df = rain_product.rain_production(ingest.load("met_rain"))
+    assert list(df.columns) == ["Navn", "Stasjon", "Tid(norsk normaltid)", "Nedbør (1 t)", "rain_production"]
+    assert df["Navn"].eq("Karmøy - Storasund").all() and df["Stasjon"].eq("SN47262").all()
+    # battery_rain.py and scenario.load_inputs read the written file with the time as third column
+    df.to_csv(tmp_path / "rain_production.csv", index=False)
+    written = pd.read_csv(tmp_path / "rain_production.csv", index_col=2)
+    assert list(written.index) == list(times)
+    assert written["rain_production"].iloc[0] == 0.0 and written["rain_production"].iloc[2] > 0
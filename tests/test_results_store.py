@@ -0,0 +1,43 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import results_store
+
+
+@pytest.fixture
+def sweeps(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "SWEEPS_DIR", tmp_path)
+    return tmp_path
+
+
+def _energy_system(scale):
+    index = pd.date_range("2024-01-01", periods=24, freq="h")
+    return pd.DataFrame({"Load (kWh)": np.arange(24.0) * scale, "Grid supply (kWh)": np.arange(24.0)}, index=index)
+
+
+@pytest.mark.parametrize("first, second", [({}, None), (None, {})])
+def test_save_replaces_other_storage_form(sweeps, first, second):
+    economics = pd.DataFrame({"Total System Cost(Euro)": [1.0]})
+    results_store.save_sweep_result("abc", {"e_nom": 1}, _energy_system(1.0), economics, compact=first)
+    results_store.save_sweep_result("abc", {"e_nom": 1}, _energy_system(2.0), economics, compact=second)
+    stored = results_store.load_sweep_energy_system("abc")
+    np.testing.assert_allclose(stored["Load (kWh)"], np.arange(24.0) * 2.0)
+    assert len(list((sweeps / "abc").glob("energy_system.*"))) == 1
+
+
+def test_cubes_include_sweeps_with_tariffs(sweeps, tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "RESULTS_DIR", tmp_path / "results")
+    monkeypatch.setattr(results_store, "CUBES_DIR", tmp_path / "cubes")
+    energy_system = _energy_system(1.0).assign(**{"Spot Price (Euro/kWh)": 0.1, "Grid export (kWh)": 10.0,
+                                                  "Wind (kWh)": 5.0})
+    params = {"import_tariff": 0.02, "export_tariff": 0.03}
+    economics = pd.DataFrame({"Total System Cost(Euro)": [1.0]})
+    results_store.save_sweep_result("abc", params, energy_system, economics)
+
+    cubes = results_store.build_cubes()
+    monthly = cubes["monthly"].loc["abc"].iloc[0]
+    assert monthly["Export revenue (Euro)"] == pytest.approx(24 * 10.0 * 0.07)
+    assert monthly["Grid cost (Euro)"] == pytest.approx(np.arange(24.0).sum() * 0.12)
+    assert monthly["Renewables (kWh)"] == pytest.approx(24 * 5.0)
+    assert results_store.update_cubes() == {}
@@ -0,0 +1,38 @@
+import scenario
+
+
+def test_scenario_id_ignores_defaults():
+    assert scenario.scenario_id({}) == scenario.scenario_id(scenario.scenario_params())
+    assert scenario.scenario_id({"e_nom": 500}) == scenario.scenario_id(scenario.scenario_params(e_nom=500))
+    assert scenario.scenario_id({"e_nom": 500}) != scenario.scenario_id({})
+
+
+def test_scenario_id_covers_inputs(inputs):
+    params = scenario.scenario_params("BatteryWind_Case")
+    changed = inputs.copy()
+    changed.iloc[-1, 0] += 1.0
+    assert scenario.scenario_id(params, inputs) == scenario.scenario_id(params, inputs.copy())
+    assert scenario.scenario_id(params, inputs) != scenario.scenario_id(params, changed)
+    assert scenario.scenario_id(params, inputs) != scenario.scenario_id(params)
+
+
+def test_run_scenario_resume_does_not_reuse_other_inputs(inputs, tmp_path, monkeypatch):
+    import results_store
+
+    monkeypatch.setattr(results_store, "SWEEPS_DIR", tmp_path)
+    params = scenario.scenario_params("BatteryWind_Case")
+    first = scenario.run_scenario(params, inputs)
+    assert scenario.run_scenario(params, inputs) == first
+    changed = inputs.assign(load=inputs["load"] * 1.1)
+    second = scenario.run_scenario(params, changed)
+    assert second != first
+    assert results_store.has_sweep_result(second)
+
+
+def test_run_case_does_not_write_results_by_default(inputs, tmp_path, monkeypatch):
+    import results_store
+
+    monkeypatch.setattr(results_store, "RESULTS_DIR", tmp_path)
+    energy_system, economic_results = scenario.run_case("BatteryWind_Case", inputs, log_to_console=False)
+    assert len(energy_system) == len(inputs)
+    assert not any(tmp_path.iterdir())
@@ -0,0 +1,62 @@
+import pytest
+
+import results_store
+import scenario
+import scenario_queue
+
+
+@pytest.fixture
+def queue(tmp_path):
+    connection = scenario_queue.connect(tmp_path / "queue.sqlite")
+    yield connection
+    connection.close()
+
+
+def test_submit_is_idempotent_and_claims_are_exclusive(queue):
+    specs = scenario_queue.grid_specs(scenario.scenario_params("BatteryWind_Case"), e_nom=[500, 1000])
+    ids = scenario_queue.submit(queue, specs)
+    assert scenario_queue.submit(queue, specs[:1]) == ids[:1]
+    assert scenario_queue.status(queue) == {"pending": 2}
+
+    first = scenario_queue.claim(queue, "a")
+    second = scenario_queue.claim(queue, "b")
+    assert {first[0], second[0]} == set(ids)
+    assert scenario_queue.claim(queue, "c") is None
+    assert first[1]["e_nom"] in (500, 1000)
+
+
+def test_expired_lease_is_requeued_and_the_old_worker_cannot_finish(queue):
+    [scenario_id] = scenario_queue.submit(queue, [{}])
+    scenario_queue.claim(queue, "crashed")
+    queue.execute("UPDATE scenarios SET heartbeat = heartbeat - 100")
+
+    assert scenario_queue.claim(queue, "fresh", lease=60)[0] == scenario_id
+    scenario_queue._finish(queue, scenario_id, "crashed")
+    assert scenario_queue.status(queue) == {"running": 1}
+    scenario_queue._finish(queue, scenario_id, "fresh")
+    assert scenario_queue.status(queue) == {"done": 1}
+
+
+def test_failures_retry_until_out_of_attempts(queue):
+    [scenario_id] = scenario_queue.submit(queue, [{}])
+    for attempt in range(2):
+        assert scenario_queue.claim(queue, "w", max_attempts=2)[0] == scenario_id
+        scenario_queue._finish(queue, scenario_id, "w", error="boom", max_attempts=2)
+    assert scenario_queue.status(queue) == {"failed": 1}
+    assert scenario_queue.failures(queue) == [(scenario_id, 2, "boom")]
+    assert scenario_queue.claim(queue, "w", max_attempts=2) is None
+
+    assert scenario_queue.retry_failed(queue) == 1
+    assert scenario_queue.claim(queue, "w", max_attempts=2)[0] == scenario_id
+
+
+def test_worker_solves_the_queue(tmp_path, monkeypatch, inputs):
+    monkeypatch.setattr(results_store, "SWEEPS_DIR", tmp_path / "sweeps")
+    path = tmp_path / "queue.sqlite"
+    connection = scenario_queue.connect(path)
+    scenario_queue.submit(connection, [scenario.scenario_params("BatteryWind_Case")])
+
+    assert scenario_queue.run_worker(path, inputs=inputs) == 1
+    assert scenario_queue.status(connection) == {"done": 1}
+    assert len(results_store.available_sweeps()) == 1
+    connection.close()
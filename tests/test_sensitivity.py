@@ -0,0 +1,25 @@
+import pytest
+
+import scenario
+import sensitivity
+
+
+@pytest.fixture
+def solved(inputs):
+    network = scenario.build_network(inputs, scenario.scenario_params("BatteryWind_Case"))
+    status, _ = scenario.solve(network, log_to_console=False)
+    assert status == "ok"
+    return network
+
+
+def test_dual_sensitivities_match_finite_differences(solved, inputs):
+    checked = sensitivity.validate(solved, inputs, ["e_nom", "import_tariff", "spot_price"])
+    assert (checked["rel_error"] < 1e-6).all(), checked
+    # Dearer imports cost more, a larger battery saves
+    assert (checked.loc[["import_tariff", "spot_price"], "dual"] > 0).all()
+    assert checked.at["e_nom", "dual"] < 0
+
+
+def test_ignored_store_efficiencies_have_no_effect(solved, inputs):
+    estimates = sensitivity.sensitivities(solved, inputs, ["efficiency_store", "efficiency_dispatch"])
+    assert (estimates["d_cost"] == 0).all()
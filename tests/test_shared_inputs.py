@@ -0,0 +1,41 @@
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import shared_inputs
+
+
+def _checksum(_):
+    inputs = shared_inputs.worker_inputs()
+    return float(inputs["load"].sum()), str(inputs.index.tz)
+
+
+@pytest.mark.parametrize("tz", [None, "Europe/Oslo"])
+def test_publish_attach_round_trip(inputs, tz):
+    # The block holds the index as int64 nanoseconds
+    inputs = inputs.set_axis(inputs.index.as_unit("ns"))
+    if tz is not None:
+        inputs = inputs.tz_localize(tz)
+    block, handle = shared_inputs.publish(inputs)
+    try:
+        attached_block, attached = shared_inputs.attach(handle)
+        pd.testing.assert_frame_equal(attached, inputs, check_freq=False)
+        assert not attached.to_numpy().flags.writeable
+        attached_block.close()
+
+        with ProcessPoolExecutor(1, initializer=shared_inputs.init_worker, initargs=(handle,)) as pool:
+            assert list(pool.map(_checksum, range(2))) == [(float(inputs["load"].sum()), str(inputs.index.tz))] * 2
+    finally:
+        block.close()
+        block.unlink()
+
+
+def test_memmap_round_trip(inputs, tmp_path, monkeypatch):
+    monkeypatch.setattr(shared_inputs, "MEMMAP_DIR", tmp_path)
+    inputs = inputs.set_axis(inputs.index.as_unit("ns")).tz_localize("UTC")
+    handle = shared_inputs.publish_memmap(inputs, "test")
+    pd.testing.assert_frame_equal(shared_inputs.attach_memmap(handle), inputs, check_freq=False)
+    shared_inputs.init_worker(handle)
+    np.testing.assert_array_equal(shared_inputs.worker_inputs().to_numpy(), inputs.to_numpy())
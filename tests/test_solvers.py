@@ -0,0 +1,45 @@
+import linopy
+import pytest
+
+import solvers
+
+
+@pytest.fixture
+def model():
+    """min x + 2y  s.t.  x + y >= 3, x <= 2."""
+    m = linopy.Model()
+    x = m.add_variables(lower=0, upper=2, name="x")
+    y = m.add_variables(lower=0, name="y")
+    m.add_constraints(x + y >= 3, name="demand")
+    m.add_objective(x + 2 * y)
+    return m
+
+
+def test_fallback_keeps_usable_attempt(model, monkeypatch):
+    monkeypatch.setattr(solvers, "installed_solvers", lambda: ["highs", "cbc"])
+    calls = []
+    solve = linopy.Model.solve
+
+    def flaky_solve(self, solver_name, **options):
+        calls.append((solver_name, options))
+        if solver_name == "cbc":
+            self.reset_solution()  # As linopy does before calling the backend
+            raise RuntimeError("cbc crashed")
+        status, _ = solve(self, solver_name=solver_name, **options)
+        self.termination_condition = "time_limit"  # As HiGHS stopping at its time limit with a feasible point
+        return status, "time_limit"
+
+    monkeypatch.setattr(linopy.Model, "solve", flaky_solve)
+    status, condition, attempts = solvers.solve_model(model, log_to_console=False, presolve="off")
+    assert (status, condition) == ("ok", "time_limit")
+    assert [attempt["solver"] for attempt in attempts] == ["highs", "cbc"]
+    assert model.objective.value == pytest.approx(4.0)
+    assert float(model.variables["y"].solution) == pytest.approx(1.0)
+    assert float(model.constraints["demand"].dual) == pytest.approx(2.0)
+
+    # Generic options are translated per backend, backend specific ones only go to the first solver
+    highs_options, cbc_options = calls[0][1], calls[1][1]
+    assert highs_options["log_to_console"] is False and highs_options["presolve"] == "off"
+    assert "log_to_console" not in cbc_options and "presolve" not in cbc_options
+    assert cbc_options["sec"] == highs_options["time_limit"]
+
@@ -0,0 +1,43 @@
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+import scenario
+import streaming
+
+
+def test_tail_feed_waits_for_partial_lines(tmp_path):
+    path = tmp_path / "feed.csv"
+    path.write_text("time,load,spot_price\n2024-01-01 00:00,1500,0.05\n2024-01-01 01:00,16")
+
+    def finish_line():
+        time.sleep(0.3)
+        with open(path, "a") as f:
+            f.write("00,0.07\n2024-01-01 02:00,1700,\n")
+
+    writer = threading.Thread(target=finish_line)
+    writer.start()
+    updates = list(streaming.tail_feed(path, poll_interval=0.05, timeout=1.0))
+    writer.join()
+
+    assert [update["time"] for update in updates] == list(pd.date_range("2024-01-01", periods=3, freq="h"))
+    assert updates[1] == {"time": pd.Timestamp("2024-01-01 01:00"), "load": 1600.0, "spot_price": 0.07}
+    # Empty fields are left out of the update
+    assert "spot_price" not in updates[2]
+
+
+def test_tail_feed_drives_dispatcher_like_stub_feed(tmp_path, inputs):
+    path = tmp_path / "feed.csv"
+    inputs.iloc[:4].to_csv(path, index_label="time")
+    params = scenario.scenario_params("BatteryWind_Case")
+
+    stub = list(streaming.StreamingDispatcher(params).run(streaming.stub_feed(inputs, hours=4)))
+    dispatcher = streaming.StreamingDispatcher(params)
+    tailed = list(dispatcher.run(streaming.tail_feed(path, poll_interval=0.01, timeout=0.1)))
+
+    assert len(tailed) == 4
+    for name in ("grid", "battery", "soc"):
+        np.testing.assert_allclose([s[name] for s in tailed], [s[name] for s in stub], atol=1e-6)
+    assert dispatcher.latency_report()["steps"] == 4
@@ -0,0 +1,19 @@
+import pandas as pd
+import pytest
+
+import results_store
+import scenario
+import surrogate
+
+
+def test_renewable_share_excludes_fuel_cell(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_store, "SWEEPS_DIR", tmp_path)
+    params = scenario.scenario_params(surrogate.BASE_CASE, hydrogen=True)
+    economics = pd.DataFrame({"Grid supply (kWh)": [600.0], "Grid Cost(Euro)": [60.0],
+                              "Wind Generation (kWh)": [300.0], "Solar Generation (kWh)": [100.0],
+                              "Fuel Cell Generation (kWh)": [200.0]})
+    hourly = pd.DataFrame({"Load (kWh)": [1.0]}, index=pd.date_range("2024-01-01", periods=1, freq="h"))
+    results_store.save_sweep_result("abc", params, hourly, economics)
+
+    _, targets = surrogate.training_data()
+    assert targets.loc["abc", "Renewable share"] == pytest.approx(400.0 / 1000.0)
@@ -0,0 +1,36 @@
+import pandas as pd
+
+import scenario
+import tariffs
+
+
+def test_snapshot_months_are_local():
+    snapshots = pd.DatetimeIndex(["2024-01-31 22:00", "2024-01-31 23:00", "2024-07-31 22:00"])
+    assert list(tariffs.snapshot_months(snapshots)) == ["2024-01", "2024-01", "2024-07"]
+    assert list(tariffs.snapshot_months(snapshots, "Europe/Oslo")) == ["2024-01", "2024-02", "2024-08"]
+
+
+def test_peak_charge_bills_local_months(inputs):
+    local = inputs.set_axis(pd.date_range("2024-01-31", periods=len(inputs), freq="h", tz="Europe/Oslo"))
+    local.loc[pd.Timestamp("2024-02-01 00:00", tz="Europe/Oslo"), "load"] = 4000.0
+    network = scenario.build_network(local, scenario.scenario_params(peak_charge=5.0))
+    status, _ = scenario.solve(network, log_to_console=False)
+    assert status == "ok"
+    peaks = tariffs.peak_shaving(network, 5.0)
+    assert list(peaks.index) == ["2024-01", "2024-02"]
+    assert peaks.at["2024-02", "Base peak (kW)"] == 4000.0
+    assert peaks.at["2024-01", "Base peak (kW)"] < 4000.0
+
+
+def test_peak_charge_rows_and_segments(inputs):
+    import pytest
+
+    network = scenario.build_network(inputs, scenario.scenario_params(peak_charge=5.0))
+    model = network.optimize.create_model()
+    scenario.extra_functionality(network, network.snapshots)
+    assert model.constraints["Grid-peak-upper"].labels.size == len(inputs)
+    assert model.variables["Grid-peak"].labels.size == 1
+
+    segmented = scenario.build_network(inputs, scenario.scenario_params(peak_charge=5.0, snapshot_hours=3))
+    with pytest.raises(ValueError, match="hourly"):
+        scenario.solve(segmented, log_to_console=False)